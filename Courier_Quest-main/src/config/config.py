@@ -1,3 +1,5 @@
+from datetime import datetime
+
 WEATHER_MULTIPLIERS = {
     "clear": 1.00,
     "clouds": 0.98,
@@ -11,6 +13,18 @@ WEATHER_MULTIPLIERS = {
 
 URL = "https://tigerds-api.kindflower-ccaf48b6.eastus.azurecontainerapps.io/"
 
+# Ciudades entre las que se puede rotar (la primera se carga al iniciar)
+CITY_URLS = [URL]
+
+# Memoria máxima (MB) para las ciudades cargadas en el registro
+CITY_CACHE_BUDGET_MB = 256
+
+# Mapas con al menos estas celdas se abren por chunks en disco (ChunkedCity)
+# en vez de compilarse enteros a memoria
+CHUNKED_CITY_MIN_CELLS = 4_000_000
+CITY_CHUNK_SIZE = 64
+CHUNKED_CITY_MEMORY_BUDGET_MB = 64
+
 # --- Constantes de Jugador y Reputación ---
 REP_BONUS_EARLY = 5
 REP_BONUS_ON_TIME = 3
@@ -20,11 +34,75 @@ REP_PENALTY_LATE = -5
 REP_PENALTY_VERY_LATE = -10
 REP_PENALTY_CANCEL_ORDER = -4
 
+# Vencimiento de pedidos: aviso antes del deadline y descarte de los que se
+# llevan con este atraso (con REP_PENALTY_VERY_LATE)
+ORDER_WARNING_SECONDS = 60
+ORDER_EXPIRY_GRACE_SECONDS = 300
+
 # CAMBIO IMPORTANTE: Tiempo base de pedido en segundos (10 minutos = 600 segundos)
 # Este es el tiempo que se usa para calcular si una entrega es "temprana" (20% antes del deadline)
 ORDER_BASE_TIME_SECONDS = 600
 
+# Optimizador de rutas: peso de cada segundo de atraso y presupuesto por cálculo (ms)
+ROUTE_LATENESS_WEIGHT = 10
+ROUTE_BUDGET_MS = 12
+
+# Ranking de pedidos: milisegundos por cuadro para avanzar el campo de tiempos desde el repartidor
+ORDER_RANK_BUDGET_MS = 4
+
+# Selección de pedidos bajo el peso máximo: DP exacta hasta esa cantidad de
+# estados (pedidos * capacidad); si no, búsqueda exacta hasta EXACT_ITEMS
+# pedidos, DP aproximada (pago >= (1 - epsilon) del óptimo) hasta FPTAS_ITEMS
+# y greedy para más. Si la selección no se puede entregar completa a tiempo,
+# se rearma validando a lo sumo MAX_CHECKS pedidos (un plan de ruta cada uno).
+ORDER_SELECTION_DP_CELLS = 200000
+ORDER_SELECTION_EPSILON = 0.2
+ORDER_SELECTION_EXACT_ITEMS = 12
+ORDER_SELECTION_FPTAS_ITEMS = 40
+ORDER_SELECTION_MAX_CHECKS = 4
+
+# Tamaño (en tiles) de las celdas del índice espacial de pedidos disponibles
+ORDER_GRID_CELL = 8
+
+# Feeds de pedidos grandes: leerlos por lotes durante la partida en vez de todos al inicio.
+# Apagado por defecto: la carga completa ya se parsea por bloques, se prepara en el
+# proceso de fondo y reutiliza el caché de anotaciones, que por lotes no se usa.
+STREAM_JOBS = False
+JOB_STREAM_BATCH = 500
+
+# Hora simulada de inicio del juego; debe coincidir con los horarios de los pedidos del API
+GAME_START_DATETIME = datetime(2025, 9, 1, 12, 0, 0)
+
+# Cada cuántos segundos de juego se consultan parches del mapa al API
+MAP_PATCH_INTERVAL = 30
+
+# Parches anotados sobre el mapa compilado antes de recompilarlo al cargar
+MAP_PATCH_LOG_LIMIT = 64
+
 # Constantes de resistencia
 STAMINA_RECOVERY_RESTING = 5
 STAMINA_RECOVERY_AT_POINT = 10
-STAMINA_EXHAUSTED_THRESHOLD = 30
\ No newline at end of file
+STAMINA_EXHAUSTED_THRESHOLD = 30
+
+# Tiles donde se descansa a STAMINA_RECOVERY_AT_POINT (parques)
+REST_POINT_TILES = ("P",)
+
+# Planificador con resistencia: tamaño de los buckets de resistencia y de cada descanso
+STAMINA_PLANNER_STEP = 2
+STAMINA_PLANNER_REST_STEP = 10
+
+# Velocidad base del jugador (tiles por segundo sobre superficie de peso 1.0)
+PLAYER_BASE_SPEED = 3
+
+# Tráfico por franja horaria: (hora inicio, hora fin, {tile: multiplicador de velocidad}).
+# Vacío = sin tráfico; ejemplo: [(12, 14, {"C": 0.85})]
+TRAFFIC_BUCKETS = []
+
+# Presupuesto (segundos de juego) de la región alcanzable que se muestra en el mapa
+ISOCHRONE_SECONDS = 30
+
+# Posición inicial del jugador (los pedidos deben ser alcanzables desde aquí)
+PLAYER_SPAWN = (1, 1)
+
+# Distancia máxima (en tiles) para reubicar un pedido inalcanzable; si es mayor se descarta
+MAX_JOB_RELOCATION = 10
\ No newline at end of file
@@ -0,0 +1,361 @@
+import hashlib
+import json
+import math
+import random
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from .city import City, expand_weights
+
+
+class _Chunk:
+    """Bloque rectangular del mapa cargado en memoria."""
+
+    __slots__ = ('x0', 'y0', 'width', 'height', 'codes', 'blocked', 'weights', 'dirty')
+
+    def __init__(self, x0, y0, width, height, codes, blocked_table, weight_by_code):
+        self.x0 = x0
+        self.y0 = y0
+        self.width = width
+        self.height = height
+        self.codes = codes
+        self.blocked = bytearray(codes.translate(blocked_table))
+        self.weights = expand_weights(codes, weight_by_code)
+        self.dirty = False
+
+    @property
+    def nbytes(self):
+        return len(self.codes) * 6
+
+
+class _ChunkedPlane:
+    """Vista indexada por celda plana sobre una matriz repartida en chunks."""
+
+    def __init__(self, city, attr):
+        self.city = city
+        self.attr = attr
+
+    def __len__(self):
+        return self.city.width * self.city.height
+
+    def __getitem__(self, index):
+        y, x = divmod(index, self.city.width)
+        chunk = self.city._chunk_at(x, y)
+        return getattr(chunk, self.attr)[(y - chunk.y0) * chunk.width + (x - chunk.x0)]
+
+
+class _ChunkedWalkable:
+    """
+    Índice de celdas caminables recorrido chunk por chunk (en orden de chunks),
+    sin armarlo entero. Solo se guarda cuántas tiene cada chunk.
+    """
+
+    def __init__(self, city):
+        self.city = city
+        self._counts = {}
+
+    def __iter__(self):
+        city = self.city
+        for key in self._keys():
+            yield from city._chunk_walkable(*key, keep=False)
+
+    def __bool__(self):
+        return next(iter(self), None) is not None
+
+    def __len__(self):
+        return sum(self._count(key) for key in self._keys())
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for key in self._keys():
+                count = self._count(key)
+                if index < count:
+                    return self.city._chunk_walkable(*key)[index]
+                index -= count
+        raise IndexError("Índice de celda caminable fuera de rango.")
+
+    def invalidate(self, key):
+        """Olvida la cantidad de un chunk modificado."""
+        self._counts.pop(key, None)
+
+    def _keys(self):
+        city = self.city
+        return ((cx, cy) for cy in range(city._chunk_rows()) for cx in range(city._chunk_cols()))
+
+    def _count(self, key):
+        count = self._counts.get(key)
+        if count is None:
+            count = self._counts[key] = len(self.city._chunk_walkable(*key, keep=False))
+        return count
+
+
+class ChunkedCity(City):
+    """
+    Mapa dividido en chunks guardados en disco.
+
+    Los chunks se cargan cuando una consulta o el renderizado los toca y se
+    descartan (LRU) al superar el presupuesto de memoria. get_tile, is_blocked
+    y get_surface_weight se comportan igual que en City; walkable_cells se
+    recorre por chunks y no hay lista de filas (tiles).
+    """
+
+    META_FILE = "meta.json"
+
+    def __init__(self, directory, memory_budget=64 * 1024 * 1024):
+        self.directory = Path(directory)
+        with open(self.directory / self.META_FILE, 'r') as f:
+            meta = json.load(f)
+
+        self.version = meta.get("version")
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.legend = meta.get("legend") or {}
+        self.goal = meta.get("goal")
+        self.source_hash = meta.get("source_hash")
+        self.chunk_size = meta["chunk_size"]
+        self.memory_budget = memory_budget
+
+        self._init_codes(meta["tile_chars"])
+        self._init_derived()
+
+        self._chunks = OrderedDict()
+        self._loaded_bytes = 0
+        self._walkable_by_chunk = {}
+        self.walkable_cells = _ChunkedWalkable(self)
+
+        self.tile_grid = _ChunkedPlane(self, 'codes')
+        self.blocked_mask = _ChunkedPlane(self, 'blocked')
+        self.weight_grid = _ChunkedPlane(self, 'weights')
+        self.min_surface_weight = min(
+            (w for code, w in enumerate(self._weight_by_code) if not self._blocked_by_code[code]),
+            default=1.0
+        )
+
+    @classmethod
+    def create(cls, directory, map_data, chunk_size=64, memory_budget=64 * 1024 * 1024):
+        """Convierte un mapa (filas de tiles) a formato por chunks y lo abre."""
+        write_chunks(directory, map_data, map_data.get("tiles") or [], chunk_size)
+        return cls(directory, memory_budget)
+
+    def get_tile(self, x, y):
+        """Obtiene el tile en coordenadas (x, y)."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            chunk = self._chunk_at(x, y)
+            return self.tile_chars[chunk.codes[(y - chunk.y0) * chunk.width + (x - chunk.x0)]]
+        return None
+
+    def get_surface_weight(self, x, y):
+        """Obtiene peso de superficie del tile."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            chunk = self._chunk_at(x, y)
+            return chunk.weights[(y - chunk.y0) * chunk.width + (x - chunk.x0)]
+        return 1.0
+
+    def is_blocked(self, x, y):
+        """Verifica si un tile está bloqueado."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            chunk = self._chunk_at(x, y)
+            return chunk.blocked[(y - chunk.y0) * chunk.width + (x - chunk.x0)] == 1
+        return True
+
+    def get_random_walkable_position(self):
+        """Retorna posición aleatoria caminable muestreando chunks."""
+        cols, rows = self._chunk_cols(), self._chunk_rows()
+        for _ in range(100):
+            cells = self._chunk_walkable(random.randrange(cols), random.randrange(rows))
+            if cells:
+                index = random.choice(cells)
+                return [index % self.width, index // self.width]
+
+        cells = self.walkable_cells
+        if not cells:
+            return [0, 0]
+        index = random.choice(cells)
+        return [index % self.width, index // self.width]
+
+    def _set_cell(self, x, y, tile):
+        """Escribe un tile en su chunk; el chunk se escribe a disco al descartarse."""
+        code = self._code_for(tile)
+        chunk = self._chunk_at(x, y)
+        offset = (y - chunk.y0) * chunk.width + (x - chunk.x0)
+        old_cost = math.inf if chunk.blocked[offset] else chunk.weights[offset]
+
+        chunk.codes[offset] = code
+        chunk.blocked[offset] = self._blocked_by_code[code]
+        chunk.weights[offset] = self._weight_by_code[code]
+        chunk.dirty = True
+        return old_cost, math.inf if chunk.blocked[offset] else chunk.weights[offset]
+
+    def _update_walkable_cells(self, opened, closed):
+        """Descarta el índice de caminables de los chunks afectados."""
+        for index in list(opened) + list(closed):
+            y, x = divmod(index, self.width)
+            key = (x // self.chunk_size, y // self.chunk_size)
+            self._walkable_by_chunk.pop(key, None)
+            self.walkable_cells.invalidate(key)
+
+    def _plane_bytes(self):
+        # Solo cuentan los chunks cargados
+        return self._loaded_bytes
+
+    def content_hash(self):
+        """Hash del contenido leyendo los chunks directamente de disco."""
+        self.flush()
+        digest = hashlib.sha1()
+        digest.update(f"{self.width}x{self.height}".encode())
+        digest.update("".join(self.tile_chars[1:]).encode())
+        for cy in range(self._chunk_rows()):
+            for cx in range(self._chunk_cols()):
+                digest.update((self.directory / _chunk_name(cx, cy)).read_bytes())
+        digest.update(json.dumps(self.legend, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def flush(self):
+        """Escribe a disco los chunks modificados y los metadatos."""
+        for key, chunk in self._chunks.items():
+            if chunk.dirty:
+                self._write_chunk(key, chunk)
+        _save_meta(self.directory, self._meta())
+
+    def _meta(self):
+        return {
+            "version": self.version,
+            "width": self.width,
+            "height": self.height,
+            "legend": self.legend,
+            "goal": self.goal,
+            "chunk_size": self.chunk_size,
+            "tile_chars": self.tile_chars[1:],
+            "source_hash": self.source_hash
+        }
+
+    def _chunk_cols(self):
+        return (self.width + self.chunk_size - 1) // self.chunk_size
+
+    def _chunk_rows(self):
+        return (self.height + self.chunk_size - 1) // self.chunk_size
+
+    def _chunk_at(self, x, y):
+        """Retorna el chunk que contiene (x, y), cargándolo si hace falta."""
+        key = (x // self.chunk_size, y // self.chunk_size)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._load_chunk(key)
+        else:
+            self._chunks.move_to_end(key)
+        return chunk
+
+    def _load_chunk(self, key):
+        """Carga un chunk desde disco y aplica la política LRU."""
+        cx, cy = key
+        x0, y0 = cx * self.chunk_size, cy * self.chunk_size
+        width = min(self.chunk_size, self.width - x0)
+        height = min(self.chunk_size, self.height - y0)
+        codes = bytearray((self.directory / _chunk_name(cx, cy)).read_bytes())
+
+        chunk = _Chunk(x0, y0, width, height, codes, self._blocked_table(), self._weight_by_code)
+        self._chunks[key] = chunk
+        self._loaded_bytes += chunk.nbytes
+
+        while self._loaded_bytes > self.memory_budget and len(self._chunks) > 1:
+            old_key, old_chunk = self._chunks.popitem(last=False)
+            if old_chunk.dirty:
+                self._write_chunk(old_key, old_chunk)
+                _save_meta(self.directory, self._meta())
+            self._loaded_bytes -= old_chunk.nbytes
+
+        return chunk
+
+    def _write_chunk(self, key, chunk):
+        (self.directory / _chunk_name(*key)).write_bytes(chunk.codes)
+        chunk.dirty = False
+
+    def _chunk_walkable(self, cx, cy, keep=True):
+        """Celdas caminables (índice plano global) de un chunk; keep=False no las guarda."""
+        cells = self._walkable_by_chunk.get((cx, cy))
+        if cells is None:
+            x0, y0 = cx * self.chunk_size, cy * self.chunk_size
+            chunk = self._chunk_at(x0, y0)
+            cells = array('i', (
+                (y0 + offset // chunk.width) * self.width + x0 + offset % chunk.width
+                for offset, b in enumerate(chunk.blocked) if not b
+            ))
+            if keep:
+                self._walkable_by_chunk[(cx, cy)] = cells
+        return cells
+
+
+def _chunk_name(cx, cy):
+    return f"chunk_{cx}_{cy}.bin"
+
+
+def _save_meta(directory, meta):
+    with open(Path(directory) / ChunkedCity.META_FILE, 'w') as f:
+        json.dump(meta, f)
+
+
+def read_meta(directory):
+    """Metadatos de un mapa por chunks (None si no hay uno válido en directory)."""
+    try:
+        with open(Path(directory) / ChunkedCity.META_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_chunks(directory, map_data, rows, chunk_size=64, source_hash=None):
+    """
+    Escribe un mapa en formato por chunks leyendo las filas una franja a la vez.
+
+    Args:
+        directory: carpeta destino
+        map_data (dict): encabezado del mapa (version, width, height, legend, goal)
+        rows (iterable): filas de tiles (strings), pueden venir de un generador
+        chunk_size (int): lado de cada chunk en tiles
+        source_hash: hash del JSON de origen, para saber si los chunks están al día
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    width = map_data["width"]
+    height = map_data["height"]
+    legend = map_data.get("legend") or {}
+    codes = {}
+    tile_chars = [None]
+
+    def encode(row):
+        encoded = bytearray(width)
+        for x, tile in enumerate(row[:width]):
+            code = codes.get(tile)
+            if code is None:
+                code = len(tile_chars)
+                if code > 255:
+                    raise ValueError("El mapa tiene demasiados tipos de tile distintos.")
+                codes[tile] = code
+                tile_chars.append(tile)
+            encoded[x] = code
+        return encoded
+
+    rows = iter(rows)
+    cols = (width + chunk_size - 1) // chunk_size
+    for cy in range((height + chunk_size - 1) // chunk_size):
+        band_height = min(chunk_size, height - cy * chunk_size)
+        band = [encode(next(rows, "")) for _ in range(band_height)]
+        for cx in range(cols):
+            x0 = cx * chunk_size
+            x1 = min(x0 + chunk_size, width)
+            data = b"".join(bytes(row[x0:x1]) for row in band)
+            (directory / _chunk_name(cx, cy)).write_bytes(data)
+
+    _save_meta(directory, {
+        "version": map_data.get("version"),
+        "width": width,
+        "height": height,
+        "legend": legend,
+        "goal": map_data.get("goal"),
+        "chunk_size": chunk_size,
+        "tile_chars": tile_chars[1:],
+        "source_hash": source_hash
+    })
@@ -1,83 +1,803 @@
+import hashlib
+import heapq
+import json
+import math
 import random
+from array import array
+from collections import OrderedDict, deque
+from src.config.config import ORDER_GRID_CELL
+from .expiry_queue import ExpiryQueue
+from .order import Order
+from .pathfinding import astar, neighbors
+
+
+def expand_weights(codes, weight_by_code):
+    """
+    Convierte una grilla de códigos (bytes) en una grilla float32 de pesos.
+
+    Traduce cada uno de los 4 bytes del float por separado con tablas de
+    traducción y los intercala, así la conversión no recorre celda por celda
+    en Python.
+    """
+    table = weight_by_code.tobytes().ljust(256 * 4, b'\x00')
+    planes = bytearray(len(codes) * 4)
+    for byte in range(4):
+        planes[byte::4] = codes.translate(table[byte::4])
+    weights = array('f')
+    weights.frombytes(planes)
+    return weights
+
+
+def buffer_nbytes(buffer):
+    """Bytes que ocupa un buffer (array, bytearray o memoryview); 0 si es None."""
+    if buffer is None:
+        return 0
+    if isinstance(buffer, memoryview):
+        return buffer.nbytes
+    if isinstance(buffer, array):
+        return buffer.itemsize * len(buffer)
+    return len(buffer)
 
 
 class City:
     """Representa el mapa de la ciudad."""
-    
+
+    # Cantidad máxima de rutas guardadas en el caché LRU
+    PATH_CACHE_SIZE = 256
+
     def __init__(self, map_data):
+        rows = map_data.get("tiles") or []
         self.version = map_data.get("version")
-        self.width = map_data.get("width")
-        self.height = map_data.get("height")
-        self.tiles = map_data.get("tiles")
-        self.legend = map_data.get("legend")
+        self.legend = map_data.get("legend") or {}
         self.goal = map_data.get("goal")
-    
+        self.width = map_data.get("width") or max((len(row) for row in rows), default=0)
+        self.height = map_data.get("height") or len(rows)
+
+        self._init_codes()
+        self._build_grids(rows)
+        self._init_derived()
+
+    @classmethod
+    def from_rows(cls, rows, meta=None):
+        """
+        Crea la ciudad consumiendo las filas de tiles de a una (p. ej. desde
+        json_stream.iter_json_array) sin guardar la lista de strings.
+
+        meta (version, width, height, legend, goal) se lee recién después de
+        consumir las filas, así puede ser el dict rest que el streaming
+        completa al terminar.
+        """
+        city = cls.__new__(cls)
+        city.legend = {}
+        city._init_codes()
+
+        # Cada fila se guarda ya codificada (1 byte por tile)
+        translate = {}
+        encoded = []
+        for row in rows:
+            if isinstance(row, str):
+                for tile in set(row) - city._codes.keys():
+                    translate[ord(tile)] = chr(city._code_for(tile))
+                encoded.append(row.translate(translate).encode('latin-1'))
+            else:
+                encoded.append(bytes(city._code_for(tile) for tile in row))
+
+        meta = meta or {}
+        city.version = meta.get("version")
+        city.legend = meta.get("legend") or {}
+        city.goal = meta.get("goal")
+        city.width = meta.get("width") or max((len(row) for row in encoded), default=0)
+        city.height = meta.get("height") or len(encoded)
+
+        # La leyenda pudo llegar después de las filas: se rehacen las tablas por código
+        for code, tile in enumerate(city.tile_chars[1:], start=1):
+            info = city.legend.get(tile)
+            city._blocked_by_code[code] = 1 if info is None or info.get("blocked", False) else 0
+            city._weight_by_code[code] = info.get("surface_weight", 1.0) if info else 1.0
+
+        grid = array('B', bytes(city.width * city.height))
+        for y, row in enumerate(encoded[:city.height]):
+            row = row[:city.width]
+            grid[y * city.width:y * city.width + len(row)] = array('B', row)
+        city._finish_grids(grid)
+        city._init_derived()
+        return city
+
+    @classmethod
+    def from_planes(cls, header, tile_grid, blocked_mask, weight_grid, walkable_cells):
+        """Crea la ciudad sobre grillas ya construidas (p. ej. un mapa compilado) sin copiarlas."""
+        city = cls.__new__(cls)
+        city.version = header.get("version")
+        city.legend = header.get("legend") or {}
+        city.goal = header.get("goal")
+        city.width = header["width"]
+        city.height = header["height"]
+
+        city._init_codes(header["tile_chars"])
+        city.tile_grid = tile_grid
+        city.blocked_mask = blocked_mask
+        city.weight_grid = weight_grid
+        city.walkable_cells = walkable_cells
+        city.min_surface_weight = header["min_surface_weight"]
+        city._init_derived()
+        return city
+
+    @property
+    def tiles(self):
+        """Filas de tiles decodificadas desde la grilla."""
+        chars = [tile or "" for tile in self.tile_chars]
+        return [
+            "".join(chars[code] for code in self.tile_grid[y * self.width:(y + 1) * self.width])
+            for y in range(self.height)
+        ]
+
+    def _init_codes(self, tile_chars=()):
+        """Inicializa las tablas por código de tile (el código 0 es "fuera de mapa")."""
+        self.tile_chars = [None]
+        self._codes = {}
+        self._blocked_by_code = bytearray([1])
+        self._weight_by_code = array('f', [1.0])
+        for tile in tile_chars:
+            self._code_for(tile)
+
+    def _init_derived(self):
+        """Inicializa las estructuras derivadas que se calculan bajo demanda."""
+        self.revision = 0
+        self._listeners = []
+        self._invalidate_walkability()
+        self._path_cache = OrderedDict()
+        self._path_cache_version = self.version
+
+    def _invalidate_walkability(self):
+        """Descarta las estructuras que dependen de qué tiles son caminables."""
+        self._nearest_index = None
+        self._components = None
+        self._component_nearest = {}
+
+    def _code_for(self, tile):
+        """Retorna el código de un tile, registrándolo si es nuevo."""
+        code = self._codes.get(tile)
+        if code is None:
+            code = len(self.tile_chars)
+            if code > 255:
+                raise ValueError("El mapa tiene demasiados tipos de tile distintos.")
+            info = self.legend.get(tile)
+            self._codes[tile] = code
+            self.tile_chars.append(tile)
+            self._blocked_by_code.append(1 if info is None or info.get("blocked", False) else 0)
+            self._weight_by_code.append(info.get("surface_weight", 1.0) if info else 1.0)
+        return code
+
+    def _blocked_table(self):
+        """Tabla de traducción código -> bloqueado para convertir grillas de una vez."""
+        return bytes(self._blocked_by_code).ljust(256, b'\x01')
+
+    def _build_grids(self, rows):
+        """Construye las matrices compactas del mapa (una sola vez)."""
+        grid = array('B', bytes(self.width * self.height))
+
+        for y, row in enumerate(rows[:self.height]):
+            base = y * self.width
+            for x, tile in enumerate(row[:self.width]):
+                grid[base + x] = self._code_for(tile)
+        self._finish_grids(grid)
+
+    def _finish_grids(self, grid):
+        """Deriva bloqueos, pesos y caminables de la grilla de códigos."""
+        weight_by_code = self._weight_by_code
+        self.tile_grid = grid
+        self.blocked_mask = bytearray(grid.tobytes().translate(self._blocked_table()))
+        self.weight_grid = expand_weights(grid.tobytes(), weight_by_code)
+        self.walkable_cells = array('i', (i for i, b in enumerate(self.blocked_mask) if not b))
+        self.min_surface_weight = min(
+            (weight_by_code[code] for code in set(grid) if not self._blocked_by_code[code]),
+            default=1.0
+        )
+
     def get_tile(self, x, y):
         """Obtiene el tile en coordenadas (x, y)."""
-        if 0 <= y < len(self.tiles) and 0 <= x < len(self.tiles[y]):
-            return self.tiles[y][x]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tile_chars[self.tile_grid[y * self.width + x]]
         return None
-    
+
     def get_surface_weight(self, x, y):
         """Obtiene peso de superficie del tile."""
-        tile = self.get_tile(x, y)
-        if tile and tile in self.legend:
-            return self.legend[tile].get("surface_weight", 1.0)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.weight_grid[y * self.width + x]
         return 1.0
-    
+
     def is_blocked(self, x, y):
         """Verifica si un tile está bloqueado."""
-        tile = self.get_tile(x, y)
-        if tile and tile in self.legend:
-            return self.legend[tile].get("blocked", False)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.blocked_mask[y * self.width + x] == 1
         return True
-    
+
     def get_random_walkable_position(self):
         """Retorna posición aleatoria caminable (calle o parque)."""
-        attempts = 0
-        while attempts < 100:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            
-            if not self.is_blocked(x, y):
-                return [x, y]
-            
-            attempts += 1
-        
-        # Fallback: buscar la primera posición válida
-        for y in range(self.height):
-            for x in range(self.width):
-                if not self.is_blocked(x, y):
-                    return [x, y]
-        
-        return [0, 0]
+        if not self.walkable_cells:
+            return [0, 0]
+
+        index = random.choice(self.walkable_cells)
+        return [index % self.width, index // self.width]
+
+    def nearest_walkable(self, x, y):
+        """Retorna la posición caminable más cercana a (x, y)."""
+        return self.nearest_walkable_many([(x, y)])[0]
+
+    def nearest_walkable_many(self, positions):
+        """Resuelve en bloque la posición caminable más cercana de cada posición."""
+        if not self.walkable_cells:
+            return [[0, 0] for _ in positions]
+
+        if self._nearest_index is None:
+            self._nearest_index = self._nearest_index_from(self.walkable_cells)
+        return self._lookup_nearest(self._nearest_index, positions)
+
+    def component_of(self, x, y):
+        """Retorna la etiqueta de componente conexa de (x, y), o -1 si está bloqueado."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        if self._components is None:
+            self._build_components()
+        return self._components[y * self.width + x]
+
+    def is_reachable(self, start, goal):
+        """Verifica en O(1) si existe una ruta entre dos posiciones."""
+        label = self.component_of(start[0], start[1])
+        return label >= 0 and label == self.component_of(goal[0], goal[1])
+
+    def nearest_in_component_many(self, positions, label):
+        """Resuelve en bloque el tile más cercano de cada posición dentro de una componente."""
+        index = self._component_nearest.get(label)
+        if index is None:
+            if self._components is None:
+                self._build_components()
+            labels = self._components
+            sources = [i for i in self.walkable_cells if labels[i] == label]
+            if not sources:
+                return [None for _ in positions]
+            index = self._nearest_index_from(sources)
+            self._component_nearest[label] = index
+        return self._lookup_nearest(index, positions)
+
+    def _lookup_nearest(self, nearest, positions):
+        """Consulta un índice de cercanía (posiciones fuera del mapa se acotan al borde)."""
+        width = self.width
+        max_x, max_y = width - 1, self.height - 1
+        indices = [
+            nearest[min(max(y, 0), max_y) * width + min(max(x, 0), max_x)]
+            for x, y in positions
+        ]
+        return [[i % width, i // width] for i in indices]
+
+    def _nearest_index_from(self, sources):
+        """BFS multi-fuente: para cada celda, la fuente más cercana."""
+        width, height = self.width, self.height
+        nearest = array('i', [-1]) * (width * height)
+        for index in sources:
+            nearest[index] = index
+
+        queue = deque(sources)
+        while queue:
+            index = queue.popleft()
+            source = nearest[index]
+            for n in neighbors(index, width, height):
+                if nearest[n] < 0:
+                    nearest[n] = source
+                    queue.append(n)
+
+        return nearest
+
+    def _build_components(self):
+        """Etiqueta las componentes conexas de los tiles caminables (BFS)."""
+        width, height = self.width, self.height
+        blocked = self.blocked_mask
+        labels = array('i', [-1]) * (width * height)
+        label = 0
+
+        for start in self.walkable_cells:
+            if labels[start] >= 0:
+                continue
+            labels[start] = label
+            queue = deque([start])
+            while queue:
+                index = queue.popleft()
+                for n in neighbors(index, width, height):
+                    if labels[n] < 0 and not blocked[n]:
+                        labels[n] = label
+                        queue.append(n)
+            label += 1
+
+        self._components = labels
+        self._next_label = label
+        self._component_nearest = {}
+
+    def content_hash(self):
+        """Hash del contenido del mapa (dimensiones, tiles y leyenda)."""
+        digest = hashlib.sha1()
+        digest.update(f"{self.width}x{self.height}".encode())
+        digest.update("".join(self.tile_chars[1:]).encode())
+        digest.update(self.tile_grid.tobytes())
+        digest.update(json.dumps(self.legend, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def memory_usage(self):
+        """Estimación en bytes de las grillas y los cachés derivados en memoria."""
+        total = self._plane_bytes()
+        total += buffer_nbytes(self._nearest_index) + buffer_nbytes(self._components)
+        # Cada ruta guardada: la entrada del caché más 2 enteros por celda
+        total += sum(128 + 16 * len(path or ()) for path, _ in self._path_cache.values())
+        return total
+
+    def _plane_bytes(self):
+        return sum(buffer_nbytes(plane) for plane in
+                   (self.tile_grid, self.blocked_mask, self.weight_grid, self.walkable_cells))
+
+    def set_tile(self, x, y, tile):
+        """Cambia el tile en (x, y) y actualiza las matrices derivadas."""
+        self._apply_changes([(x, y, tile)])
+
+    def apply_patch(self, patch):
+        """
+        Aplica un parche de tiles sin reconstruir el mapa.
+
+        Args:
+            patch (dict): {"version": nueva versión, "base_version": versión
+                esperada (opcional), "changes": [{"x", "y", "tile"}, ...]}
+
+        Returns:
+            list: (x, y, costo anterior) de las celdas cuyo costo cambió
+                  (inf si estaban bloqueadas)
+        """
+        base = patch.get("base_version")
+        if base is not None and base != self.version:
+            raise ValueError(f"El parche es para la versión {base}, el mapa está en {self.version}.")
+
+        changes = []
+        for change in patch.get("changes") or []:
+            if isinstance(change, dict):
+                changes.append((change["x"], change["y"], change["tile"]))
+            else:
+                x, y, tile = change
+                changes.append((x, y, tile))
+
+        return self._apply_changes(changes, patch.get("version"))
+
+    def _apply_changes(self, changes, version=None):
+        """Aplica cambios (x, y, tile) e invalida solo lo que tocan."""
+        for x, y, _ in changes:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError(f"Posición fuera del mapa: ({x}, {y})")
+        if version is not None:
+            self.version = version
+
+        # Una celda puede cambiar varias veces en el mismo parche: se compara
+        # el costo anterior al parche con el final
+        before = {}
+        for x, y, tile in changes:
+            old_cost, _ = self._set_cell(x, y, tile)
+            before.setdefault(y * self.width + x, (x, y, old_cost))
+
+        applied = []
+        opened, closed = [], []
+        for index, (x, y, old_cost) in before.items():
+            new_cost = math.inf if self.blocked_mask[index] else self.weight_grid[index]
+            if old_cost == new_cost:
+                continue
+            applied.append((x, y, old_cost))
+            if new_cost == math.inf:
+                closed.append(index)
+            else:
+                if old_cost == math.inf:
+                    opened.append(index)
+                self.min_surface_weight = min(self.min_surface_weight, new_cost)
+
+        if opened or closed:
+            self._update_walkable_cells(opened, closed)
+            self._repair_components(opened, closed)
+            self._repair_nearest(opened, closed)
+
+        self.revision += 1
+        self._invalidate_paths(applied)
+        self._notify_listeners([(x, y) for x, y, _ in before.values()])
+        return applied
+
+    def _set_cell(self, x, y, tile):
+        """Escribe un tile en las grillas. Retorna (costo anterior, costo nuevo)."""
+        code = self._code_for(tile)
+        index = y * self.width + x
+        old_cost = math.inf if self.blocked_mask[index] else self.weight_grid[index]
+
+        self.tile_grid[index] = code
+        self.blocked_mask[index] = self._blocked_by_code[code]
+        self.weight_grid[index] = self._weight_by_code[code]
+        return old_cost, math.inf if self.blocked_mask[index] else self.weight_grid[index]
+
+    def _update_walkable_cells(self, opened, closed):
+        """Actualiza el índice de celdas caminables de una vez."""
+        cells = self.walkable_cells
+        if closed:
+            removed = set(closed)
+            cells = array('i', (i for i in cells if i not in removed))
+        elif not isinstance(cells, array):
+            # Un mapa compilado expone el índice como vista de solo lectura
+            cells = array('i', cells)
+        cells.extend(opened)
+        self.walkable_cells = cells
+
+    def _repair_components(self, opened, closed):
+        """Actualiza las etiquetas solo en las componentes que tocan las celdas cambiadas."""
+        labels = self._components
+        if labels is None:
+            return
+        width, height = self.width, self.height
+        blocked = self.blocked_mask
+
+        def flood(start, label, accept):
+            """Reetiqueta desde start. Retorna las etiquetas reemplazadas."""
+            replaced = {labels[start]}
+            labels[start] = label
+            queue = deque([start])
+            while queue:
+                index = queue.popleft()
+                for n in neighbors(index, width, height):
+                    if not blocked[n] and labels[n] != label and accept(labels[n]):
+                        replaced.add(labels[n])
+                        labels[n] = label
+                        queue.append(n)
+            return replaced
+
+        # Las celdas abiertas se etiquetan al final, al unir componentes
+        for index in opened:
+            if not blocked[index]:
+                labels[index] = -1
+
+        # Una componente con celdas cerradas puede partirse: el lado que contiene
+        # al primer vecino conserva la etiqueta y los demás reciben una nueva
+        sides_by_label = {}
+        for index in closed:
+            if blocked[index] and labels[index] >= 0:
+                sides_by_label.setdefault(labels[index], []).extend(
+                    n for n in neighbors(index, width, height) if not blocked[n])
+                labels[index] = -1
+
+        for old, sides in sides_by_label.items():
+            self._component_nearest.pop(old, None)
+            sides = [n for n in sides if labels[n] == old]
+            if not sides:
+                continue
+            kept = {sides[0]}
+            queue = deque(kept)
+            while queue:
+                index = queue.popleft()
+                for n in neighbors(index, width, height):
+                    if n not in kept and not blocked[n] and labels[n] == old:
+                        kept.add(n)
+                        queue.append(n)
+            for n in sides[1:]:
+                if n not in kept and labels[n] == old:
+                    flood(n, self._next_label, lambda label: label == old)
+                    self._next_label += 1
+
+        for index in opened:
+            if blocked[index] or labels[index] >= 0:
+                continue
+            around = {labels[n] for n in neighbors(index, width, height) if not blocked[n] and labels[n] >= 0}
+            if around:
+                keep = min(around)
+            else:
+                keep = self._next_label
+                self._next_label += 1
+            # Todo lo que se alcanza desde la celda abierta (componentes vecinas y
+            # otras celdas abiertas) pasa a una sola etiqueta
+            for label in flood(index, keep, lambda label: True) | {keep}:
+                self._component_nearest.pop(label, None)
+
+    def _repair_nearest(self, opened, closed):
+        """Actualiza el índice de cercanía solo alrededor de las celdas cambiadas."""
+        nearest = self._nearest_index
+        if nearest is None:
+            return
+        if not self.walkable_cells:
+            self._nearest_index = None
+            return
+        width, height = self.width, self.height
+
+        def distance(a, b):
+            return abs(a % width - b % width) + abs(a // width - b // width)
+
+        # Las celdas cuya fuente se bloqueó buscan la fuente vigente más cercana
+        closed_set = {i for i in closed if self.blocked_mask[i]}
+        if closed_set:
+            region = set()
+            queue = deque(closed_set)
+            region.update(closed_set)
+            while queue:
+                index = queue.popleft()
+                for n in neighbors(index, width, height):
+                    if n not in region and nearest[n] in closed_set:
+                        region.add(n)
+                        queue.append(n)
+
+            heap = []
+            for index in region:
+                nearest[index] = -1
+            for index in region:
+                for n in neighbors(index, width, height):
+                    if n not in region:
+                        source = nearest[n]
+                        heapq.heappush(heap, (distance(index, source), index, source))
+            while heap:
+                d, index, source = heapq.heappop(heap)
+                if nearest[index] >= 0:
+                    continue
+                nearest[index] = source
+                for n in neighbors(index, width, height):
+                    if nearest[n] < 0:
+                        heapq.heappush(heap, (distance(n, source), n, source))
+
+        # Una celda abierta pasa a ser la fuente de las que quedan más cerca de ella
+        for source in opened:
+            if self.blocked_mask[source]:
+                continue
+            nearest[source] = source
+            queue = deque([source])
+            while queue:
+                index = queue.popleft()
+                for n in neighbors(index, width, height):
+                    if nearest[n] != source and distance(n, source) < distance(n, nearest[n]):
+                        nearest[n] = source
+                        queue.append(n)
+
+    def _invalidate_paths(self, applied):
+        """
+        Conserva las rutas en caché que los cambios no pueden afectar.
+
+        Una ruta sobrevive si no pasa por una celda cambiada y ninguna celda
+        abaratada o abierta permite una ruta con cota inferior menor a su costo.
+        """
+        if not applied:
+            if self._path_cache_version != self.version:
+                self._rekey_path_cache(self._path_cache.items())
+            return
+
+        width = self.width
+        h_scale = self.min_surface_weight
+        changed = {(x, y) for x, y, _ in applied}
+        cheaper = [
+            (x, y) for x, y, old_cost in applied
+            if not self.blocked_mask[y * width + x] and self.weight_grid[y * width + x] < old_cost
+        ]
+        opened = any(old_cost == math.inf for _, _, old_cost in applied)
+
+        survivors = []
+        for (_, start, goal), (path, cost) in self._path_cache.items():
+            if path is None:
+                if not opened:
+                    survivors.append((start, goal, (path, cost)))
+                continue
+            if any(step in changed for step in path):
+                continue
+            if any(
+                h_scale * (abs(start[0] - x) + abs(start[1] - y) + abs(x - goal[0]) + abs(y - goal[1])) < cost
+                for x, y in cheaper
+            ):
+                continue
+            survivors.append((start, goal, (path, cost)))
+
+        self._rekey_path_cache([((None, start, goal), route) for start, goal, route in survivors])
+
+    def _rekey_path_cache(self, entries):
+        """Reemplaza el caché con las entradas dadas bajo la versión actual."""
+        entries = list(entries)
+        self._path_cache.clear()
+        for (_, start, goal), route in entries:
+            self._path_cache[(self.version, start, goal)] = route
+        self._path_cache_version = self.version
+
+    def add_listener(self, callback):
+        """Registra una función que recibe la lista de (x, y) modificados."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Elimina una función registrada con add_listener."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify_listeners(self, cells):
+        for callback in list(self._listeners):
+            callback(cells)
+
+    def shortest_path(self, start, goal):
+        """Retorna la ruta más corta entre dos posiciones como lista de [x, y]."""
+        path, _ = self._find_route(start, goal)
+        if path is None:
+            return None
+        return [list(step) for step in path]
+
+    def path_cost(self, start, goal):
+        """Retorna el costo (suma de surface_weight) de la ruta más corta."""
+        _, cost = self._find_route(start, goal)
+        return cost
+
+    def clear_path_cache(self):
+        """Vacía el caché de rutas."""
+        self._path_cache.clear()
+        self._path_cache_version = self.version
+
+    def _find_route(self, start, goal):
+        """Busca una ruta usando el caché LRU por extremos y versión del mapa."""
+        if self._path_cache_version != self.version:
+            self.clear_path_cache()
+
+        key = (self.version, tuple(start), tuple(goal))
+        route = self._path_cache.get(key)
+        if route is not None:
+            self._path_cache.move_to_end(key)
+            return route
+
+        route = astar(self, start, goal)
+        self._path_cache[key] = route
+        if len(self._path_cache) > self.PATH_CACHE_SIZE:
+            self._path_cache.popitem(last=False)
+        return route
 
 
 class OrderManager:
-    """Gestiona pedidos disponibles del API."""
+    """
+    Gestiona pedidos disponibles del API.
+
+    Los pedidos (dicts del API) se convierten a Order al recibirse. Los
+    pendientes están en un heap por release_time, así cada actualización
+    solo cuesta los pedidos que se liberan en ella. Los disponibles se
+    indexan por id y en una grilla uniforme (celdas de ORDER_GRID_CELL
+    tiles) según su punto de recogida, y en una ExpiryQueue por deadline
+    para descartar los vencidos sin recorrer la lista.
+    """
     
-    def __init__(self, orders_data):
-        self.all_orders = orders_data
-        self.available_orders = []
+    def __init__(self, orders_data, cell_size=ORDER_GRID_CELL):
+        self.all_orders = []
         self.released_ids = set()
+        self.cell_size = cell_size
+        self._pending = []
+        self._sequence = 0
+        # id -> pedido, en orden de liberación
+        self._available = {}
+        self._available_list = None
+        # (x, y) -> {id: pedido} y (celda x, celda y) -> {id: pedido}
+        self._by_tile = {}
+        self._grid = {}
+        self.expiry = ExpiryQueue()
+        self.add_orders(orders_data)
+    
+    @property
+    def available_orders(self):
+        """Pedidos disponibles en orden de liberación."""
+        if self._available_list is None:
+            self._available_list = list(self._available.values())
+        return self._available_list
+    
+    def add_orders(self, orders):
+        """Agrega pedidos (dicts u Order) pendientes de liberar."""
+        orders = [order if isinstance(order, Order) else Order.from_dict(order) for order in orders]
+        self.all_orders.extend(orders)
+        
+        # El contador desempata por orden de llegada (como el recorrido anterior)
+        entries = []
+        for order in orders:
+            entries.append((order.release_time or 0, self._sequence, order))
+            self._sequence += 1
+        
+        pending = self._pending
+        if len(entries) > len(pending):
+            pending.extend(entries)
+            heapq.heapify(pending)
+        else:
+            for entry in entries:
+                heapq.heappush(pending, entry)
     
     def update_available(self, elapsed_time):
         """Actualiza pedidos disponibles según release_time."""
-        for order in self.all_orders:
-            order_id = order.get("id")
-            release = order.get("release_time", 0)
-            
-            if release <= elapsed_time and order_id not in self.released_ids:
-                self.available_orders.append(order)
-                self.released_ids.add(order_id)
+        return self.advance_to(elapsed_time)
+    
+    def advance_to(self, game_time):
+        """
+        Libera todos los pedidos con release_time <= game_time.
+        
+        Returns:
+            list: pedidos liberados en esta llamada
+        """
+        pending = self._pending
+        released = []
+        while pending and pending[0][0] <= game_time:
+            order = heapq.heappop(pending)[2]
+            order_id = order.id
+            if order_id in self.released_ids:
+                continue
+            self.released_ids.add(order_id)
+            self._available[order_id] = order
+            self._index(order_id, order)
+            self.expiry.push(order)
+            released.append(order)
+        if released:
+            self._available_list = None
+        return released
+    
+    def next_release_time(self):
+        """release_time del próximo pedido pendiente (None si no quedan)."""
+        return self._pending[0][0] if self._pending else None
     
     def get_available(self):
         """Retorna pedidos disponibles."""
         return self.available_orders
     
+    def get(self, order_id):
+        """Pedido disponible con ese id (None si no está disponible)."""
+        return self._available.get(order_id)
+    
     def remove_order(self, order_id):
-        """Remueve pedido aceptado de disponibles."""
-        self.available_orders = [
-            o for o in self.available_orders 
-            if o.get("id") != order_id
-        ]
\ No newline at end of file
+        """Remueve pedido aceptado de disponibles. Retorna el pedido (o None)."""
+        order = self._available.pop(order_id, None)
+        if order is not None:
+            self._unindex(order_id, order)
+            self.expiry.discard(order_id)
+            self._available_list = None
+        return order
+    
+    def expire_orders(self, now):
+        """
+        Saca de disponibles los pedidos con deadline_seconds <= now.
+        
+        Returns:
+            list: pedidos vencidos en esta llamada
+        """
+        expired = [order for _, order in self.expiry.pop_due(now)]
+        for order in expired:
+            self.remove_order(order.id)
+        return expired
+    
+    def orders_at(self, x, y):
+        """Pedidos disponibles cuya recogida es (x, y)."""
+        return list(self._by_tile.get((x, y), {}).values())
+    
+    def orders_in_rect(self, x0, y0, x1, y1):
+        """Pedidos disponibles con recogida dentro del rectángulo (bordes incluidos)."""
+        size = self.cell_size
+        result = []
+        for cy in range(y0 // size, y1 // size + 1):
+            for cx in range(x0 // size, x1 // size + 1):
+                cell = self._grid.get((cx, cy))
+                if not cell:
+                    continue
+                for order in cell.values():
+                    x, y = order.pickup
+                    if x0 <= x <= x1 and y0 <= y <= y1:
+                        result.append(order)
+        return result
+    
+    def orders_within(self, x, y, radius):
+        """Pedidos disponibles con recogida a distancia Manhattan <= radius de (x, y)."""
+        return [
+            order for order in self.orders_in_rect(x - radius, y - radius, x + radius, y + radius)
+            if abs(order.pickup[0] - x) + abs(order.pickup[1] - y) <= radius
+        ]
+    
+    def _index(self, order_id, order):
+        pickup = order.pickup
+        if pickup is None:
+            return
+        x, y = pickup
+        self._by_tile.setdefault((x, y), {})[order_id] = order
+        self._grid.setdefault((x // self.cell_size, y // self.cell_size), {})[order_id] = order
+    
+    def _unindex(self, order_id, order):
+        pickup = order.pickup
+        if pickup is None:
+            return
+        x, y = pickup
+        for index, key in ((self._by_tile, (x, y)), (self._grid, (x // self.cell_size, y // self.cell_size))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(order_id, None)
+                if not bucket:
+                    del index[key]
@@ -0,0 +1,253 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.config.config import CITY_URLS, CITY_CACHE_BUDGET_MB, STREAM_JOBS
+from .city import buffer_nbytes
+from .proxy import Proxy
+from .travel_time import TravelTimeRouter
+
+
+class CityEntry:
+    """
+    Ciudad cargada junto con sus datos y cachés derivados.
+
+    Con job_feed (lotes de Proxy.iter_jobs) los pedidos se van agregando a
+    jobs con next_job_batch a medida que se leen.
+    """
+
+    def __init__(self, url, city, jobs, weather, distance_oracle, proxy=None, job_feed=None):
+        self.url = url
+        self.proxy = proxy
+        self.city = city
+        self.jobs = jobs
+        self.weather = weather
+        self.distance_oracle = distance_oracle
+        self.travel_router = TravelTimeRouter(city)
+        self.job_feed = job_feed
+
+    def next_job_batch(self):
+        """Lee el siguiente lote del feed (None si ya terminó)."""
+        if self.job_feed is None:
+            return None
+        batch = next(self.job_feed, None)
+        if batch is None:
+            self.job_feed = None
+            return None
+        self.jobs.extend(batch)
+        return batch
+
+    def save(self):
+        """Guarda en caché lo que quedó pendiente (el oráculo reparado por parches)."""
+        if self.proxy is not None:
+            self.proxy.save_oracle()
+
+    def close(self):
+        """Guarda lo pendiente y suelta los cachés que siguen los cambios de la ciudad."""
+        self.save()
+        self.travel_router.close()
+        if self.distance_oracle is not None:
+            self.distance_oracle.close()
+
+    def memory_usage(self):
+        """Estimación en bytes de la ciudad, el oráculo y los campos de tiempo."""
+        total = self.city.memory_usage()
+        if self.distance_oracle is not None:
+            total += sum(buffer_nbytes(field) for field in self.distance_oracle.fields.values())
+        total += sum(buffer_nbytes(times) for times, _ in self.travel_router._fields.values())
+        return total
+
+
+def prepare_city(url, stream_jobs=STREAM_JOBS):
+    """
+    Descarga y precalcula en caché todo lo de una ciudad (mapa compilado,
+    pedidos anotados, tablas del oráculo).
+
+    Se ejecuta en otro proceso: las partes pesadas (Dijkstra del oráculo,
+    anotación de pedidos) no compiten por el GIL con el hilo del juego.
+
+    Returns:
+        dict: lo que load_city_entry necesita además del caché (pedidos y clima)
+    """
+    proxy = Proxy(url)
+    city = proxy.get_city()
+    jobs = None if stream_jobs else proxy.get_jobs(city)
+    proxy.get_distance_oracle(city, jobs or [])
+    return {"jobs": jobs, "weather": proxy.get_weather(), "report": proxy.last_jobs_report}
+
+
+def load_city_entry(url, stream_jobs=STREAM_JOBS, prepared=None):
+    """
+    Carga mapa, pedidos, clima y oráculo de una ciudad a través de su Proxy.
+
+    Con stream_jobs solo se lee el primer lote de pedidos; el resto queda en
+    el feed y el oráculo usa solo landmarks. Con prepared (resultado de
+    prepare_city) el mapa y el oráculo se leen del caché ya preparado.
+    """
+    proxy = Proxy(url)
+    if prepared is not None:
+        city = proxy.get_city(refresh=False)
+        weather = prepared["weather"]
+        if prepared["jobs"] is not None:
+            proxy.last_jobs_report = prepared["report"]
+            jobs = prepared["jobs"]
+            return CityEntry(url, city, jobs, weather, proxy.get_distance_oracle(city, jobs), proxy)
+    else:
+        city = proxy.get_city()
+        weather = proxy.get_weather()
+        if not stream_jobs:
+            jobs = proxy.get_jobs(city)
+            oracle = proxy.get_distance_oracle(city, jobs)
+            return CityEntry(url, city, jobs, weather, oracle, proxy)
+
+    entry = CityEntry(url, city, [], weather, proxy.get_distance_oracle(city, []), proxy,
+                      job_feed=proxy.iter_jobs(city))
+    entry.next_job_batch()
+    return entry
+
+
+class CityRegistry:
+    """
+    Registro de ciudades cargadas.
+
+    Mantiene varias ciudades en memoria (LRU) mientras la suma estimada no
+    supere memory_budget; la ciudad actual nunca se descarta. prefetch carga
+    una ciudad en un hilo de fondo para que cambiar a ella sea inmediato.
+
+    Con preparer (p. ej. prepare_city) el trabajo pesado de la precarga se
+    hace en un proceso aparte y el hilo solo arma la ciudad desde el caché
+    con loader(url, prepared=resultado).
+    """
+
+    def __init__(self, urls=None, memory_budget=CITY_CACHE_BUDGET_MB * 1024 * 1024, loader=load_city_entry,
+                 preparer=None):
+        self.urls = list(urls or CITY_URLS)
+        self.memory_budget = memory_budget
+        self.current = None
+        self._loader = loader
+        self._preparer = preparer
+        self._processes = None
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="city-prefetch")
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, url):
+        """
+        Retorna la ciudad (CityEntry) y la marca como actual.
+
+        Si está precargándose espera a que termine; si no está cargada, la
+        carga en este hilo.
+        """
+        with self._lock:
+            self.current = url
+            future = self._pending.get(url)
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                # Los cachés de las ciudades crecen con el uso
+                self._evict_over_budget()
+                return entry
+
+        if future is not None:
+            future.result()
+            with self._lock:
+                entry = self._entries.get(url)
+                if entry is not None:
+                    self._entries.move_to_end(url)
+                    return entry
+
+        # La precarga falló o no se pidió
+        entry = self._loader(url)
+        self._store(url, entry)
+        return entry
+
+    def prefetch(self, url):
+        """Empieza a cargar una ciudad en segundo plano (si no está cargada ya)."""
+        with self._lock:
+            if url in self._entries or url in self._pending:
+                return False
+            self._pending[url] = self._executor.submit(self._prefetch, url)
+            return True
+
+    def next_url(self, url=None):
+        """URL siguiente en la rotación de ciudades."""
+        url = url or self.current
+        if url not in self.urls:
+            return self.urls[0]
+        return self.urls[(self.urls.index(url) + 1) % len(self.urls)]
+
+    def evict(self, url):
+        """Descarta una ciudad cargada. Retorna True si estaba cargada."""
+        with self._lock:
+            entry = self._entries.pop(url, None)
+        if entry is None:
+            return False
+        entry.close()
+        return True
+
+    def memory_usage(self):
+        """Bytes estimados de todas las ciudades cargadas."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return sum(entry.memory_usage() for entry in entries)
+
+    def close(self):
+        """Detiene la precarga y cierra las ciudades cargadas."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            entry.close()
+
+    def _prefetch(self, url):
+        try:
+            if self._preparer is None:
+                entry = self._loader(url)
+            else:
+                entry = self._loader(url, prepared=self._prepare(url))
+        except Exception as e:
+            print(f"No se pudo precargar la ciudad {url}: {e}")
+            with self._lock:
+                self._pending.pop(url, None)
+            return None
+        self._store(url, entry)
+        return entry
+
+    def _prepare(self, url):
+        """Corre preparer en el proceso de precarga y espera su resultado."""
+        if self._processes is None:
+            # spawn: el proceso no hereda los hilos ni la ventana de pygame
+            self._processes = ProcessPoolExecutor(max_workers=1,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+        return self._processes.submit(self._preparer, url).result()
+
+    def _store(self, url, entry):
+        with self._lock:
+            self._pending.pop(url, None)
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            self._evict_over_budget()
+
+    def _evict_over_budget(self):
+        """Descarta las ciudades menos usadas hasta entrar en el presupuesto."""
+        sizes = {url: entry.memory_usage() for url, entry in self._entries.items()}
+        total = sum(sizes.values())
+        for url in list(self._entries):
+            if total <= self.memory_budget:
+                break
+            if url == self.current or len(self._entries) == 1:
+                continue
+            self._entries.pop(url).close()
+            total -= sizes[url]
+            print(f"Ciudad descartada de memoria: {url}")
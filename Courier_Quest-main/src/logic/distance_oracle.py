@@ -0,0 +1,221 @@
+import json
+import math
+import os
+import struct
+from array import array
+from .pathfinding import dijkstra_field, repair_field
+
+# Archivo de tablas: MAGIC | largo del encabezado (uint32) | encabezado JSON
+# | un campo float32 por fuente, en el orden de "sources"
+MAGIC = b"CQORC\x00\x01\x00"
+_PREFIX = struct.Struct("<8sI")
+
+
+class DistanceOracle:
+    """
+    Oráculo de distancias precalculadas sobre el mapa.
+
+    Guarda campos de costo de una sola fuente (Dijkstra) desde un conjunto de
+    landmarks y desde cada punto de recogida/entrega. Las consultas que tocan
+    una fuente son O(1); las demás se estiman con los landmarks.
+
+    Los cambios de tiles de la ciudad (set_tile, apply_patch) reparan solo la
+    parte afectada de cada campo, hasta llamar a close().
+    """
+
+    def __init__(self, city, landmarks=None, fields=None):
+        self.city = city
+        self.landmarks = list(landmarks or [])
+        self.fields = dict(fields or {})
+        city.add_listener(self.apply_changes)
+
+    @classmethod
+    def build(cls, city, jobs=(), landmark_count=8):
+        """Construye el oráculo con landmarks y los puntos de los pedidos."""
+        oracle = cls(city)
+        oracle._select_landmarks(landmark_count)
+        oracle.add_jobs(jobs)
+        return oracle
+
+    def close(self):
+        """Deja de reparar los campos con los cambios de la ciudad."""
+        self.city.remove_listener(self.apply_changes)
+
+    def add_jobs(self, jobs):
+        """Agrega los puntos de recogida y entrega de los pedidos como fuentes."""
+        added = 0
+        for job in jobs:
+            for pos in (job.get("pickup"), job.get("dropoff")):
+                if pos is not None and self.add_source(pos):
+                    added += 1
+        return added
+
+    def add_source(self, pos):
+        """Precalcula el campo de costos desde una posición. Retorna True si es nuevo."""
+        x, y = pos
+        if self.city.is_blocked(x, y):
+            return False
+        index = y * self.city.width + x
+        if index in self.fields:
+            return False
+        self.fields[index] = dijkstra_field(self.city, (x, y))
+        return True
+
+    def apply_changes(self, cells):
+        """
+        Repara los campos tras cambiar los tiles indicados ((x, y)).
+
+        Las fuentes que quedaron bloqueadas se descartan.
+
+        Returns:
+            int: cantidad de fuentes descartadas
+        """
+        city = self.city
+        width = city.width
+        dropped = 0
+        for index in list(self.fields):
+            source = (index % width, index // width)
+            if city.is_blocked(*source):
+                del self.fields[index]
+                if index in self.landmarks:
+                    self.landmarks.remove(index)
+                dropped += 1
+            else:
+                repair_field(city, self.fields[index], source, cells)
+        return dropped
+
+    def distance(self, start, goal, exact=False):
+        """
+        Costo de start a goal.
+
+        Es el costo mínimo si algún extremo es fuente. Si no, es una cota
+        superior por el mejor landmark (pasar por él), salvo con exact, que
+        busca la ruta en la ciudad (A*, con caché de rutas).
+        """
+        city = self.city
+        a = start[1] * city.width + start[0]
+        b = goal[1] * city.width + goal[0]
+        if a == b:
+            return 0.0
+
+        field = self.fields.get(a)
+        if field is not None:
+            return field[b]
+
+        # El costo inverso difiere solo en el peso del tile de salida y llegada
+        field = self.fields.get(b)
+        if field is not None:
+            return self._reverse(field, b, a)
+
+        if exact:
+            return city.path_cost(start, goal)
+
+        best = math.inf
+        for landmark in self.landmarks:
+            field = self.fields[landmark]
+            best = min(best, self._reverse(field, landmark, a) + field[b])
+        return best
+
+    def lower_bound(self, start, goal):
+        """Cota inferior del costo usando la desigualdad triangular (ALT)."""
+        city = self.city
+        a = start[1] * city.width + start[0]
+        b = goal[1] * city.width + goal[0]
+
+        bound = 0.0
+        for landmark in self.landmarks:
+            field = self.fields[landmark]
+            to_a, to_b = field[a], field[b]
+            if math.isinf(to_a) or math.isinf(to_b):
+                continue
+            from_a = self._reverse(field, landmark, a)
+            from_b = self._reverse(field, landmark, b)
+            bound = max(bound, to_b - to_a, from_a - from_b)
+        return bound
+
+    def _reverse(self, field, source, index):
+        """Costo de index hacia source a partir del campo calculado desde source."""
+        if math.isinf(field[index]):
+            return math.inf
+        weights = self.city.weight_grid
+        return field[index] + weights[source] - weights[index]
+
+    def _select_landmarks(self, count):
+        """Selecciona landmarks alejados entre sí (farthest point)."""
+        city = self.city
+        if count <= 0 or not city.walkable_cells:
+            return
+
+        first = city.walkable_cells[0]
+        field = dijkstra_field(city, (first % city.width, first // city.width))
+        min_dist = list(field)
+
+        while len(self.landmarks) < count:
+            candidate = max(
+                (i for i in city.walkable_cells if not math.isinf(min_dist[i])),
+                key=min_dist.__getitem__,
+                default=None
+            )
+            if candidate is None or candidate in self.fields:
+                break
+
+            field = dijkstra_field(city, (candidate % city.width, candidate // city.width))
+            self.landmarks.append(candidate)
+            self.fields[candidate] = field
+            min_dist = [min(a, b) for a, b in zip(min_dist, field)]
+
+    def save(self, path):
+        """
+        Guarda las tablas precalculadas en disco (mismo esquema que map_format).
+
+        Se escribe a un archivo temporal y se reemplaza, así una escritura
+        cortada no deja un archivo a medias.
+        """
+        sources = list(self.fields)
+        header = json.dumps({
+            'version': self.city.version,
+            'hash': self.city.content_hash(),
+            'landmarks': self.landmarks,
+            'sources': sources,
+            'cells': self.city.width * self.city.height
+        }).encode()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            for index in sources:
+                f.write(array('f', self.fields[index]).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, city):
+        """Carga tablas guardadas; retorna None si no corresponden al mapa o el archivo está dañado."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, header_length = _PREFIX.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError("no es un archivo de tablas del oráculo")
+            offset = _PREFIX.size + header_length
+            header = json.loads(data[_PREFIX.size:offset].decode())
+            if header['version'] != city.version or header['hash'] != city.content_hash():
+                return None
+
+            cells, sources = header['cells'], header['sources']
+            size = cells * 4
+            if cells != city.width * city.height or len(data) != offset + size * len(sources):
+                raise ValueError("largo del archivo inesperado")
+            fields = {}
+            for index in sources:
+                field = array('f')
+                field.frombytes(data[offset:offset + size])
+                fields[index] = field
+                offset += size
+            landmarks = header['landmarks']
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error, OSError, KeyError) as e:
+            print(f"Tablas del oráculo inválidas en {path}, se reconstruyen: {e}")
+            return None
+        return cls(city, landmarks, fields)
@@ -0,0 +1,181 @@
+import heapq
+import math
+from array import array
+from .pathfinding import neighbors
+
+
+class DStarLite:
+    """
+    Planificador incremental D* Lite sobre una City.
+
+    Busca desde la meta hacia el inicio y conserva su estado entre llamadas:
+    cuando el repartidor avanza (update_start) o cambia el costo de un tile
+    (update_cost), solo se reparan las celdas afectadas en vez de repetir la
+    búsqueda completa.
+
+    Por defecto el costo de entrar a un tile es su surface_weight y los cambios
+    de City.set_tile se aplican solos hasta llamar a close(). Si se indican
+    weights propios (por ejemplo, un campo de tiempos por clima), el llamador
+    debe informar los cambios con update_cost.
+    """
+
+    def __init__(self, city, start, goal, weights=None):
+        self.city = city
+        self.width = city.width
+        self.height = city.height
+
+        if weights is None:
+            blocked = city.blocked_mask
+            grid = city.weight_grid
+            weights = (
+                math.inf if blocked[i] else grid[i]
+                for i in range(self.width * self.height)
+            )
+            city.add_listener(self._on_tiles_changed)
+        self.weights = array('f', weights)
+        self.h_scale = min((w for w in self.weights if w > 0), default=0.0)
+
+        self.start = self._index(start)
+        self.goal = self._index(goal)
+        self._last = self.start
+        self.km = 0.0
+
+        self.g = {}
+        self.rhs = {self.goal: 0.0}
+        self._open = []
+        self._open_keys = {}
+        self._push(self.goal)
+
+    def close(self):
+        """Deja de seguir los cambios de la ciudad (el planificador ya no se usa)."""
+        self.city.remove_listener(self._on_tiles_changed)
+
+    def update_start(self, x, y):
+        """Mueve el inicio (posición actual del repartidor)."""
+        self.start = self._index((x, y))
+
+    def update_cost(self, x, y, w):
+        """Cambia el costo de entrar a (x, y); inf (o None) lo bloquea."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"Posición fuera del mapa: ({x}, {y})")
+        index = y * self.width + x
+        w = math.inf if w is None else w
+        if self.weights[index] == w:
+            return
+
+        # Las claves pendientes se corrigen con km al cambiar el inicio
+        self.km += self._heuristic(self._last, self.start)
+        self._last = self.start
+
+        self.weights[index] = w
+        if 0 < w < self.h_scale:
+            # Heurística más baja: hay que recalcular las claves abiertas
+            self.h_scale = w
+            for node in list(self._open_keys):
+                self._push(node)
+
+        self._update_vertex(index)
+        for n in neighbors(index, self.width, self.height):
+            self._update_vertex(n)
+
+    def current_path(self):
+        """Ruta actual del inicio a la meta como lista de [x, y] (None si no hay)."""
+        self._compute_shortest_path()
+        if math.isinf(self._g(self.start)):
+            return None
+
+        width = self.width
+        node = self.start
+        path = [[node % width, node // width]]
+        # Límite por seguridad: una ruta nunca repite celdas
+        for _ in range(width * self.height):
+            if node == self.goal:
+                return path
+            node = min(
+                neighbors(node, width, self.height),
+                key=lambda n: self._cost(node, n) + self._g(n)
+            )
+            path.append([node % width, node // width])
+        return None
+
+    def current_cost(self):
+        """Costo de la ruta actual (inf si no hay ruta)."""
+        self._compute_shortest_path()
+        return self._g(self.start)
+
+    def _index(self, pos):
+        x, y = pos
+        return y * self.width + x
+
+    def _g(self, index):
+        return self.g.get(index, math.inf)
+
+    def _rhs(self, index):
+        return self.rhs.get(index, math.inf)
+
+    def _heuristic(self, a, b):
+        width = self.width
+        return self.h_scale * (abs(a % width - b % width) + abs(a // width - b // width))
+
+    def _cost(self, a, b):
+        """Costo de moverse de a hacia la celda vecina b."""
+        if math.isinf(self.weights[a]):
+            return math.inf
+        return self.weights[b]
+
+    def _key(self, index):
+        m = min(self._g(index), self._rhs(index))
+        return (m + self._heuristic(self.start, index) + self.km, m)
+
+    def _push(self, index):
+        key = self._key(index)
+        self._open_keys[index] = key
+        heapq.heappush(self._open, (key, index))
+
+    def _top_key(self):
+        """Clave mínima vigente (descarta entradas obsoletas del heap)."""
+        while self._open:
+            key, index = self._open[0]
+            if self._open_keys.get(index) == key:
+                return key
+            heapq.heappop(self._open)
+        return (math.inf, math.inf)
+
+    def _update_vertex(self, index):
+        if index != self.goal:
+            self.rhs[index] = min(
+                (self._cost(index, n) + self._g(n) for n in neighbors(index, self.width, self.height)),
+                default=math.inf
+            )
+        if self._g(index) != self._rhs(index):
+            self._push(index)
+        else:
+            self._open_keys.pop(index, None)
+
+    def _compute_shortest_path(self):
+        start = self.start
+        while (self._top_key() < self._key(start)
+               or self._rhs(start) != self._g(start)):
+            if not self._open_keys:
+                break
+            old_key, index = heapq.heappop(self._open)
+            del self._open_keys[index]
+
+            new_key = self._key(index)
+            if old_key < new_key:
+                self._push(index)
+            elif self._g(index) > self._rhs(index):
+                self.g[index] = self._rhs(index)
+                for n in neighbors(index, self.width, self.height):
+                    self._update_vertex(n)
+            else:
+                self.g[index] = math.inf
+                self._update_vertex(index)
+                for n in neighbors(index, self.width, self.height):
+                    self._update_vertex(n)
+
+    def _on_tiles_changed(self, cells):
+        city = self.city
+        for x, y in cells:
+            w = math.inf if city.is_blocked(x, y) else city.get_surface_weight(x, y)
+            self.update_cost(x, y, w)
@@ -0,0 +1,89 @@
+import heapq
+import math
+
+
+class ExpiryQueue:
+    """
+    Cola de pedidos ordenada por deadline.
+
+    Cada pedido pasa por etapas definidas como desplazamientos (en segundos)
+    respecto de su deadline_seconds, por ejemplo
+    (("warning", -60), ("late", 0), ("expired", 120)). Solo la próxima etapa de
+    cada pedido está en el heap, así pop_due cuesta O(log n) por etapa
+    cumplida. Los pedidos quitados con discard se descartan al salir del heap.
+    """
+
+    def __init__(self, stages=(("expired", 0),)):
+        self.stages = tuple(sorted(stages, key=lambda stage: stage[1]))
+        if not self.stages:
+            raise ValueError("ExpiryQueue necesita al menos una etapa.")
+        self._heap = []
+        self._sequence = 0
+        # id -> secuencia de la entrada vigente
+        self._live = {}
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, order_id):
+        return order_id in self._live
+
+    def push(self, order):
+        """Agrega un pedido (o lo reprograma si ya estaba). Los pedidos sin deadline se ignoran."""
+        deadline = order.deadline_seconds
+        if math.isinf(deadline):
+            self._live.pop(order.id, None)
+            return False
+        self._sequence += 1
+        self._live[order.id] = self._sequence
+        heapq.heappush(self._heap, (deadline + self.stages[0][1], self._sequence, 0, order))
+        return True
+
+    def discard(self, order_id):
+        """Saca un pedido de la cola (entregado, aceptado, cancelado)."""
+        if self._live.pop(order_id, None) is None:
+            return False
+        # Se reconstruye el heap si quedan demasiadas entradas descartadas
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [entry for entry in self._heap if self._live.get(entry[3].id) == entry[1]]
+            heapq.heapify(self._heap)
+        return True
+
+    def next_time(self):
+        """Momento de la próxima etapa pendiente (None si la cola está vacía)."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """
+        Retorna (etapa, pedido) de todas las etapas cumplidas hasta now, en orden.
+
+        Si un pedido cumplió varias etapas a la vez solo se informa la última.
+        El pedido sale de la cola al cumplir la última etapa.
+        """
+        heap = self._heap
+        stages = self.stages
+        due = []
+        while heap:
+            time, sequence, index, order = heap[0]
+            if time > now:
+                break
+            heapq.heappop(heap)
+            if self._live.get(order.id) != sequence:
+                continue
+
+            deadline = order.deadline_seconds
+            while index + 1 < len(stages) and deadline + stages[index + 1][1] <= now:
+                index += 1
+            due.append((stages[index][0], order))
+
+            if index + 1 < len(stages):
+                heapq.heappush(heap, (deadline + stages[index + 1][1], sequence, index + 1, order))
+            else:
+                del self._live[order.id]
+        return due
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._live.get(heap[0][3].id) != heap[0][1]:
+            heapq.heappop(heap)
@@ -1,13 +1,24 @@
 import pygame
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from src.logic.proxy import Proxy
-from src.logic.city import City, OrderManager
+from src.logic.city_registry import CityRegistry, prepare_city
+from src.logic.city import OrderManager
 from src.logic.player import Player
 from src.logic.order import Order
 from src.logic.game_state import GameState
 from src.logic.ui import UIManager
-from src.config.config import WEATHER_MULTIPLIERS
+from src.logic.isochrone import isochrone
+from src.logic.order_ranking import OrderRanker
+from src.logic.route_optimizer import plan_route
+from src.logic.order_selection import select_orders
+from src.logic.stamina_planner import StaminaPlanner
+from src.logic.scheduler import Scheduler
+from src.config.config import (
+    WEATHER_MULTIPLIERS, PLAYER_SPAWN, ISOCHRONE_SECONDS, GAME_START_DATETIME, MAP_PATCH_INTERVAL,
+    CITY_URLS, ORDER_WARNING_SECONDS, REP_PENALTY_VERY_LATE, ROUTE_BUDGET_MS,
+    ORDER_RANK_BUDGET_MS, REST_POINT_TILES, STAMINA_PLANNER_STEP
+)
 
 
 class Game:
@@ -19,14 +30,10 @@ class Game:
         pygame.display.set_caption("Courier Quest")
         self.clock = pygame.time.Clock()
 
-        proxy = Proxy()
-        map_data = proxy.get_map()
-        jobs_data = proxy.get_jobs()
-        self.weather = proxy.get_weather()
-
-        self.city = City(map_data)
-        self.order_manager = OrderManager(jobs_data)
-        self.player = Player(1, 1, self.city.goal)
+        # Ciudades cargadas; la siguiente de la rotación se precarga en segundo plano
+        self.city_registry = CityRegistry(CITY_URLS, preparer=prepare_city)
+        self._use_city(self.city_registry.get(CITY_URLS[0]))
+        self.player = Player(PLAYER_SPAWN[0], PLAYER_SPAWN[1], self.city.goal)
         self.game_state = GameState()
         self.ui = UIManager(1200, 800)
 
@@ -35,7 +42,7 @@ class Game:
         
         # Hora de inicio del juego (simulada como si fuera 12:00 PM)
         # Esto debe coincidir con los horarios de los pedidos del API
-        self.game_start_datetime = datetime(2025, 9, 1, 12, 0, 0)
+        self.game_start_datetime = GAME_START_DATETIME
         
         self.start_time = pygame.time.get_ticks() / 1000.0  # Tiempo real en segundos
         self.elapsed_time = 0  # Tiempo transcurrido en el juego
@@ -45,23 +52,116 @@ class Game:
 
         self.current_weather = self.weather.state
         self.next_weather = self.weather.state
-        self.weather_timer = random.uniform(45, 60)
-        self.weather_transition_time = 0
         self.in_transition = False
+        self._transition_start = 0.0
 
         self.message = ""
-        self.message_timer = 0
+        self.message_until = 0.0
         
         self.player_moved_this_frame = False
 
+        # Región alcanzable (tecla I); se recalcula solo cuando cambia el estado del jugador
+        self.show_isochrone = False
+        self._isochrone = None
+        self._isochrone_key = None
+
+        # Último recorrido planeado (tecla R) y pedidos sugeridos bajo el peso máximo
+        self.route_plan = None
+        self.suggested_ids = set()
+
+        # ETA a la entrega del pedido actual (panel inferior) y descansos que necesita
+        self._eta = None
+        self._eta_key = None
+        self.current_rests = []
+
+        # Los parches del mapa se piden en un hilo de fondo y se aplican en update
+        self._patch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-patch")
+        self._patch_request = None
+
+        # Eventos por tiempo de juego: clima, mensajes, liberación de pedidos,
+        # parches del mapa y fin de la partida
+        self._reset_schedule(random.uniform(45, 60))
+
+    def _reset_schedule(self, weather_timer):
+        """
+        Programa todos los eventos desde elapsed_time. Se usa al empezar y
+        cuando el reloj se mueve de golpe (cargar partida, deshacer).
+        """
+        self.scheduler = Scheduler(self.elapsed_time)
+        self._time_up_event = self.scheduler.schedule_at(self.game_duration, self._on_time_up)
+        self.scheduler.every(MAP_PATCH_INTERVAL, self.sync_map)
+        self.in_transition = False
+        self._weather_event = self.scheduler.schedule_in(weather_timer, self._begin_weather_transition)
+        self._release_event = None
+        self._schedule_release()
+
+    @property
+    def weather_timer(self):
+        """Segundos hasta el próximo cambio de clima."""
+        return self._weather_event.time - self.scheduler.now
+
+    @property
+    def weather_transition_time(self):
+        """Segundos desde que empezó la transición de clima actual."""
+        return self.scheduler.now - self._transition_start
+
+    def _use_city(self, entry):
+        """Activa una ciudad del registro y precarga la siguiente."""
+        self.city_entry = entry
+        self.proxy = entry.proxy
+        self.city = entry.city
+        self.weather = entry.weather
+        self.distance_oracle = entry.distance_oracle
+        self.travel_router = entry.travel_router
+        self.order_manager = OrderManager(entry.jobs)
+        if getattr(self, 'order_ranker', None) is not None:
+            self.order_ranker.close()
+        self.order_ranker = OrderRanker(entry.city, router=entry.travel_router)
+        self.order_ranking = []
+        self._ranking_key = None
+        self.stamina_planner = StaminaPlanner(entry.city)
+        self._eta_key = None
+
+        next_url = self.city_registry.next_url(entry.url)
+        if next_url != entry.url:
+            self.city_registry.prefetch(next_url)
+
+    def switch_city(self, url=None):
+        """
+        Cambia a otra ciudad (por defecto, la siguiente de la rotación).
+
+        El jugador empieza en el punto inicial de la nueva ciudad; no se puede
+        cambiar llevando pedidos.
+        """
+        if self.player.inventory.order_count > 0:
+            self.show_message("Entrega tus pedidos antes de cambiar de ciudad")
+            return False
+
+        url = url or self.city_registry.next_url(self.city_entry.url)
+        if url == self.city_entry.url:
+            return False
+
+        self._use_city(self.city_registry.get(url))
+        self.player.x, self.player.y = self.city.nearest_walkable(*PLAYER_SPAWN)
+        self.order_manager.update_available(self.elapsed_time)
+        self._schedule_release()
+        self.suggest_orders()
+        self._isochrone_key = None
+        self.show_message(f"Ciudad: {self.city.version}")
+        return True
+
     def get_current_game_datetime(self):
         """Obtiene la fecha/hora actual del juego basada en el tiempo transcurrido."""
         return self.game_start_datetime + timedelta(seconds=self.elapsed_time)
 
+    def get_game_seconds(self):
+        """Segundos de juego desde GAME_START_DATETIME (la escala de Order.deadline_seconds)."""
+        return (self.game_start_datetime - GAME_START_DATETIME).total_seconds() + self.elapsed_time
+
     def show_message(self, text, duration=2.0):
         """Muestra un mensaje temporal."""
         self.message = text
-        self.message_timer = duration
+        self.message_until = self.elapsed_time + duration
 
     def handle_input(self):
         """Maneja input del jugador."""
@@ -115,8 +215,13 @@ class Game:
                     self.player.inventory.sort_inventory(lambda o: o.priority)
                     self.show_message("Ordenado por prioridad")
                 elif event.key == pygame.K_d:
-                    self.player.inventory.sort_inventory(lambda o: o.deadline)
+                    self.player.inventory.sort_inventory(lambda o: o.deadline_seconds)
                     self.show_message("Ordenado por deadline")
+                elif event.key == pygame.K_r:
+                    self.plan_route()
+                elif event.key == pygame.K_f:
+                    waited = self.fast_forward()
+                    self.show_message(f"Esperaste {int(waited)}s")
 
                 if event.key == pygame.K_a:
                     self.accept_order_at_location()
@@ -141,24 +246,117 @@ class Game:
                         self.restore_state(state)
                         self.show_message("Deshacer último movimiento")
 
+                if event.key == pygame.K_TAB:
+                    self.switch_city()
+
+                if event.key == pygame.K_i:
+                    self.show_isochrone = not self.show_isochrone
+                    self.show_message("Región alcanzable activada" if self.show_isochrone
+                                      else "Región alcanzable desactivada")
+
     def accept_order_at_location(self):
-        """Acepta un pedido si el jugador está en el punto de recogida."""
-        available = self.order_manager.get_available()
+        """
+        Acepta los pedidos de esta ubicación que más pagan sin pasar el peso
+        máximo y que todavía llegan a tiempo.
+        """
+        orders = self.order_manager.orders_at(self.player.x, self.player.y)
+        if not orders:
+            self.show_message("No hay pedidos en esta ubicación")
+            return
 
-        for order_data in available:
-            pickup = order_data['pickup']
-            if [self.player.x, self.player.y] == pickup:
-                order = Order.from_dict(order_data)
+        chosen = self.select_orders(orders)
+        if not chosen:
+            free = self.player.inventory.max_weight - self.player.inventory.current_weight
+            if any((order.weight or 0) <= free for order in orders):
+                self.show_message("Ningún pedido llega a tiempo")
+            else:
+                self.show_message("Inventario lleno")
+            return
 
-                if self.player.accept_order(order):
-                    self.order_manager.remove_order(order_data['id'])
-                    self.show_message(f"Pedido {order.id} aceptado!")
-                    return
-                else:
-                    self.show_message("Inventario lleno")
-                    return
+        accepted = []
+        for order in chosen:
+            if self.player.accept_order(order):
+                self.order_manager.remove_order(order.id)
+                accepted.append(order.id)
+        if len(accepted) == 1:
+            self.show_message(f"Pedido {accepted[0]} aceptado!")
+        else:
+            self.show_message(f"Pedidos aceptados: {', '.join(accepted)}")
+        self.suggest_orders()
+
+    def select_orders(self, orders):
+        """
+        Subconjunto de orders de mayor pago que cabe en el inventario y llega a tiempo.
+
+        Cada pedido se filtra con su OrderScore y el conjunto elegido se valida
+        junto con los que ya se llevan: el plan de RouteOptimizer no puede
+        sumar atraso al de solo entregar lo que se lleva. Los candidatos que
+        el plan deja fuera por presupuesto no se validan.
+        """
+        inventory = self.player.inventory
+        scores = {score.order.id: score for score in self.rank_orders(orders)}
+        carried = self._carried_orders()
+        baseline = self._plan(carried, ()).lateness if carried else 0.0
+
+        def deliverable(chosen):
+            return self._plan(carried, chosen).lateness <= baseline + 1e-6
+
+        return select_orders(
+            orders, inventory.max_weight - inventory.current_weight,
+            feasible=lambda order: order.id in scores and scores[order.id].feasible,
+            deliverable=deliverable
+        )
+
+    def _carried_orders(self):
+        """Pedidos del inventario en su orden actual."""
+        carried = []
+        node = self.player.inventory.first
+        while node:
+            carried.append(node.order)
+            node = node.next
+        return carried
+
+    def _plan(self, carried, candidates, budget_ms=ROUTE_BUDGET_MS):
+        """RoutePlan desde la posición actual con el estado del jugador."""
+        return plan_route(
+            (self.player.x, self.player.y), carried, candidates,
+            capacity=self.player.inventory.max_weight,
+            now=self.get_game_seconds(),
+            weather=self.current_weather,
+            speed_factor=self.player.get_speed_factor(),
+            budget_ms=budget_ms,
+            city=self.city,
+            router=self.travel_router
+        )
 
-        self.show_message("No hay pedidos en esta ubicación")
+    def suggest_orders(self):
+        """Recalcula la selección sugerida entre todos los pedidos disponibles."""
+        self.suggested_ids = {order.id for order in self.select_orders(self.order_manager.get_available())}
+        return self.suggested_ids
+
+    def plan_route(self, candidates=None, budget_ms=ROUTE_BUDGET_MS):
+        """
+        Planea el recorrido de los pedidos que se llevan y de los candidatos
+        (por defecto los 5 mejores del ranking) y reordena el inventario según
+        el orden de entrega.
+        """
+        inventory = self.player.inventory
+        carried = self._carried_orders()
+        if candidates is None:
+            candidates = [score.order for score in self.rank_orders(k=5) if score.feasible]
+
+        plan = self._plan(carried, candidates, budget_ms)
+        self.route_plan = plan
+        if not plan.stops:
+            self.show_message("No hay pedidos para planear")
+            return plan
+
+        if len(carried) > 1:
+            inventory.reorder(plan.dropoff_order())
+        kind, order = plan.stops[0]
+        action = "Recoger" if kind == "pickup" else "Entregar"
+        self.show_message(f"Ruta: {action} {order.id} ({len(plan.stops)} paradas)")
+        return plan
 
     def check_delivery_points(self):
         """Verifica si el jugador está en un punto de entrega."""
@@ -181,7 +379,7 @@ class Game:
         # Usar la hora actual del juego para la entrega
         current_game_time = self.get_current_game_datetime()
         
-        result = self.player.complete_delivery(current_game_time)
+        result = self.player.complete_delivery(self.get_game_seconds())
 
         if result:
             msg = f"¡Entregado! +${int(result['payout'])} | Rep: {result['rep_change']:+d}"
@@ -194,21 +392,72 @@ class Game:
             print(f"Cambio de reputación: {result['rep_change']}")
             print(f"Reputación actual: {self.player.reputation}")
 
-    def update_weather(self, dt):
-        """Actualiza sistema de clima con transición suave."""
-        self.weather_timer -= dt
-
-        if self.in_transition:
-            self.weather_transition_time += dt
-            if self.weather_transition_time >= 4:
-                self.current_weather = self.next_weather
-                self.in_transition = False
+    def check_deadlines(self, now):
+        """Avisa de los pedidos que se llevan por vencer, atrasados o descartados."""
+        for stage, order in self.player.check_deadlines(now):
+            if stage == "warning":
+                self.show_message(f"¡{order.id} vence en menos de {ORDER_WARNING_SECONDS}s!")
+            elif stage == "late":
+                self.show_message(f"Pedido {order.id} atrasado")
+            else:
+                self.show_message(f"Pedido {order.id} vencido ({REP_PENALTY_VERY_LATE:+d} reputación)", 3.0)
+
+    def _begin_weather_transition(self):
+        """Empieza la transición suave (4 s) al próximo clima y programa el siguiente cambio."""
+        self.next_weather = self.weather.next_state()
+        self._transition_start = self.scheduler.now
+        self.in_transition = True
+        self.scheduler.schedule_in(4, self._end_weather_transition)
+        self._weather_event = self.scheduler.schedule_in(random.uniform(45, 60), self._begin_weather_transition)
+
+    def _end_weather_transition(self):
+        self.current_weather = self.next_weather
+        self.in_transition = False
 
-        if self.weather_timer <= 0 and not self.in_transition:
-            self.next_weather = self.weather.next_state()
-            self.weather_timer = random.uniform(45, 60)
-            self.weather_transition_time = 0
-            self.in_transition = True
+    def _schedule_release(self):
+        """Programa la próxima liberación de pedidos (si cambió)."""
+        release = self.order_manager.next_release_time()
+        event = self._release_event
+        if event is not None:
+            if event.time == release:
+                return
+            event.cancel()
+        self._release_event = None
+        if release is not None:
+            self._release_event = self.scheduler.schedule_at(release, self._release_orders)
+
+    def _release_orders(self):
+        self._release_event = None
+        if self.order_manager.update_available(self.scheduler.now):
+            self.suggest_orders()
+        self._schedule_release()
+
+    def _on_time_up(self):
+        self.end_game(self.player.has_won())
+
+    def next_event_time(self):
+        """
+        elapsed_time del próximo evento de juego: liberación de pedidos, cambio
+        de clima, fin de la partida o vencimiento de un pedido.
+        """
+        times = [event.time for event in (self._release_event, self._weather_event, self._time_up_event)
+                 if event is not None and not event.cancelled]
+        # Las colas de vencimiento usan segundos desde GAME_START_DATETIME
+        offset = self.get_game_seconds() - self.elapsed_time
+        for queue in (self.order_manager.expiry, self.player.inventory.expiry):
+            deadline = queue.next_time()
+            if deadline is not None:
+                times.append(deadline - offset)
+        return min(times) if times else None
+
+    def fast_forward(self):
+        """Adelanta el reloj hasta el próximo evento, como si el jugador esperara quieto."""
+        target = self.next_event_time()
+        if target is None or self.game_over:
+            return 0.0
+        dt = max(0.0, target - self.elapsed_time)
+        self.update(dt)
+        return dt
 
     def get_current_weather_multiplier(self):
         """Obtiene multiplicador de clima con interpolación."""
@@ -221,39 +470,174 @@ class Game:
 
         return current_mult + (next_mult - current_mult) * progress
 
+    def sync_map(self):
+        """Pide en segundo plano los cambios del mapa publicados por el API desde la versión actual."""
+        if self._patch_request is not None:
+            return False
+        future = self._patch_executor.submit(self.proxy.get_map_patch, self.city.version)
+        self._patch_request = (self.city, future)
+        return True
+
+    def apply_fetched_patch(self):
+        """Aplica el parche pedido por sync_map si ya llegó (en el hilo del juego)."""
+        if self._patch_request is None or not self._patch_request[1].done():
+            return False
+        city, future = self._patch_request
+        self._patch_request = None
+        patch = future.result()
+        # Si se cambió de ciudad mientras se pedía, el parche es de la anterior
+        if patch is None or city is not self.city:
+            return False
+        try:
+            self.proxy.apply_map_patch(self.city, patch, self.distance_oracle)
+        except (ValueError, IndexError) as e:
+            print(f"No se pudo aplicar el parche del mapa: {e}")
+            return False
+        self.show_message("Mapa actualizado")
+        return True
+
+    def get_isochrone(self):
+        """Región alcanzable en ISOCHRONE_SECONDS con la resistencia, carga y clima actuales."""
+        key = (self.player.x, self.player.y, int(self.player.stamina), self.player.is_exhausted,
+               self.player.inventory.current_weight, self.current_weather, self.city.revision)
+        if key != self._isochrone_key:
+            self._isochrone = isochrone(self.city, self.player, ISOCHRONE_SECONDS, self.current_weather)
+            self._isochrone_key = key
+        return self._isochrone
+
+    def get_eta_to(self, x, y):
+        """Segundos de juego estimados para llegar a (x, y) con el clima y estado actuales."""
+        return self._route_to(x, y)[1]
+
+    def _route_to(self, x, y):
+        """Ruta más rápida a (x, y) según TravelTimeRouter: (ruta, segundos)."""
+        progress = self.weather_transition_time / 4.0 if self.in_transition else 0.0
+        return self.travel_router.route(
+            (self.player.x, self.player.y), (x, y),
+            self.current_weather,
+            speed_factor=self.player.get_speed_factor(),
+            next_weather=self.next_weather if self.in_transition else None,
+            progress=progress,
+            game_time=self.get_current_game_datetime()
+        )
+
+    def get_current_order_eta(self):
+        """
+        ETA a la entrega del pedido actual; se recalcula solo cuando cambia lo que la afecta.
+
+        Si la resistencia no alcanza para la ruta más rápida, la ETA es la del
+        StaminaPlanner, que incluye los descansos (quedan en current_rests).
+        """
+        current = self.player.inventory.current_order
+        if current is None:
+            self.current_rests = []
+            return None
+        order = current.order
+        game_time = self.get_current_game_datetime()
+        player = self.player
+        key = (player.x, player.y, order.id, self.current_weather,
+               self.next_weather if self.in_transition else None,
+               int(self.weather_transition_time) if self.in_transition else 0,
+               round(player.get_speed_factor(), 2), self.city.revision,
+               self.travel_router.bucket_for(game_time),
+               int(player.stamina // STAMINA_PLANNER_STEP), player.is_exhausted)
+        if key != self._eta_key:
+            path, self._eta = self._route_to(*order.dropoff)
+            self.current_rests = []
+            steps = len(path) - 1 if path else 0
+            # Exhausto no hay ruta sin descansar (el factor de velocidad es 0)
+            if player.is_exhausted or steps * player.get_stamina_cost(self.current_weather) > player.stamina:
+                plan = self.stamina_planner.plan(player, order.dropoff, self.current_weather)
+                if plan is not None:
+                    self._eta = plan.total_time
+                    self.current_rests = plan.rests
+            self._eta_key = key
+        return self._eta
+
+    def refresh_ranking(self):
+        """
+        Recalcula el ranking de todos los pedidos disponibles si cambió la
+        posición, los disponibles, el clima, la carga, el mapa o el segundo de
+        juego (la holgura), o si el campo del repartidor sigue a medio
+        calcular (avanza ORDER_RANK_BUDGET_MS por llamada); si no, no hace nada.
+        """
+        inventory = self.player.inventory
+        available = self.order_manager.available_orders
+        now = self.get_game_seconds()
+        speed_factor = self.player.get_speed_factor()
+        capacity = inventory.max_weight - inventory.current_weight
+        key = (self.player.x, self.player.y, id(available), self.current_weather,
+               round(speed_factor, 2), capacity, self.city.revision, int(now))
+        if key != self._ranking_key or self.order_ranker.pending:
+            self.order_ranking = self.order_ranker.rank(
+                available, (self.player.x, self.player.y), now, self.current_weather,
+                speed_factor=speed_factor, capacity=capacity, budget_ms=ORDER_RANK_BUDGET_MS
+            )
+            self._ranking_key = key
+        return self.order_ranking
+
+    def rank_orders(self, orders=None, k=None):
+        """
+        Ranking (OrderScore) de pedidos por ganancia por segundo desde la posición actual.
+
+        orders filtra el ranking de todos los disponibles (no se puntúa otra lista).
+        """
+        ranking = self.refresh_ranking()
+        if orders is not None:
+            ids = {order.id for order in orders}
+            ranking = [score for score in ranking if score.order.id in ids]
+        return ranking if k is None else ranking[:k]
+
     def update(self, dt):
         """Actualiza lógica del juego."""
         if self.game_over:
             return
 
         if not self.player_moved_this_frame:
-            self.player.recover_stamina(dt)
+            tile = self.city.get_tile(self.player.x, self.player.y)
+            self.player.recover_stamina(dt, in_rest_point=tile in REST_POINT_TILES)
 
         self.elapsed_time += dt
 
-        self.update_weather(dt)
+        # Solo se atienden los eventos que vencen en este frame
+        self.scheduler.advance_to(self.elapsed_time)
+        if self.game_over:
+            return
         self.ui.update_weather_effects(self.current_weather, dt)
+        self.apply_fetched_patch()
 
-        self.order_manager.update_available(self.elapsed_time)
+        # Feed de pedidos por lotes: uno por frame
+        batch = self.city_entry.next_job_batch()
+        if batch:
+            self.order_manager.add_orders(batch)
+            self._schedule_release()
+
+        # Vencimientos: disponibles que ya no sirven y avisos de los que se llevan
+        now = self.get_game_seconds()
+        self.order_manager.expire_orders(now)
+        self.check_deadlines(now)
 
-        if self.message_timer > 0:
-            self.message_timer -= dt
+        self.refresh_ranking()
 
         if self.player.is_defeated():
             self.end_game(False)
 
-        if self.elapsed_time >= self.game_duration:
-            if self.player.has_won():
-                self.end_game(True)
-            else:
-                self.end_game(False)
-
     def draw(self):
         """Dibuja el juego."""
         self.screen.fill((20, 20, 30))
 
-        available = self.order_manager.get_available()
-        self.ui.draw_map(self.screen, self.city, self.player.x, self.player.y, available)
+        # El ranking se recalcula en update; aquí solo se lee
+        ranking = self.order_ranking
+        self.ui.draw_map(self.screen, self.city, self.player.x, self.player.y, self.order_manager)
+        
+        if self.show_isochrone:
+            iso = self.get_isochrone()
+            self.ui.draw_isochrone(self.screen, iso)
+            # Solo se revisan los pedidos dentro del rectángulo de la región
+            reachable = iso.filter_orders(self.order_manager.orders_in_rect(
+                iso.x0, iso.y0, iso.x0 + iso.width - 1, iso.y0 + iso.height - 1))
+            ids = {order.id for order in reachable}
+            ranking = [score for score in ranking if score.order.id in ids]
         
         self.ui.draw_weather_effects(self.screen, self.current_weather)
 
@@ -262,11 +646,13 @@ class Game:
         self.ui.draw_hud(self.screen, self.player, self.game_duration,
                         self.current_weather, self.elapsed_time, current_game_time)
 
-        self.ui.draw_current_order(self.screen, self.player.inventory, self.city)
+        self.ui.draw_current_order(self.screen, self.player.inventory, self.city,
+                                   self.get_current_order_eta(), len(self.current_rests))
 
-        self.ui.draw_available_orders(self.screen, available)
+        self.ui.draw_available_orders(self.screen, ranking[:5],
+                                      suggested=self.suggested_ids)
 
-        if self.message_timer > 0:
+        if self.message and self.elapsed_time < self.message_until:
             font = pygame.font.Font(None, 32)
             text = font.render(self.message, True, (255, 255, 100))
             rect = text.get_rect(center=(600, 400))
@@ -295,6 +681,8 @@ class Game:
             self.update(dt)
             self.draw()
 
+        self._patch_executor.shutdown(wait=False, cancel_futures=True)
+        self.city_registry.close()
         pygame.quit()
 
     def save_game(self, slot):
@@ -327,7 +715,7 @@ class Game:
             gd = data['game_data']
             self.elapsed_time = gd['elapsed_time']
             self.current_weather = gd['weather_state']
-            self.weather_timer = gd['weather_timer']
+            self._reset_schedule(gd['weather_timer'])
             
             # Restaurar la hora de inicio del juego
             if 'game_start_datetime' in gd:
@@ -344,6 +732,7 @@ class Game:
         self.player.total_income = state['income']
         self.elapsed_time = state['time']
         self.current_weather = state['weather']
+        self._reset_schedule(self.weather_timer)
 
     def calculate_score(self):
         """Calcula puntaje final."""
@@ -0,0 +1,301 @@
+import heapq
+import math
+
+
+class HierarchicalPathfinder:
+    """
+    Búsqueda jerárquica de rutas (HPA*) sobre una City.
+
+    El mapa se divide en clusters cuadrados. En cada borde entre clusters
+    vecinos se crea una entrada por tramo abierto, y dentro de cada cluster se
+    precalcula el costo entre sus entradas (surface_weight del tile al que se
+    entra). Las consultas buscan primero sobre este grafo abstracto y luego
+    refinan solo los tramos de la ruta encontrada.
+
+    Cuando un tile cambia (City.set_tile) se reconstruyen únicamente su
+    cluster y los bordes con sus vecinos.
+    """
+
+    def __init__(self, city, cluster_size=16):
+        self.city = city
+        self.cluster_size = cluster_size
+        self.cluster_cols = (city.width + cluster_size - 1) // cluster_size
+        self.cluster_rows = (city.height + cluster_size - 1) // cluster_size
+
+        # Entradas por borde: (cluster_a, cluster_b) -> [(celda_a, celda_b), ...]
+        self._borders = {}
+        # Aristas entre clusters: celda -> {celda vecina: costo}
+        self._inter = {}
+        # Aristas dentro de cada cluster: cluster -> {celda: {celda: costo}}
+        self._intra = {}
+
+        self.rebuild()
+        city.add_listener(self.on_tiles_changed)
+
+    def rebuild(self):
+        """Construye toda la abstracción desde cero."""
+        self._borders.clear()
+        self._inter.clear()
+        self._intra.clear()
+        for cluster in self._all_clusters():
+            for neighbor in self._forward_neighbors(cluster):
+                self._build_border(cluster, neighbor)
+        for cluster in self._all_clusters():
+            self._build_intra(cluster)
+
+    def on_tiles_changed(self, cells):
+        """Reconstruye solo los clusters afectados por los tiles modificados."""
+        changed = {self._cluster_of(y * self.city.width + x) for x, y in cells}
+        affected = set(changed)
+
+        for cluster in changed:
+            for neighbor in self._adjacent_clusters(cluster):
+                self._build_border(*sorted((cluster, neighbor)))
+                affected.add(neighbor)
+        for cluster in affected:
+            self._build_intra(cluster)
+
+    def find_path(self, start, goal):
+        """
+        Busca una ruta entre start y goal.
+
+        Returns:
+            tuple: (lista de [x, y], costo) o (None, inf) si no hay ruta
+        """
+        city = self.city
+        if not city.is_reachable(start, goal):
+            return None, math.inf
+
+        width = city.width
+        source = start[1] * width + start[0]
+        target = goal[1] * width + goal[0]
+        if source == target:
+            return [list(start)], 0.0
+
+        source_cluster = self._cluster_of(source)
+        target_cluster = self._cluster_of(target)
+
+        # Conectar temporalmente inicio y meta con las entradas de su cluster
+        from_source = self._cluster_search(source_cluster, source)
+        to_target = self._cluster_search(target_cluster, target, reverse=True)
+        start_edges = {n: from_source[n] for n in self._nodes(source_cluster) if n in from_source}
+        goal_edges = {n: to_target[n] for n in self._nodes(target_cluster) if n in to_target}
+
+        best_cost = math.inf
+        best_abstract = None
+        if source_cluster == target_cluster and target in from_source:
+            best_cost = from_source[target]
+            best_abstract = [source, target]
+
+        abstract, cost = self._abstract_search(source, target, start_edges, goal_edges)
+        if abstract is not None and cost < best_cost:
+            best_cost, best_abstract = cost, abstract
+
+        if best_abstract is None:
+            return None, math.inf
+        return self._refine(best_abstract), best_cost
+
+    def shortest_path(self, start, goal):
+        """Retorna la ruta como lista de [x, y] (None si no existe)."""
+        return self.find_path(start, goal)[0]
+
+    def path_cost(self, start, goal):
+        """Retorna el costo de la ruta encontrada."""
+        return self.find_path(start, goal)[1]
+
+    # --- Grafo abstracto ---
+
+    def _abstract_search(self, source, target, start_edges, goal_edges):
+        """A* sobre el grafo de entradas."""
+        width = self.city.width
+        h_scale = self.city.min_surface_weight
+        tx, ty = target % width, target // width
+
+        def heuristic(index):
+            return h_scale * (abs(index % width - tx) + abs(index // width - ty))
+
+        best = {source: 0.0}
+        came_from = {}
+        heap = [(heuristic(source), 0.0, source)]
+
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while path[-1] in came_from:
+                    path.append(came_from[path[-1]])
+                path.reverse()
+                return path, cost
+            if cost > best[node]:
+                continue
+
+            for neighbor, edge_cost in self._expand(node, source, target, start_edges, goal_edges):
+                new_cost = cost + edge_cost
+                if new_cost < best.get(neighbor, math.inf):
+                    best[neighbor] = new_cost
+                    came_from[neighbor] = node
+                    heapq.heappush(heap, (new_cost + heuristic(neighbor), new_cost, neighbor))
+
+        return None, math.inf
+
+    def _expand(self, node, source, target, start_edges, goal_edges):
+        """Aristas salientes de un nodo abstracto (incluye inicio y meta temporales)."""
+        if node == source:
+            yield from start_edges.items()
+        intra = self._intra.get(self._cluster_of(node), {}).get(node)
+        if intra:
+            yield from intra.items()
+        inter = self._inter.get(node)
+        if inter:
+            yield from inter.items()
+        if node in goal_edges:
+            yield target, goal_edges[node]
+
+    def _refine(self, abstract):
+        """Convierte la ruta abstracta en la ruta completa tile por tile."""
+        width = self.city.width
+        cells = [abstract[0]]
+        for a, b in zip(abstract, abstract[1:]):
+            if a == b:
+                continue
+            cluster = self._cluster_of(a)
+            if cluster == self._cluster_of(b):
+                cells.extend(self._cluster_path(cluster, a, b)[1:])
+            else:
+                cells.append(b)
+        return [[i % width, i // width] for i in cells]
+
+    # --- Construcción de clusters ---
+
+    def _all_clusters(self):
+        return [(cx, cy) for cy in range(self.cluster_rows) for cx in range(self.cluster_cols)]
+
+    def _forward_neighbors(self, cluster):
+        cx, cy = cluster
+        result = []
+        if cx + 1 < self.cluster_cols:
+            result.append((cx + 1, cy))
+        if cy + 1 < self.cluster_rows:
+            result.append((cx, cy + 1))
+        return result
+
+    def _adjacent_clusters(self, cluster):
+        cx, cy = cluster
+        candidates = [(cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)]
+        return [
+            (x, y) for x, y in candidates
+            if 0 <= x < self.cluster_cols and 0 <= y < self.cluster_rows
+        ]
+
+    def _cluster_of(self, index):
+        width = self.city.width
+        return ((index % width) // self.cluster_size, (index // width) // self.cluster_size)
+
+    def _bounds(self, cluster):
+        cx, cy = cluster
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return x0, y0, min(x0 + self.cluster_size, self.city.width), min(y0 + self.cluster_size, self.city.height)
+
+    def _nodes(self, cluster):
+        return self._intra.get(cluster, {}).keys()
+
+    def _build_border(self, cluster_a, cluster_b):
+        """Recalcula las entradas del borde entre dos clusters vecinos (a antes que b)."""
+        city = self.city
+        width = city.width
+        blocked = city.blocked_mask
+        weights = city.weight_grid
+
+        for a, b in self._borders.pop((cluster_a, cluster_b), []):
+            for node, other in ((a, b), (b, a)):
+                edges = self._inter.get(node)
+                if edges is not None:
+                    edges.pop(other, None)
+                    if not edges:
+                        del self._inter[node]
+
+        ax0, ay0, ax1, ay1 = self._bounds(cluster_a)
+        if cluster_b[0] > cluster_a[0]:
+            # Borde vertical: columna derecha de a contra columna izquierda de b
+            pairs = [(y * width + ax1 - 1, y * width + ax1) for y in range(ay0, ay1)]
+        else:
+            # Borde horizontal: fila inferior de a contra fila superior de b
+            pairs = [((ay1 - 1) * width + x, ay1 * width + x) for x in range(ax0, ax1)]
+
+        entrances = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and not blocked[a] and not blocked[b]:
+                run.append((a, b))
+                continue
+            if run:
+                entrances.append(run[len(run) // 2])
+                run = []
+
+        for a, b in entrances:
+            self._inter.setdefault(a, {})[b] = weights[b]
+            self._inter.setdefault(b, {})[a] = weights[a]
+        self._borders[(cluster_a, cluster_b)] = entrances
+
+    def _build_intra(self, cluster):
+        """Recalcula los costos entre todas las entradas de un cluster."""
+        nodes = set()
+        for neighbor in self._adjacent_clusters(cluster):
+            key = (cluster, neighbor) if neighbor > cluster else (neighbor, cluster)
+            for a, b in self._borders.get(key, []):
+                nodes.add(a if self._cluster_of(a) == cluster else b)
+
+        edges = {}
+        for node in nodes:
+            dist = self._cluster_search(cluster, node)
+            edges[node] = {other: dist[other] for other in nodes if other != node and other in dist}
+        self._intra[cluster] = edges
+
+    # --- Búsquedas acotadas a un cluster ---
+
+    def _cluster_search(self, cluster, source, reverse=False):
+        """
+        Dijkstra dentro de un cluster.
+
+        Con reverse=True calcula el costo de cada celda HACIA source.
+        """
+        return self._cluster_dijkstra(cluster, source, reverse=reverse)[0]
+
+    def _cluster_path(self, cluster, source, target):
+        """Ruta (índices planos) dentro de un cluster."""
+        _, came_from = self._cluster_dijkstra(cluster, source, target=target)
+        path = [target]
+        while path[-1] != source:
+            path.append(came_from[path[-1]])
+        path.reverse()
+        return path
+
+    def _cluster_dijkstra(self, cluster, source, target=None, reverse=False):
+        city = self.city
+        width = city.width
+        blocked = city.blocked_mask
+        weights = city.weight_grid
+        x0, y0, x1, y1 = self._bounds(cluster)
+
+        dist = {source: 0.0}
+        came_from = {}
+        heap = [(0.0, source)]
+        while heap:
+            cost, index = heapq.heappop(heap)
+            if index == target:
+                break
+            if cost > dist[index]:
+                continue
+            x, y = index % width, index // width
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if not (x0 <= nx < x1 and y0 <= ny < y1):
+                    continue
+                n = ny * width + nx
+                if blocked[n]:
+                    continue
+                new_cost = cost + (weights[index] if reverse else weights[n])
+                if new_cost < dist.get(n, math.inf):
+                    dist[n] = new_cost
+                    came_from[n] = index
+                    heapq.heappush(heap, (new_cost, n))
+        return dist, came_from
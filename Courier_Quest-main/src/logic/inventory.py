@@ -1,5 +1,14 @@
+from src.config.config import ORDER_WARNING_SECONDS, ORDER_EXPIRY_GRACE_SECONDS
+from .expiry_queue import ExpiryQueue
 from .order import Order
 
+# Etapas de los pedidos que se llevan, respecto de su deadline
+DEADLINE_STAGES = (
+    ("warning", -ORDER_WARNING_SECONDS),
+    ("late", 0),
+    ("expired", ORDER_EXPIRY_GRACE_SECONDS),
+)
+
 class Node:
     def __init__(self, order: Order):
         self.order = order
@@ -15,6 +24,9 @@ class Inventory:
         self.max_weight = max_weight
         self.current_weight = 0
         self.order_count = 0
+        # Deadlines de los pedidos que se llevan; deadline_alerts guarda id -> etapa
+        self.expiry = ExpiryQueue(DEADLINE_STAGES)
+        self.deadline_alerts = {}
 
     def add_order(self, order: Order):
         if self.current_weight + order.weight > self.max_weight:
@@ -32,6 +44,7 @@ class Inventory:
 
         self.current_weight += order.weight
         self.order_count += 1
+        self.expiry.push(order)
         print(f"Order {order.id} added to inventory.")
         return True
 
@@ -54,27 +67,51 @@ class Inventory:
             print("No order selected to complete.")
             return
 
-        completed_order = self.current_order.order
+        completed_order = self._unlink(self.current_order)
+        print(f"Order {completed_order.id} completed!")
+        return completed_order
+
+    def remove_order(self, order_id):
+        """Saca un pedido cualquiera del inventario. Retorna el pedido (o None)."""
+        node = self.first
+        while node and node.order.id != order_id:
+            node = node.next
+        if node is None:
+            return None
+        return self._unlink(node)
 
-        if self.current_order.prev:
-            self.current_order.prev.next = self.current_order.next
-        else:
-            self.first = self.current_order.next
+    def check_deadlines(self, now):
+        """
+        Etapas de deadline cumplidas hasta now (segundos de juego).
 
-        if self.current_order.next:
-            self.current_order.next.prev = self.current_order.prev
+        Retorna una lista de (etapa, pedido) con etapa "warning", "late" o
+        "expired"; los pedidos vencidos no se sacan del inventario aquí.
+        """
+        events = self.expiry.pop_due(now)
+        for stage, order in events:
+            self.deadline_alerts[order.id] = stage
+        return events
+
+    def _unlink(self, node):
+        if node.prev:
+            node.prev.next = node.next
         else:
-            self.last = self.current_order.prev
+            self.first = node.next
 
-        if self.current_order.next:
-            self.current_order = self.current_order.next
+        if node.next:
+            node.next.prev = node.prev
         else:
-            self.current_order = self.current_order.prev
+            self.last = node.prev
 
-        self.current_weight -= completed_order.weight
+        if node is self.current_order:
+            self.current_order = node.next if node.next else node.prev
+
+        order = node.order
+        self.current_weight -= order.weight
         self.order_count -= 1
-        print(f"Order {completed_order.id} completed!")
-        return completed_order
+        self.expiry.discard(order.id)
+        self.deadline_alerts.pop(order.id, None)
+        return order
 
     def sort_inventory(self, key):
         """
@@ -102,17 +139,7 @@ class Inventory:
         nodes_list.sort(key=lambda node: key(node.order), reverse=True)
 
         # Reconstruir la lista enlazada con el orden nuevo
-        for i, node in enumerate(nodes_list):
-            if i == 0:
-                self.first = node
-                node.prev = None
-            else:
-                node.prev = nodes_list[i - 1]
-                nodes_list[i - 1].next = node
-            
-            if i == len(nodes_list) - 1:
-                self.last = node
-                node.next = None
+        self._relink(nodes_list)
 
         # Restaurar el puntero current_order
         if current_id is not None:
@@ -125,4 +152,32 @@ class Inventory:
         else:
             self.current_order = self.first
 
-        print("Inventory sorted successfully.")
\ No newline at end of file
+        print("Inventory sorted successfully.")
+
+    def reorder(self, order_ids):
+        """
+        Reordena el inventario según order_ids (p. ej. el orden de entregas de
+        un RoutePlan). Los pedidos que no aparecen quedan al final en su orden
+        actual. El pedido actual pasa a ser el primero.
+        """
+        position = {order_id: i for i, order_id in enumerate(order_ids)}
+        nodes_list = []
+        node = self.first
+        while node:
+            nodes_list.append(node)
+            node = node.next
+        if not nodes_list:
+            return
+
+        nodes_list.sort(key=lambda node: position.get(node.order.id, len(position)))
+        self._relink(nodes_list)
+        self.current_order = self.first
+        print("Inventory reordered.")
+
+    def _relink(self, nodes_list):
+        """Enlaza los nodos en el orden de la lista."""
+        for i, node in enumerate(nodes_list):
+            node.prev = nodes_list[i - 1] if i > 0 else None
+            node.next = nodes_list[i + 1] if i + 1 < len(nodes_list) else None
+        self.first = nodes_list[0]
+        self.last = nodes_list[-1]
@@ -0,0 +1,126 @@
+import heapq
+import math
+from array import array
+from .pathfinding import neighbors
+
+
+class Isochrone:
+    """
+    Región alcanzable dentro de un presupuesto de tiempo.
+
+    La máscara y los tiempos cubren solo el rectángulo que contiene la región
+    (x0, y0, width, height); fuera de él nada es alcanzable.
+    """
+
+    def __init__(self, origin, budget, x0, y0, width, height, mask, times):
+        self.origin = origin
+        self.budget = budget
+        self.x0 = x0
+        self.y0 = y0
+        self.width = width
+        self.height = height
+        self.mask = mask
+        self.times = times
+
+    def contains(self, x, y):
+        """Verifica si (x, y) es alcanzable."""
+        x -= self.x0
+        y -= self.y0
+        return 0 <= x < self.width and 0 <= y < self.height and self.mask[y * self.width + x] == 1
+
+    def time_at(self, x, y):
+        """Segundos para llegar a (x, y) (inf si no es alcanzable)."""
+        if not self.contains(x, y):
+            return math.inf
+        return self.times[(y - self.y0) * self.width + (x - self.x0)]
+
+    def cells(self):
+        """Itera (x, y, segundos) de las celdas alcanzables."""
+        for offset, reached in enumerate(self.mask):
+            if reached:
+                yield (self.x0 + offset % self.width, self.y0 + offset // self.width,
+                       self.times[offset])
+
+    def __len__(self):
+        return sum(self.mask)
+
+    def filter_orders(self, orders, key='pickup'):
+        """Filtra pedidos (dicts u Order) cuyo punto indicado es alcanzable."""
+        result = []
+        for order in orders:
+            pos = order.get(key) if isinstance(order, dict) else getattr(order, key)
+            if pos is not None and self.contains(*pos):
+                result.append(order)
+        return result
+
+
+def isochrone(city, player, budget, weather):
+    """
+    Calcula las celdas que el jugador alcanza en budget segundos de juego.
+
+    Cada movimiento tarda 1 / Player.calculate_speed con la resistencia que le
+    queda en ese momento y consume Player.get_stamina_cost. Como en
+    Player.can_move, no se puede mover estando exhausto ni con resistencia 0.
+    La recuperación durante el trayecto no se considera (estimación
+    conservadora). La búsqueda solo expande celdas dentro del presupuesto.
+
+    Returns:
+        Isochrone
+    """
+    width, height = city.width, city.height
+    blocked = city.blocked_mask
+    weights = city.weight_grid
+
+    origin = player.y * width + player.x
+    tile_speed = player.base_speed * player.get_weather_multiplier(weather)
+    stamina_cost = player.get_stamina_cost(weather)
+    stamina = player.stamina if player.can_move() else 0
+
+    factors = {}
+
+    def speed_factor(hops):
+        """Factor del jugador antes del movimiento número hops (0 si ya no puede)."""
+        factor = factors.get(hops)
+        if factor is None:
+            remaining = stamina - hops * stamina_cost
+            factor = player.get_speed_factor(remaining) if remaining > 0 else 0.0
+            factors[hops] = factor
+        return factor
+
+    # Etiquetas (tiempo, movimientos): llegar antes y con más resistencia domina
+    arrival = {}
+    min_hops = {}
+    heap = [(0.0, 0, origin)]
+    while heap:
+        time, hops, index = heapq.heappop(heap)
+        if hops >= min_hops.get(index, math.inf):
+            continue
+        min_hops[index] = hops
+        arrival.setdefault(index, time)
+
+        factor = speed_factor(hops)
+        if factor <= 0:
+            continue
+        for n in neighbors(index, width, height):
+            if blocked[n]:
+                continue
+            speed = tile_speed * factor * weights[n]
+            if speed <= 0:
+                continue
+            new_time = time + 1 / speed
+            if new_time <= budget and hops + 1 < min_hops.get(n, math.inf):
+                heapq.heappush(heap, (new_time, hops + 1, n))
+
+    xs = [i % width for i in arrival]
+    ys = [i // width for i in arrival]
+    x0, y0 = min(xs), min(ys)
+    box_width, box_height = max(xs) - x0 + 1, max(ys) - y0 + 1
+
+    mask = bytearray(box_width * box_height)
+    times = array('f', [math.inf]) * (box_width * box_height)
+    for index, time in arrival.items():
+        offset = (index // width - y0) * box_width + (index % width - x0)
+        mask[offset] = 1
+        times[offset] = time
+
+    return Isochrone((player.x, player.y), budget, x0, y0, box_width, box_height, mask, times)
@@ -0,0 +1,65 @@
+from src.config.config import GAME_START_DATETIME, PLAYER_BASE_SPEED
+from .order import deadline_seconds
+from .pathfinding import dijkstra_field
+from .travel_time import build_time_field
+
+# Cambiar si cambia el cálculo, para invalidar las anotaciones en caché
+ENRICHMENT_VERSION = 1
+
+ANNOTATION_FIELDS = ("route_cost", "min_travel_time", "latest_pickup_time", "feasible")
+
+
+def compute_annotations(city, jobs, game_start=GAME_START_DATETIME, base_speed=PLAYER_BASE_SPEED):
+    """
+    Calcula las anotaciones de todos los pedidos de una vez.
+
+    Por cada punto de recogida distinto se hace una sola búsqueda de costo y
+    otra de tiempo (clima despejado, sin penalizaciones del jugador) hacia
+    todo el mapa, y de ahí se leen todas sus entregas.
+
+    Returns:
+        dict: id del pedido -> {route_cost, min_travel_time,
+              latest_pickup_time, feasible}; los tiempos son segundos de
+              juego y los valores inalcanzables quedan en None
+    """
+    times = build_time_field(city, "clear", base_speed)
+    width = city.width
+
+    by_pickup = {}
+    for job in jobs:
+        by_pickup.setdefault(tuple(job["pickup"]), []).append(job)
+
+    annotations = {}
+    for pickup, group in by_pickup.items():
+        cost_field = dijkstra_field(city, pickup)
+        time_field = dijkstra_field(city, pickup, times)
+
+        for job in group:
+            x, y = job["dropoff"]
+            route_cost = cost_field[y * width + x]
+            travel_time = time_field[y * width + x]
+            reachable = route_cost != float("inf")
+
+            deadline = deadline_seconds(job.get("deadline"), game_start)
+            latest_pickup = None
+            feasible = reachable
+            if reachable and deadline is not None:
+                latest_pickup = deadline - travel_time
+                feasible = job.get("release_time", 0) <= latest_pickup
+
+            annotations[job.get("id")] = {
+                "route_cost": route_cost if reachable else None,
+                "min_travel_time": travel_time if reachable else None,
+                "latest_pickup_time": latest_pickup,
+                "feasible": feasible
+            }
+    return annotations
+
+
+def apply_annotations(jobs, annotations):
+    """Copia las anotaciones a cada pedido (dict). Retorna los pedidos."""
+    for job in jobs:
+        values = annotations.get(job.get("id"))
+        if values is not None:
+            job.update(values)
+    return jobs
@@ -0,0 +1,153 @@
+"""
+Lectura incremental de documentos JSON grandes.
+
+iter_json_array recorre un documento por bloques y entrega uno a uno los
+elementos de un arreglo (por ejemplo, los pedidos de pedidos.json o las filas
+de tiles de ciudad.json) sin cargar el texto completo ni el árbol entero en
+memoria. Cada elemento se decodifica con json.JSONDecoder.raw_decode.
+"""
+
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Buffer de texto que se rellena desde un archivo a medida que se consume."""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+
+    def fill(self):
+        """Lee un bloque más. Retorna False si el archivo terminó."""
+        if self.eof:
+            return False
+        chunk = ""
+        while not chunk:
+            raw = self.fp.read(self.chunk_size)
+            # Un carácter multibyte puede quedar partido entre bloques
+            chunk = self._decode(raw, final=not raw) if isinstance(raw, bytes) else raw
+            if not raw:
+                self.eof = True
+                if not chunk:
+                    return False
+        # Se descarta lo ya consumido para que el buffer no crezca
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Siguiente carácter que no es espacio ("" al final del archivo)."""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba {char!r} en la posición {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Un número al final del buffer puede estar cortado ("3e" o "0." se
+            # decodifican como 3 y 0 sin llegar al final del texto leído)
+            if (not self.eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buffer) or self.buffer[end] not in _DELIMITERS)
+                    and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(fp, path, rest=None, chunk_size=CHUNK_SIZE):
+    """
+    Itera los elementos del arreglo ubicado en path (tupla de claves).
+
+    Las claves de path que falten se saltan, así ("data", "tiles") encuentra
+    tanto {"data": {"tiles": [...]}} como {"tiles": [...]}; si el documento
+    es directamente un arreglo, se itera ese. Los demás valores del objeto
+    que contiene al arreglo se guardan en rest (dict), que queda completo al
+    terminar la iteración.
+
+    Args:
+        fp: archivo abierto (texto o binario UTF-8) o cualquier objeto con read()
+    """
+    reader = _Reader(fp, chunk_size)
+    found = yield from _walk(reader, tuple(path), rest)
+    if not found:
+        raise KeyError(f"No se encontró el arreglo {'/'.join(path)} en el documento.")
+
+
+def _walk(reader, path, rest):
+    char = reader.peek()
+    if char == "[":
+        yield from _iter_array(reader)
+        return True
+    if char != "{":
+        reader.value()
+        return False
+
+    reader.expect("{")
+    found = False
+    parent = False
+    siblings = {}
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if not found and key in path:
+            remaining = path[path.index(key) + 1:]
+            if remaining:
+                found = yield from _walk(reader, remaining, rest)
+            elif reader.peek() == "[":
+                yield from _iter_array(reader)
+                found = parent = True
+            else:
+                siblings[key] = reader.value()
+        else:
+            siblings[key] = reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+    reader.expect("}")
+
+    if parent and rest is not None:
+        rest.update(siblings)
+    return found
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"JSON inválido: se esperaba ',' o ']' en la posición {reader.pos - 1}")
@@ -0,0 +1,201 @@
+"""
+Formato binario compilado del mapa (.cqmap).
+
+Estructura del archivo:
+    MAGIC (8 bytes) | largo del encabezado (uint32) | encabezado JSON
+    | tile_grid (uint8) | blocked_mask (uint8) | weight_grid (float32)
+    | walkable_cells (int32)
+
+Los offsets de los planos se derivan del largo del encabezado y de las
+dimensiones; cada plano empieza alineado a 8 bytes para poder exponerlo con
+memoryview directamente sobre el mmap, sin copiar. El mismo formato se usa
+para compartir el mapa entre procesos (publish_shared / attach_shared).
+"""
+
+import json
+import mmap
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from .city import City
+
+MAGIC = b"CQMAP\x00\x01\x00"
+_PREFIX = struct.Struct("<8sI")
+_ALIGN = 8
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _plane_layout(header, header_length):
+    """Calcula (nombre, offset, largo en bytes, formato) de cada plano."""
+    cells = header["width"] * header["height"]
+    sizes = [
+        ("tile_grid", cells, 'B'),
+        ("blocked_mask", cells, 'B'),
+        ("weight_grid", cells * 4, 'f'),
+        ("walkable_cells", header["walkable_count"] * 4, 'i'),
+    ]
+    layout = []
+    offset = _align(_PREFIX.size + header_length)
+    for name, length, fmt in sizes:
+        layout.append((name, offset, length, fmt))
+        offset = _align(offset + length)
+    return layout, offset
+
+
+def _prepare(city, source_hash=None):
+    """Arma el encabezado y el layout. Retorna (encabezado, layout, tamaño total, planos)."""
+    header = {
+        "version": city.version,
+        "width": city.width,
+        "height": city.height,
+        "legend": city.legend,
+        "goal": city.goal,
+        "tile_chars": city.tile_chars[1:],
+        "min_surface_weight": city.min_surface_weight,
+        "walkable_count": len(city.walkable_cells),
+        "source_hash": source_hash
+    }
+    encoded_header = json.dumps(header).encode()
+    layout, total = _plane_layout(header, len(encoded_header))
+    planes = {
+        "tile_grid": city.tile_grid,
+        "blocked_mask": city.blocked_mask,
+        "weight_grid": city.weight_grid,
+        "walkable_cells": city.walkable_cells,
+    }
+    return encoded_header, layout, total, planes
+
+
+def _write_into(buffer, encoded_header, layout, planes):
+    _PREFIX.pack_into(buffer, 0, MAGIC, len(encoded_header))
+    buffer[_PREFIX.size:_PREFIX.size + len(encoded_header)] = encoded_header
+    for name, offset, length, _ in layout:
+        buffer[offset:offset + length] = bytes(planes[name])
+
+
+def encode_map(city, source_hash=None):
+    """Serializa la ciudad (encabezado y planos precalculados) a bytes."""
+    encoded_header, layout, total, planes = _prepare(city, source_hash)
+    buffer = bytearray(total)
+    _write_into(buffer, encoded_header, layout, planes)
+    return bytes(buffer)
+
+
+def write_map(path, city, source_hash=None):
+    """
+    Escribe la ciudad en formato binario compilado.
+
+    Se escribe a un archivo temporal y se reemplaza, así una ciudad que tenga
+    abierto el archivo anterior con mmap no ve datos a medio escribir.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_map(city, source_hash))
+    os.replace(tmp_path, path)
+
+
+def read_header(buffer):
+    """Lee el encabezado de un buffer en formato compilado (None si no es válido)."""
+    if len(buffer) < _PREFIX.size:
+        return None
+    magic, header_length = _PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        return None
+    raw = bytes(buffer[_PREFIX.size:_PREFIX.size + header_length])
+    header = json.loads(raw.decode())
+    header["header_length"] = header_length
+    return header
+
+
+def city_from_buffer(buffer, header=None, readonly=False):
+    """
+    Crea una City cuyas grillas son vistas directas (sin copia) sobre el buffer.
+
+    Con readonly las grillas no se pueden modificar (set_tile falla con TypeError).
+    """
+    header = header or read_header(buffer)
+    if header is None:
+        raise ValueError("El buffer no contiene un mapa compilado válido.")
+
+    layout, _ = _plane_layout(header, header["header_length"])
+    view = memoryview(buffer)
+    if readonly:
+        view = view.toreadonly()
+    planes = {
+        name: view[offset:offset + length].cast(fmt)
+        for name, offset, length, fmt in layout
+    }
+    return City.from_planes(header, **planes)
+
+
+def load_map(path, source_hash=None):
+    """
+    Abre un mapa compilado con mmap.
+
+    Returns:
+        City o None si el archivo no existe, no es válido o su source_hash
+        no coincide con el indicado.
+    """
+    try:
+        with open(path, 'rb') as f:
+            # ACCESS_COPY: lectura sin copia; las ediciones (set_tile) quedan en memoria
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+
+    header = read_header(buffer)
+    if header is None or (source_hash is not None and header.get("source_hash") != source_hash):
+        buffer.close()
+        return None
+
+    city = city_from_buffer(buffer, header)
+    city._buffer = buffer
+    return city
+
+
+def publish_shared(city, name=None):
+    """
+    Publica las grillas de la ciudad en memoria compartida (mismo formato que .cqmap).
+
+    Otros procesos la abren con attach_shared(shm.name) sin copiar nada. El
+    llamador es dueño del bloque: debe cerrarlo y liberarlo (close y unlink)
+    cuando ya no se use.
+
+    Returns:
+        SharedMemory
+    """
+    encoded_header, layout, total, planes = _prepare(city)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+    _write_into(shm.buf, encoded_header, layout, planes)
+    return shm
+
+
+def attach_shared(name):
+    """
+    Crea una City de solo lectura sobre un bloque publicado con publish_shared.
+
+    Las grillas son vistas sobre la memoria compartida: todos los procesos
+    comparten una sola copia del mapa. Los cachés derivados (rutas,
+    componentes) son propios de cada proceso.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: un proceso que no comparte el resource tracker del
+        # creador liberaría el bloque al salir
+        inherited = resource_tracker._resource_tracker._fd is not None
+        shm = shared_memory.SharedMemory(name=name)
+        if not inherited:
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+    header = read_header(shm.buf)
+    if header is None:
+        shm.close()
+        raise ValueError(f"El bloque {name} no contiene un mapa compilado válido.")
+
+    city = city_from_buffer(shm.buf, header, readonly=True)
+    city._shared = shm
+    return city
@@ -1,13 +1,68 @@
+import math
+import sys
+from datetime import datetime, timedelta
+from src.config.config import GAME_START_DATETIME
+
+
+def deadline_seconds(deadline, game_start=GAME_START_DATETIME):
+    """
+    Segundos de juego (desde game_start) de un deadline.
+
+    Acepta un string ISO, un datetime o un número que ya está en segundos.
+    Retorna None si no hay deadline.
+    """
+    if deadline is None or deadline == "":
+        return None
+    if isinstance(deadline, (int, float)):
+        return float(deadline)
+    if isinstance(deadline, str):
+        deadline = datetime.fromisoformat(deadline)
+    return (deadline - game_start).total_seconds()
+
+
 class Order:
-    def __init__(self, id, pickup, dropoff, payout, deadline, weight, priority, release_time):
-        self.id = id
+    """
+    Pedido compacto (con __slots__, sin __dict__ por instancia).
+
+    El deadline se convierte una sola vez a segundos de juego desde
+    GAME_START_DATETIME (deadline_seconds, inf si no tiene) y el id se
+    interna. Las anotaciones de job_enrichment se guardan si vienen.
+    """
+
+    __slots__ = ('id', 'pickup', 'dropoff', 'payout', 'deadline_seconds', 'weight', 'priority',
+                 'release_time', 'route_cost', 'min_travel_time', 'latest_pickup_time', 'feasible')
+
+    def __init__(self, id, pickup, dropoff, payout, deadline, weight, priority, release_time,
+                 route_cost=None, min_travel_time=None, latest_pickup_time=None, feasible=None):
+        self.id = sys.intern(id) if isinstance(id, str) else id
         self.pickup = pickup
         self.dropoff = dropoff
         self.payout = payout
-        self.deadline = deadline
+        seconds = deadline_seconds(deadline)
+        self.deadline_seconds = math.inf if seconds is None else seconds
         self.weight = weight
         self.priority = priority
         self.release_time = release_time
+        self.route_cost = route_cost
+        self.min_travel_time = min_travel_time
+        self.latest_pickup_time = latest_pickup_time
+        self.feasible = feasible
+
+    @property
+    def deadline(self):
+        """Deadline como string ISO (None si no tiene)."""
+        if math.isinf(self.deadline_seconds):
+            return None
+        return (GAME_START_DATETIME + timedelta(seconds=self.deadline_seconds)).isoformat()
+
+    def deadline_clock(self, seconds=False):
+        """Hora del deadline como "HH:MM" (o "HH:MM:SS"), sin pasar por datetime."""
+        if math.isinf(self.deadline_seconds):
+            return "--:--"
+        start = GAME_START_DATETIME
+        total = int(start.hour * 3600 + start.minute * 60 + start.second + self.deadline_seconds)
+        clock = f"{total // 3600 % 24:02d}:{total // 60 % 60:02d}"
+        return f"{clock}:{total % 60:02d}" if seconds else clock
 
     def __repr__(self):
         return f"Pedido({self.id} - Prio: {self.priority})"
@@ -23,5 +78,9 @@ class Order:
             deadline=data.get('deadline'),
             weight=data.get('weight'),
             priority=data.get('priority'),
-            release_time=data.get('release_time')
-        )
\ No newline at end of file
+            release_time=data.get('release_time'),
+            route_cost=data.get('route_cost'),
+            min_travel_time=data.get('min_travel_time'),
+            latest_pickup_time=data.get('latest_pickup_time'),
+            feasible=data.get('feasible')
+        )
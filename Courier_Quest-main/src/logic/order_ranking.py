@@ -0,0 +1,241 @@
+import heapq
+import math
+import time
+from src.config.config import WEATHER_MULTIPLIERS, PLAYER_BASE_SPEED
+from .pathfinding import FieldSearch, astar
+from .travel_time import TravelTimeRouter
+
+
+class OrderScore:
+    """Puntaje de un pedido para el repartidor (tiempos en segundos de juego)."""
+
+    __slots__ = ('order', 'travel_time', 'profit_per_second', 'slack', 'feasible')
+
+    def __init__(self, order, travel_time, profit_per_second, slack, feasible):
+        self.order = order
+        self.travel_time = travel_time
+        self.profit_per_second = profit_per_second
+        self.slack = slack
+        self.feasible = feasible
+
+    def sort_key(self):
+        return (self.feasible, self.profit_per_second, self.order.priority or 0, -self.slack)
+
+    def __repr__(self):
+        return f"OrderScore({self.order.id}: ${self.profit_per_second:.2f}/s, holgura {self.slack:.0f}s)"
+
+
+class OrderRanker:
+    """
+    Ranking de pedidos disponibles ("mejor siguiente pedido").
+
+    Los tiempos usan el campo de tiempos con clima despejado
+    (TravelTimeRouter.field("clear")). Repartidor -> recogida sale de un solo
+    campo desde la posición del repartidor, que se calcula por partes
+    (FieldSearch) dentro del presupuesto de cada rank. Mientras el repartidor
+    se mueve se usa el último campo terminado sumando la vuelta a su origen
+    (una cota superior, exacta al alcanzarlo) y, antes del primero, la
+    distancia Manhattan por el tile más rápido. Recogida -> entrega es la
+    anotación de job_enrichment o, si falta, una búsqueda A* por pedido hecha
+    también dentro del presupuesto (con la misma cota mientras tanto). La
+    memoria es un campo del tamaño del mapa sin importar cuántos pedidos
+    haya. El clima y el factor del jugador escalan todos los tiempos por igual.
+
+    Para cada pedido: profit_per_second = pago / (ir a recoger + entregar) y
+    slack = deadline - (ahora + ese tiempo). Los pedidos que no llegan a tiempo
+    o no caben quedan al final.
+
+    Las entradas siguen una sola lista de candidatos (la de
+    OrderManager.available_orders); los subconjuntos se filtran al leer el
+    ranking, no pasando otra lista.
+    """
+
+    def __init__(self, city, base_speed=PLAYER_BASE_SPEED, router=None):
+        self.city = city
+        # Un router propio se cierra junto con el ranker
+        self._own_router = router is None
+        self.router = router or TravelTimeRouter(city, base_speed)
+        self.base_speed = self.router.base_speed
+        self._revision = city.revision
+        # Último campo terminado desde el repartidor y búsqueda en curso
+        self._field = None
+        self._origin = None
+        self._current = False
+        self._search = None
+        self._generation = 0
+        # id -> [pedido, tiempo de entrega (None si falta buscarlo), cabe en el inventario]
+        self._entries = {}
+        self._unrouted = []
+        self._orders = None
+        self._scores = {}
+        self._score_key = None
+
+    @property
+    def pending(self):
+        """True si falta calcular el campo del repartidor o alguna entrega."""
+        return self._search is not None or bool(self._unrouted)
+
+    def rank(self, orders, position, now, weather="clear", speed_factor=1.0, capacity=math.inf, k=None,
+             budget_ms=None):
+        """
+        Puntúa los pedidos y retorna los k mejores (todos si k es None).
+
+        Args:
+            orders: pedidos candidatos (Order), p. ej. OrderManager.available_orders
+            position: (x, y) del repartidor
+            now: segundos de juego (la escala de Order.deadline_seconds)
+            speed_factor: Player.get_speed_factor()
+            capacity: peso que todavía cabe en el inventario
+            budget_ms: milisegundos para avanzar el campo del repartidor (None: terminarlo)
+
+        Returns:
+            list: OrderScore de mejor a peor
+        """
+        position = tuple(position)
+        self._sync(orders)
+        self._advance(position, budget_ms)
+        scale = WEATHER_MULTIPLIERS.get(weather, 1.0) * speed_factor
+
+        key = (position, scale, capacity, self._generation)
+        if key != self._score_key:
+            # Se movió, cambió la velocidad o terminó un campo: se releen los tiempos
+            self._scores = {}
+            self._score_key = key
+
+        scores = self._scores
+        for order_id, entry in self._entries.items():
+            score = scores.get(order_id)
+            if score is None:
+                score = self._score(entry, position, scale, capacity)
+                scores[order_id] = score
+            # La holgura solo cambia con el reloj
+            order = entry[0]
+            score.slack = order.deadline_seconds - (now + score.travel_time)
+            score.feasible = entry[2] and score.travel_time < math.inf and score.slack >= 0
+
+        if k is None:
+            return sorted(scores.values(), key=OrderScore.sort_key, reverse=True)
+        return heapq.nlargest(k, scores.values(), key=OrderScore.sort_key)
+
+    def clear(self):
+        """Descarta todos los cálculos guardados."""
+        self._field = None
+        self._origin = None
+        self._current = False
+        self._search = None
+        self._entries.clear()
+        self._unrouted = []
+        self._scores = {}
+        self._score_key = None
+        self._orders = None
+
+    def close(self):
+        """Descarta los cálculos y deja de seguir los cambios de la ciudad."""
+        self.clear()
+        if self._own_router:
+            self.router.close()
+
+    def _advance(self, position, budget_ms):
+        """Busca las entregas que faltan y sigue (o empieza) el campo desde el repartidor dentro de budget_ms."""
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        times, min_time = self.router.field("clear")
+        unrouted = self._unrouted
+        # Al menos una búsqueda por llamada, para avanzar aunque no sobre presupuesto
+        while unrouted:
+            entry = self._entries.get(unrouted.pop())
+            if entry is not None and entry[1] is None:
+                order = entry[0]
+                entry[1] = astar(self.city, tuple(order.pickup), tuple(order.dropoff), times, min_time)[1]
+                self._scores.pop(order.id, None)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        if unrouted:
+            return
+
+        if self._search is None:
+            if self._current and position == self._origin:
+                return
+            # Una búsqueda empezada se termina aunque el repartidor se mueva
+            self._search = FieldSearch(self.city, position, times)
+        if self._search.advance(deadline):
+            self._field, self._origin = self._search.field, self._search.source
+            self._current = True
+            self._search = None
+            self._generation += 1
+
+    def _sync(self, orders):
+        """Agrega o quita entradas según los candidatos actuales."""
+        entries = self._entries
+        if self.city.revision != self._revision:
+            # El campo del repartidor se rehace; hasta entonces se usa el anterior
+            self._revision = self.city.revision
+            self._current = False
+            self._search = None
+            self._scores = {}
+            self._score_key = None
+            for entry in entries.values():
+                self._set_delivery(entry)
+
+        # OrderManager mantiene la misma lista mientras no cambien los disponibles
+        if orders is self._orders:
+            return
+        self._orders = orders
+
+        current = {order.id: order for order in orders}
+        for order_id in [order_id for order_id in entries if order_id not in current]:
+            del entries[order_id]
+            self._scores.pop(order_id, None)
+        for order_id, order in current.items():
+            if order_id not in entries:
+                entries[order_id] = entry = [order, None, None]
+                self._set_delivery(entry)
+
+    def _score(self, entry, position, scale, capacity):
+        order, delivery = entry[0], entry[1]
+        if delivery is None:
+            delivery = self._estimate(order.pickup, order.dropoff)
+        to_pickup = self._to_pickup(position, order.pickup)
+        travel = (to_pickup + delivery) / scale if scale > 0 else math.inf
+        entry[2] = (order.weight or 0) <= capacity
+        if travel == 0:
+            profit = math.inf
+        elif math.isinf(travel):
+            profit = 0.0
+        else:
+            profit = (order.payout or 0) / travel
+        return OrderScore(order, travel, profit, math.inf, False)
+
+    def _to_pickup(self, position, pickup):
+        """Segundos (clima despejado) del repartidor a una recogida según el último campo."""
+        if self._field is None:
+            return self._estimate(position, pickup)
+        times = self.router.field("clear")[0]
+        width = self.city.width
+        x, y = position
+        px, py = pickup
+        field = self._field
+        cell = y * width + x
+        ox, oy = self._origin
+        origin = oy * width + ox
+        target = py * width + px
+        if cell == origin:
+            return field[target]
+        if math.isinf(field[cell]) or math.isinf(times[cell]):
+            return math.inf
+        # Vuelta al origen del campo: misma ruta que la ida, cambia qué extremo se paga
+        return field[cell] + times[origin] - times[cell] + field[target]
+
+    def _estimate(self, start, goal):
+        """Cota inferior: distancia Manhattan por el tile más rápido."""
+        steps = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+        return steps * self.router.field("clear")[1] if steps else 0.0
+
+    def _set_delivery(self, entry):
+        """Segundos (clima despejado, sin factores del jugador) de recogida a entrega, o a la cola de búsquedas."""
+        order = entry[0]
+        if order.feasible is not None:
+            # Anotado por job_enrichment con esa misma métrica
+            entry[1] = order.min_travel_time if order.min_travel_time is not None else math.inf
+        else:
+            entry[1] = None
+            self._unrouted.append(order.id)
@@ -0,0 +1,191 @@
+import math
+from src.config.config import (
+    ORDER_SELECTION_DP_CELLS, ORDER_SELECTION_EPSILON, ORDER_SELECTION_FPTAS_ITEMS,
+    ORDER_SELECTION_EXACT_ITEMS, ORDER_SELECTION_MAX_CHECKS
+)
+
+
+def select_orders(candidates, capacity, value=None, feasible=None, deliverable=None,
+                  dp_cells=ORDER_SELECTION_DP_CELLS, epsilon=ORDER_SELECTION_EPSILON,
+                  fptas_items=ORDER_SELECTION_FPTAS_ITEMS, exact_items=ORDER_SELECTION_EXACT_ITEMS,
+                  max_checks=ORDER_SELECTION_MAX_CHECKS):
+    """
+    Elige el subconjunto de pedidos de mayor pago que cabe en capacity (mochila 0/1).
+
+    - Pesos enteros y pocos estados (pedidos * capacidad <= dp_cells): DP
+      exacta por peso.
+    - Si no, hasta exact_items pedidos: ramificación y poda, también exacta.
+    - Si no, hasta fptas_items pedidos: DP por valor escalado, con pago al
+      menos (1 - epsilon) del óptimo.
+    - Más pedidos: greedy por pago/peso comparado con el mejor pedido solo
+      (al menos la mitad del óptimo).
+
+    Con deliverable, el conjunto elegido se valida entero; si no se puede
+    entregar a tiempo se rearma con sus max_checks pedidos de mayor pago,
+    sumando cada uno solo si el conjunto sigue siendo entregable.
+
+    Args:
+        value: pago esperado de cada pedido (por defecto order.payout)
+        feasible: filtro de pedidos que llegan a tiempo (p. ej. con OrderScore.feasible)
+        deliverable: recibe la lista elegida y dice si se puede entregar
+            completa a tiempo (p. ej. con el atraso de RouteOptimizer)
+
+    Returns:
+        list: pedidos elegidos, en el orden de candidates
+    """
+    if value is None:
+        value = lambda order: order.payout or 0
+    items = []
+    for order in candidates:
+        weight = order.weight or 0
+        payout = value(order)
+        if weight > capacity or payout <= 0:
+            continue
+        if feasible is not None and not feasible(order):
+            continue
+        items.append((order, weight, payout))
+
+    if not items:
+        return []
+    chosen = sorted(_solve(items, capacity, dp_cells, epsilon, fptas_items, exact_items))
+    orders = [items[i][0] for i in chosen]
+    if deliverable is None or not orders or deliverable(orders):
+        return orders
+
+    # Se rearma sumando de mayor a menor pago los que dejan el conjunto entregable
+    kept = []
+    for i in sorted(chosen, key=lambda i: items[i][2], reverse=True)[:max_checks]:
+        trial = sorted(kept + [i])
+        if deliverable([items[k][0] for k in trial]):
+            kept = trial
+    return [items[i][0] for i in kept]
+
+
+def _solve(items, capacity, dp_cells, epsilon, fptas_items, exact_items):
+    """Índices elegidos de items según el método que corresponde a su tamaño."""
+    if _integral(capacity) and all(_integral(weight) for _, weight, _ in items) \
+            and len(items) * (int(capacity) + 1) <= dp_cells:
+        return _dp_by_weight(items, int(capacity))
+    if len(items) <= exact_items:
+        return _branch_and_bound(items, capacity)
+    if len(items) <= fptas_items:
+        return _dp_by_value(items, capacity, epsilon)
+    return _greedy(items, capacity)
+
+
+def _integral(number):
+    return number != math.inf and float(number).is_integer()
+
+
+def _dp_by_weight(items, capacity):
+    """DP exacta: mejor pago por capacidad usada. O(n * capacidad)."""
+    best = [0.0] * (capacity + 1)
+    # keep[i] marca las capacidades donde conviene tomar el pedido i
+    keep = []
+    for _, weight, payout in items:
+        weight = int(weight)
+        taken = bytearray(capacity + 1)
+        for c in range(capacity, weight - 1, -1):
+            candidate = best[c - weight] + payout
+            if candidate > best[c]:
+                best[c] = candidate
+                taken[c] = 1
+        keep.append(taken)
+
+    chosen = []
+    c = capacity
+    for i in range(len(items) - 1, -1, -1):
+        if keep[i][c]:
+            chosen.append(i)
+            c -= int(items[i][1])
+    return chosen
+
+
+def _branch_and_bound(items, capacity):
+    """
+    Óptimo exacto con cualquier peso: búsqueda en profundidad por pago/peso,
+    podando con la cota de la mochila fraccionaria del resto.
+    """
+    order = sorted(range(len(items)), key=lambda i: items[i][2] / items[i][1] if items[i][1] else math.inf,
+                   reverse=True)
+    weights = [items[i][1] for i in order]
+    payouts = [items[i][2] for i in order]
+    n = len(order)
+    best_value = 0.0
+    best_set = []
+    taken = []
+
+    def bound(k, load, total):
+        room = capacity - load
+        for j in range(k, n):
+            if weights[j] <= room:
+                room -= weights[j]
+                total += payouts[j]
+            else:
+                return total + payouts[j] * room / weights[j]
+        return total
+
+    def visit(k, load, total):
+        nonlocal best_value, best_set
+        if total > best_value:
+            best_value, best_set = total, list(taken)
+        if k == n or bound(k, load, total) <= best_value:
+            return
+        if load + weights[k] <= capacity:
+            taken.append(order[k])
+            visit(k + 1, load + weights[k], total + payouts[k])
+            taken.pop()
+        visit(k + 1, load, total)
+
+    visit(0, 0, 0.0)
+    return best_set
+
+
+def _dp_by_value(items, capacity, epsilon):
+    """
+    DP por valor escalado (FPTAS): menor peso para cada pago redondeado.
+    O(n² / epsilon); el pago elegido es al menos (1 - epsilon) del óptimo.
+    """
+    top = max(payout for _, _, payout in items)
+    scale = epsilon * top / len(items)
+    values = [int(payout / scale) for _, _, payout in items]
+    total = sum(values)
+
+    lightest = [math.inf] * (total + 1)
+    lightest[0] = 0.0
+    keep = []
+    reach = 0
+    for (_, weight, _), v in zip(items, values):
+        taken = bytearray(total + 1)
+        for s in range(reach, -1, -1):
+            candidate = lightest[s] + weight
+            if candidate < lightest[s + v] and candidate <= capacity:
+                lightest[s + v] = candidate
+                taken[s + v] = 1
+        reach += v
+        keep.append(taken)
+
+    s = max(s for s in range(total + 1) if lightest[s] <= capacity)
+    chosen = []
+    for i in range(len(items) - 1, -1, -1):
+        if keep[i][s]:
+            chosen.append(i)
+            s -= values[i]
+    return chosen
+
+
+def _greedy(items, capacity):
+    """Greedy por pago/peso, o el mejor pedido solo si paga más (1/2-aproximación)."""
+    order = sorted(range(len(items)), key=lambda i: items[i][2] / items[i][1] if items[i][1] else math.inf,
+                   reverse=True)
+    chosen, load, total = [], 0, 0.0
+    for i in order:
+        weight = items[i][1]
+        if load + weight <= capacity:
+            chosen.append(i)
+            load += weight
+            total += items[i][2]
+    best_single = max(range(len(items)), key=lambda i: items[i][2])
+    if items[best_single][2] > total:
+        return [best_single]
+    return chosen
@@ -0,0 +1,293 @@
+import heapq
+import math
+import time
+from array import array
+
+
+def neighbors(index, width, height):
+    """Retorna los índices vecinos (4 direcciones) de una celda plana."""
+    x = index % width
+    result = []
+    if x > 0:
+        result.append(index - 1)
+    if x < width - 1:
+        result.append(index + 1)
+    if index >= width:
+        result.append(index - width)
+    if index < width * (height - 1):
+        result.append(index + width)
+    return result
+
+
+def astar(city, start, goal, weights=None, min_weight=None):
+    """
+    Busca la ruta más corta entre dos posiciones con A*.
+
+    El costo de entrar a un tile es su surface_weight (o el valor de weights,
+    si se indica, con min_weight como cota para la heurística); los tiles
+    bloqueados no se pueden atravesar.
+
+    Returns:
+        tuple: (ruta como tupla de (x, y), costo total) o (None, inf) si no hay ruta
+    """
+    sx, sy = start
+    gx, gy = goal
+    if city.is_blocked(sx, sy) or city.is_blocked(gx, gy):
+        return None, math.inf
+
+    width, height = city.width, city.height
+    blocked = city.blocked_mask
+    if weights is None:
+        weights = city.weight_grid
+        min_weight = city.min_surface_weight
+    h_scale = min_weight or 0.0
+
+    source = sy * width + sx
+    target = gy * width + gx
+
+    best = {source: 0.0}
+    came_from = {}
+    open_heap = [(h_scale * (abs(sx - gx) + abs(sy - gy)), 0.0, source)]
+
+    while open_heap:
+        _, cost, index = heapq.heappop(open_heap)
+        if index == target:
+            return _reconstruct(came_from, target, width), cost
+        if cost > best[index]:
+            continue
+
+        for n in neighbors(index, width, height):
+            if blocked[n]:
+                continue
+            new_cost = cost + weights[n]
+            if new_cost < best.get(n, math.inf):
+                best[n] = new_cost
+                came_from[n] = index
+                nx, ny = n % width, n // width
+                estimate = new_cost + h_scale * (abs(nx - gx) + abs(ny - gy))
+                heapq.heappush(open_heap, (estimate, new_cost, n))
+
+    return None, math.inf
+
+
+def _reconstruct(came_from, target, width):
+    """Reconstruye la ruta desde el diccionario de predecesores."""
+    path = [target]
+    while path[-1] in came_from:
+        path.append(came_from[path[-1]])
+    path.reverse()
+    return tuple((i % width, i // width) for i in path)
+
+
+def dijkstra_field(city, source, weights=None):
+    """
+    Calcula el costo mínimo desde una posición hacia todo el mapa.
+
+    weights reemplaza opcionalmente el surface_weight como costo de entrada.
+
+    Returns:
+        array('f'): costo por celda plana (inf si no es alcanzable)
+    """
+    width, height = city.width, city.height
+    dist = [math.inf] * (width * height)
+
+    sx, sy = source
+    if not city.is_blocked(sx, sy):
+        blocked = city.blocked_mask
+        if weights is None:
+            weights = city.weight_grid
+        start = sy * width + sx
+        dist[start] = 0.0
+        heap = [(0.0, start)]
+
+        while heap:
+            cost, index = heapq.heappop(heap)
+            if cost > dist[index]:
+                continue
+            for n in neighbors(index, width, height):
+                if blocked[n]:
+                    continue
+                new_cost = cost + weights[n]
+                if new_cost < dist[n]:
+                    dist[n] = new_cost
+                    heapq.heappush(heap, (new_cost, n))
+
+    return array('f', dist)
+
+
+class FieldSearch:
+    """
+    dijkstra_field que se avanza por partes (unos milisegundos por cuadro).
+
+    field queda en None hasta que la búsqueda termina; weights no debería
+    cambiar mientras tanto (si cambia, se empieza otra búsqueda).
+    """
+
+    def __init__(self, city, source, weights=None):
+        self.city = city
+        self.source = tuple(source)
+        self.weights = city.weight_grid if weights is None else weights
+        self.field = None
+        self._dist = [math.inf] * (city.width * city.height)
+        self._heap = []
+        sx, sy = source
+        if not city.is_blocked(sx, sy):
+            start = sy * city.width + sx
+            self._dist[start] = 0.0
+            self._heap.append((0.0, start))
+
+    def advance(self, deadline=None):
+        """
+        Sigue la búsqueda hasta terminarla o hasta deadline (time.perf_counter()).
+
+        Returns:
+            bool: True si el campo está completo
+        """
+        if self.field is not None:
+            return True
+        city = self.city
+        width, height = city.width, city.height
+        blocked = city.blocked_mask
+        weights, dist, heap = self.weights, self._dist, self._heap
+        pops = 0
+
+        while heap:
+            pops += 1
+            if deadline is not None and not pops & 63 and time.perf_counter() > deadline:
+                return False
+            cost, index = heapq.heappop(heap)
+            if cost > dist[index]:
+                continue
+            for n in neighbors(index, width, height):
+                if blocked[n]:
+                    continue
+                new_cost = cost + weights[n]
+                if new_cost < dist[n]:
+                    dist[n] = new_cost
+                    heapq.heappush(heap, (new_cost, n))
+
+        self.field = array('f', dist)
+        self._dist = None
+        return True
+
+
+def dijkstra_to(city, source, targets, weights=None, deadline=None):
+    """
+    Costo mínimo desde una posición hasta algunas celdas.
+
+    Es dijkstra_field acotado: se detiene al fijar la última meta, así solo
+    se recorre el mapa hasta la más lejana.
+
+    Args:
+        targets: celdas planas (y * width + x)
+        deadline: instante de time.perf_counter() en que se abandona la búsqueda
+
+    Returns:
+        dict: celda -> costo (inf si no es alcanzable); si se alcanzó el
+        deadline solo trae las metas ya fijadas
+    """
+    result = {cell: math.inf for cell in targets}
+    sx, sy = source
+    if not result or city.is_blocked(sx, sy):
+        return result
+
+    width, height = city.width, city.height
+    blocked = city.blocked_mask
+    if weights is None:
+        weights = city.weight_grid
+    start = sy * width + sx
+    dist = [math.inf] * (width * height)
+    dist[start] = 0.0
+    heap = [(0.0, start)]
+    remaining = len(result)
+    settled = set()
+    pops = 0
+
+    while heap:
+        cost, index = heapq.heappop(heap)
+        if cost > dist[index]:
+            continue
+        pops += 1
+        if deadline is not None and not pops & 63 and time.perf_counter() > deadline:
+            return {cell: result[cell] for cell in settled}
+        if index in result:
+            settled.add(index)
+            result[index] = cost
+            remaining -= 1
+            if not remaining:
+                break
+        for n in neighbors(index, width, height):
+            if blocked[n]:
+                continue
+            new_cost = cost + weights[n]
+            if new_cost < dist[n]:
+                dist[n] = new_cost
+                heapq.heappush(heap, (new_cost, n))
+
+    return result
+
+
+def repair_field(city, field, source, cells, weights=None):
+    """
+    Corrige en su lugar un campo de dijkstra_field tras cambiar algunos tiles.
+
+    Solo se recalculan las celdas cuya ruta mínima pasaba por un tile cambiado
+    (su subárbol en el árbol de rutas) y las que mejoran desde ahí; el resto
+    del campo se conserva. weights (si el campo se calculó con otros costos)
+    ya debe tener los valores nuevos.
+
+    Returns:
+        int: cantidad de celdas recalculadas
+    """
+    width, height = city.width, city.height
+    blocked = city.blocked_mask
+    if weights is None:
+        weights = city.weight_grid
+    start = source[1] * width + source[0]
+
+    def tight(parent, child):
+        # El campo es float32: se tolera el redondeo (marcar de más es seguro)
+        expected = field[parent] + weights[child]
+        return abs(field[child] - expected) <= 1e-4 * max(1.0, expected)
+
+    # Celdas que dependían de un tile cambiado
+    stale = set()
+    queue = [y * width + x for x, y in cells if y * width + x != start]
+    stale.update(queue)
+    while queue:
+        index = queue.pop()
+        if math.isinf(field[index]):
+            continue
+        for n in neighbors(index, width, height):
+            if n not in stale and n != start and not math.isinf(field[n]) and tight(index, n):
+                stale.add(n)
+                queue.append(n)
+
+    for index in stale:
+        field[index] = math.inf
+
+    # Se siembra desde el borde intacto y se propaga con Dijkstra
+    heap = []
+    for index in stale:
+        if blocked[index]:
+            continue
+        best = min((field[n] for n in neighbors(index, width, height)
+                    if n not in stale and not blocked[n]), default=math.inf)
+        if not math.isinf(best):
+            field[index] = best + weights[index]
+            heap.append((field[index], index))
+    heapq.heapify(heap)
+
+    while heap:
+        cost, index = heapq.heappop(heap)
+        if cost > field[index]:
+            continue
+        for n in neighbors(index, width, height):
+            if blocked[n] or n == start:
+                continue
+            new_cost = cost + weights[n]
+            if new_cost < field[n]:
+                field[n] = new_cost
+                heapq.heappush(heap, (field[n], n))
+
+    return len(stale)
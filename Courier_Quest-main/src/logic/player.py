@@ -3,9 +3,11 @@ from src.config.config import (
     WEATHER_MULTIPLIERS, REP_BONUS_EARLY, REP_BONUS_ON_TIME,
     REP_PENALTY_SLIGHTLY_LATE, REP_PENALTY_LATE, REP_PENALTY_VERY_LATE,
     REP_BONUS_STREAK, REP_PENALTY_CANCEL_ORDER, ORDER_BASE_TIME_SECONDS,
-    STAMINA_RECOVERY_AT_POINT, STAMINA_RECOVERY_RESTING, STAMINA_EXHAUSTED_THRESHOLD
+    STAMINA_RECOVERY_AT_POINT, STAMINA_RECOVERY_RESTING, STAMINA_EXHAUSTED_THRESHOLD,
+    PLAYER_BASE_SPEED
 )
 from .inventory import Inventory
+from .order import deadline_seconds
 
 
 class Player:
@@ -22,7 +24,7 @@ class Player:
         self.total_income = 0
         self.is_exhausted = False
 
-        self.base_speed = 3
+        self.base_speed = PLAYER_BASE_SPEED
         self.stamina_consumption_base = 0.5
         
         self.deliveries_streak = 0
@@ -36,26 +38,36 @@ class Player:
         """Obtiene multiplicador de clima."""
         return WEATHER_MULTIPLIERS.get(weather_condition, 1.0)
 
-    def calculate_speed(self, weather_condition, surface_weight_tile):
-        """Calcula velocidad actual del jugador."""
+    def get_speed_factor(self, stamina=None):
+        """
+        Multiplicador de velocidad propio del jugador (peso, reputación y resistencia).
+
+        Con stamina se evalúa para ese nivel de resistencia en vez del actual.
+        """
+        if stamina is None:
+            stamina = self.stamina
         total_weight = self.get_total_weight()
-        m_weather = self.get_weather_multiplier(weather_condition)
         m_weight = max(0.8, 1 - 0.03 * total_weight)
         m_rep = 1.03 if self.reputation >= 90 else 1.0
 
-        if self.stamina <= 0:
+        if stamina <= 0:
             m_stamina = 0.0
-        elif self.stamina < STAMINA_EXHAUSTED_THRESHOLD:
+        elif stamina < STAMINA_EXHAUSTED_THRESHOLD:
             m_stamina = 0.8
         else:
             m_stamina = 1.0
 
-        speed = (self.base_speed * m_weather * m_weight *
-                m_rep * m_stamina * surface_weight_tile)
+        return m_weight * m_rep * m_stamina
+
+    def calculate_speed(self, weather_condition, surface_weight_tile):
+        """Calcula velocidad actual del jugador."""
+        m_weather = self.get_weather_multiplier(weather_condition)
+        speed = (self.base_speed * m_weather * self.get_speed_factor() *
+                surface_weight_tile)
         return speed
 
-    def consume_stamina(self, weather_condition):
-        """Calcula y consume resistencia por movimiento."""
+    def get_stamina_cost(self, weather_condition):
+        """Resistencia que consume un movimiento con el peso y clima actuales."""
         total_weight = self.get_total_weight()
         consumption = self.stamina_consumption_base
 
@@ -68,7 +80,12 @@ class Player:
             consumption += 0.3
         elif weather_condition == "heat":
             consumption += 0.2
-        
+
+        return consumption
+
+    def consume_stamina(self, weather_condition):
+        """Calcula y consume resistencia por movimiento."""
+        consumption = self.get_stamina_cost(weather_condition)
         self.stamina = max(0, self.stamina - consumption)
 
         if self.stamina <= 0:
@@ -96,13 +113,19 @@ class Player:
             return False
 
     def complete_delivery(self, current_time):
-        """Completa entrega actual y actualiza reputación/ingresos."""
+        """
+        Completa entrega actual y actualiza reputación/ingresos.
+
+        current_time son los segundos de juego desde GAME_START_DATETIME (o un
+        datetime, que se convierte).
+        """
         if self.inventory.current_order is None:
             return None
 
         order = self.inventory.current_order.order
-        deadline = datetime.fromisoformat(order.deadline)
-        time_diff = (deadline - current_time).total_seconds()
+        if isinstance(current_time, datetime):
+            current_time = deadline_seconds(current_time)
+        time_diff = order.deadline_seconds - current_time
 
         rep_change = 0
         if time_diff >= 0:
@@ -146,6 +169,21 @@ class Player:
             'rep_change': rep_change
         }
 
+    def check_deadlines(self, now):
+        """
+        Revisa los deadlines de los pedidos que lleva (now en segundos de juego).
+
+        Los pedidos con más de ORDER_EXPIRY_GRACE_SECONDS de atraso se
+        descartan con REP_PENALTY_VERY_LATE. Retorna la lista de (etapa, pedido).
+        """
+        events = self.inventory.check_deadlines(now)
+        for stage, order in events:
+            if stage == "expired":
+                self.inventory.remove_order(order.id)
+                self.reputation = max(0, min(100, self.reputation + REP_PENALTY_VERY_LATE))
+                self.deliveries_streak = 0
+        return events
+
     def cancel_order(self):
         """Cancela pedido actual."""
         if self.inventory.current_order:
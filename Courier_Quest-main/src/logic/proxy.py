@@ -1,27 +1,72 @@
 import requests
+import hashlib
 import json
+import os
+import re
+import shutil
 from pathlib import Path
 import src.config.config as config
 from .weather import Weather
+from .city import City
+from .chunked_city import ChunkedCity, read_meta, write_chunks
+from .distance_oracle import DistanceOracle
+from .map_format import load_map, write_map
+from .job_enrichment import ENRICHMENT_VERSION, compute_annotations, apply_annotations
+from .json_stream import CHUNK_SIZE, iter_json_array
+
+
+def city_slug(url):
+    """Nombre de carpeta seguro para la URL de una ciudad."""
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", url.split("://", 1)[-1]).strip("_")[:40]
+    return f"{slug}_{hashlib.sha1(url.encode()).hexdigest()[:8]}"
+
+
+def _item_id(item):
+    """id de un elemento del feed (None si no tiene)."""
+    return item.get("id") if isinstance(item, dict) else None
+
+
+class _TeeReader:
+    """Archivo de solo lectura que copia a out todo lo que se lee."""
+
+    def __init__(self, raw, out):
+        self.raw = raw
+        self.out = out
+
+    def read(self, size=-1):
+        chunk = self.raw.read(size)
+        self.out.write(chunk)
+        return chunk
 
 
 class Proxy:
-    """Singleton proxy para manejar peticiones al API."""
+    """
+    Proxy para manejar peticiones al API.
+    
+    Hay una instancia por URL de ciudad (config.URL por defecto); cada ciudad
+    extra guarda su caché en api_cache/<slug de la URL>.
+    """
     
-    _instance = None
+    _instances = {}
 
-    def __new__(cls):
-        if not cls._instance:
-            cls._instance = super(Proxy, cls).__new__(cls)
-        return cls._instance
+    def __new__(cls, base_url=None):
+        base_url = base_url or config.URL
+        if base_url not in cls._instances:
+            cls._instances[base_url] = super(Proxy, cls).__new__(cls)
+        return cls._instances[base_url]
 
-    def __init__(self):
+    def __init__(self, base_url=None):
         if hasattr(self, '_initialized'):
             return
         
-        self.base_url = config.URL
+        self.base_url = base_url or config.URL
         self.offline = False
-        Path("api_cache").mkdir(exist_ok=True)
+        self.last_jobs_report = {"relocated": [], "dropped": []}
+        self._unsaved_oracle = None
+        self.cache_dir = Path("api_cache")
+        if self.base_url != config.URL:
+            self.cache_dir = self.cache_dir / city_slug(self.base_url)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
         Path("data").mkdir(exist_ok=True)
         
         try:
@@ -38,15 +83,94 @@ class Proxy:
     def _load_cache(self, filename):
         """Carga datos desde caché."""
         try:
-            with open(f"api_cache/{filename}", 'r') as f:
+            with open(self.cache_dir / filename, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
             with open(f"data/{filename}", 'r') as f:
                 return json.load(f)
 
+    def _open_cache(self, filename):
+        """Abre (en binario) el archivo que leería _load_cache."""
+        try:
+            return open(self.cache_dir / filename, 'rb')
+        except FileNotFoundError:
+            return open(f"data/{filename}", 'rb')
+
+    def _stream_json(self, endpoint, filename, path, rest=None):
+        """
+        Itera el arreglo en path de un documento del API sin cargarlo entero.
+        
+        En línea, la respuesta se va guardando en caché mientras se parsea; si
+        el API no responde se lee el archivo en caché, también por bloques.
+        Si la conexión se corta a mitad de la respuesta, se sigue desde el
+        caché saltando los ids ya entregados (el caché puede traer otro orden
+        u otros pedidos); si algún elemento no tiene id no se puede retomar y
+        se lanza ValueError.
+        """
+        delivered = set()
+        anonymous = False
+        if not self.offline:
+            try:
+                result = requests.get(f"{self.base_url}{endpoint}", timeout=5, stream=True)
+            except requests.RequestException:
+                result = None
+            if result is not None and result.status_code == 200:
+                result.raw.decode_content = True
+                tmp_path = self.cache_dir / f"{filename}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as out:
+                        for item in iter_json_array(_TeeReader(result.raw, out), path, rest):
+                            key = _item_id(item)
+                            if key is None:
+                                anonymous = True
+                            else:
+                                delivered.add(key)
+                            yield item
+                    os.replace(tmp_path, self.cache_dir / filename)
+                    return
+                except Exception as e:
+                    # Los errores de lectura del cuerpo vienen de urllib3, no de requests
+                    if anonymous:
+                        raise ValueError(f"Se cortó la descarga de {endpoint} y no se puede retomar desde el caché") from e
+                    print(f"Se cortó la descarga de {endpoint} ({e}); se sigue desde el caché.")
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+
+        with self._open_cache(filename) as f:
+            for item in iter_json_array(f, path, rest):
+                if delivered and _item_id(item) in delivered:
+                    continue
+                yield item
+
+    def _download(self, endpoint, filename):
+        """Descarga un documento del API directo al caché, por bloques. Retorna True si se pudo."""
+        if self.offline:
+            return False
+        try:
+            result = requests.get(f"{self.base_url}{endpoint}", timeout=5, stream=True)
+            if result.status_code != 200:
+                return False
+            tmp_path = self.cache_dir / f"{filename}.tmp"
+            with open(tmp_path, 'wb') as out:
+                for chunk in result.iter_content(CHUNK_SIZE):
+                    out.write(chunk)
+        except requests.RequestException:
+            return False
+        os.replace(tmp_path, self.cache_dir / filename)
+        return True
+
+    def _cache_file_hash(self, filename):
+        """Hash del archivo en caché que leería _load_cache (None si no existe)."""
+        for path in (self.cache_dir / filename, Path("data") / filename):
+            try:
+                return hashlib.sha1(path.read_bytes()).hexdigest()
+            except FileNotFoundError:
+                continue
+        return None
+
     def _save_cache(self, filename, data):
         """Guarda datos en caché."""
-        with open(f"api_cache/{filename}", 'w') as f:
+        with open(self.cache_dir / filename, 'w') as f:
             json.dump(data, f, indent=2)
 
     def get_weather(self):
@@ -87,54 +211,326 @@ class Proxy:
         
         return data.get("data", data)
 
-    def get_jobs(self):
-        """Obtiene datos de pedidos y valida posiciones."""
-        if not self.offline:
-            try:
-                result = requests.get(f"{self.base_url}city/jobs", timeout=5)
-                if result.status_code == 200:
-                    data = result.json()
-                    self._save_cache("pedidos.json", data)
-                else:
-                    data = self._load_cache("pedidos.json")
-            except requests.RequestException:
-                data = self._load_cache("pedidos.json")
+    def get_city(self, refresh=True):
+        """
+        Obtiene la ciudad desde el mapa compilado (mmap) si está al día con el JSON.
+
+        Los mapas de CHUNKED_CITY_MIN_CELLS celdas o más se abren como
+        ChunkedCity (chunks en disco) en vez de compilarse. Con refresh=False
+        no se consulta el API (el caché ya se preparó, p. ej. en el proceso de
+        precarga).
+        """
+        # La descarga actualiza el JSON en caché; el compilado se valida contra él
+        if refresh:
+            self._download("city/map", "ciudad.json")
+
+        binary_path = self.cache_dir / "ciudad.cqmap"
+        source_hash = self._cache_file_hash("ciudad.json")
+        city = load_map(binary_path, source_hash) if source_hash else None
+        if city is None and source_hash:
+            chunked = self._load_chunked(source_hash)
+            if chunked is not None:
+                return chunked
+
+        if city is None:
+            # Solo se parsea el JSON cuando el mapa cambió (una vez por versión),
+            # fila por fila
+            meta = {}
+            with self._open_cache("ciudad.json") as f:
+                city = City.from_rows(iter_json_array(f, ("data", "tiles"), meta), meta)
+            write_map(binary_path, city, source_hash)
+            city = load_map(binary_path)
+            # Los parches anotados eran para el compilado anterior
+            self._patch_log_path().unlink(missing_ok=True)
         else:
-            data = self._load_cache("pedidos.json")
+            self._replay_patches(city, source_hash)
+
+        return city
+
+    def _load_chunked(self, source_hash):
+        """
+        Abre el mapa por chunks si es grande (None si no lo es).
+
+        Los chunks se reutilizan mientras correspondan al mismo JSON; si no, se
+        escriben de nuevo leyendo el JSON fila por fila.
+        """
+        directory = self.cache_dir / "ciudad_chunks"
+        memory_budget = config.CHUNKED_CITY_MEMORY_BUDGET_MB * 1024 * 1024
+        meta = read_meta(directory)
+        if meta is not None and meta.get("source_hash") == source_hash:
+            return ChunkedCity(directory, memory_budget)
+
+        with self._open_cache("ciudad.json") as f:
+            # Cada celda ocupa al menos un byte del JSON: un archivo chico no es un mapa grande
+            if os.fstat(f.fileno()).st_size < config.CHUNKED_CITY_MIN_CELLS:
+                return None
+            # El ancho y alto pueden venir después de las filas: una pasada para leerlos
+            header = {}
+            for _ in iter_json_array(f, ("data", "tiles"), header):
+                pass
+            if header.get("width", 0) * header.get("height", 0) < config.CHUNKED_CITY_MIN_CELLS:
+                return None
+
+            shutil.rmtree(directory, ignore_errors=True)
+            f.seek(0)
+            write_chunks(directory, header, iter_json_array(f, ("data", "tiles")),
+                         config.CITY_CHUNK_SIZE, source_hash)
+        # Los parches anotados eran para el mapa anterior
+        self._patch_log_path().unlink(missing_ok=True)
+        return ChunkedCity(directory, memory_budget)
+
+    def _patch_log_path(self):
+        return self.cache_dir / "ciudad.patches"
+
+    def _replay_patches(self, city, source_hash):
+        """
+        Reaplica sobre el mapa compilado los parches anotados desde que se compiló.
+
+        Si el registro creció más de MAP_PATCH_LOG_LIMIT parches o tiene una
+        línea inválida (escritura cortada), se recompila el mapa ya parchado
+        y se vacía el registro.
+        """
+        path = self._patch_log_path()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        compact = len(lines) > config.MAP_PATCH_LOG_LIMIT
+        for line in lines:
+            try:
+                city.apply_patch(json.loads(line))
+            except (ValueError, IndexError) as e:
+                print(f"Registro de parches del mapa inválido, se descarta el resto: {e}")
+                compact = True
+                break
+
+        if compact:
+            write_map(self.cache_dir / "ciudad.cqmap", city, source_hash)
+            path.unlink(missing_ok=True)
+
+    def get_map_patch(self, since_version):
+        """
+        Obtiene los cambios de tiles desde una versión del mapa.
+
+        Returns:
+            dict con "version" y "changes", o None si no hay parche (offline,
+            error del API o el mapa no cambió)
+        """
+        if self.offline:
+            return None
+        try:
+            result = requests.get(f"{self.base_url}city/map/patch",
+                                  params={"since": since_version}, timeout=5)
+        except requests.RequestException:
+            return None
+        if result.status_code != 200:
+            return None
         
-        jobs = data.get("data", data)
+        try:
+            patch = result.json()
+        except ValueError:
+            return None
+        patch = patch.get("data", patch)
+        if not patch.get("changes"):
+            return None
+        patch.setdefault("base_version", since_version)
+        return patch
+
+    def apply_map_patch(self, city, patch, oracle=None):
+        """
+        Aplica un parche de tiles a la ciudad y lo anota en el caché.
+        
+        La ciudad y sus estructuras derivadas (y el oráculo, si se indica) se
+        reparan solo en las regiones cambiadas; no se reconstruye nada. En
+        disco solo se agrega el parche al registro que get_city reaplica sobre
+        el mapa compilado (una ChunkedCity escribe sus chunks modificados); el
+        oráculo se guarda después con save_oracle.
+        
+        Returns:
+            list: (x, y, costo anterior) de las celdas cuyo costo cambió
+        """
+        base_version = city.version
+        applied = city.apply_patch(patch)
+
+        if isinstance(city, ChunkedCity):
+            # Los chunks en disco ya son el caché: basta con escribir los modificados
+            city.flush()
+            if oracle is not None:
+                self._unsaved_oracle = oracle
+            return applied
+
+        entry = {"base_version": base_version, "version": city.version, "changes": patch["changes"]}
+        with open(self._patch_log_path(), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+        if oracle is not None:
+            self._unsaved_oracle = oracle
+        return applied
+
+    def save_oracle(self):
+        """Guarda el oráculo reparado por apply_map_patch (al salir o al dejar la ciudad)."""
+        oracle = self._unsaved_oracle
+        if oracle is None:
+            return False
+        self._unsaved_oracle = None
+        oracle.save(self._oracle_path(oracle.city))
+        return True
+
+    def get_jobs(self, city=None):
+        """
+        Obtiene datos de pedidos y valida posiciones.
         
-        # Validar y corregir posiciones de pedidos
-        map_data = self.get_map()
-        from .city import City
-        city = City(map_data)
+        Sigue siendo la carga por defecto (config.STREAM_JOBS): deja la lista
+        completa, anotada con caché, que prepare_city entrega desde el proceso
+        de fondo y de la que el oráculo toma sus fuentes. iter_jobs queda para
+        feeds que no conviene tener enteros antes de jugar.
+        """
+        # Se parsea por bloques y la clave del caché de anotaciones se calcula
+        # pedido a pedido: nunca están en memoria el texto ni un volcado del feed
+        digest = hashlib.sha1()
+        jobs = []
+        for job in self._stream_json("city/jobs", "pedidos.json", ("data",)):
+            digest.update(json.dumps(job, sort_keys=True).encode())
+            digest.update(b"\n")
+            jobs.append(job)
         
+        if city is None:
+            city = self.get_city()
+        
+        self._snap_positions(city, jobs)
+        jobs, self.last_jobs_report = self._repair_unreachable(city, jobs)
+        return self._enrich_jobs(city, jobs, digest)
+    
+    def iter_jobs(self, city, batch_size=config.JOB_STREAM_BATCH):
+        """
+        Entrega los pedidos en lotes a medida que se leen del feed.
+        
+        Cada lote sale validado, reubicado y anotado como en get_jobs (sin el
+        caché de anotaciones, que depende del feed completo), así los pedidos
+        se pueden usar antes de terminar de leer el resto. El reporte de
+        reubicados/descartados se acumula en last_jobs_report.
+        """
+        self.last_jobs_report = {"relocated": [], "dropped": []}
+        batch = []
+        for job in self._stream_json("city/jobs", "pedidos.json", ("data",)):
+            batch.append(job)
+            if len(batch) >= batch_size:
+                yield self._prepare_batch(city, batch)
+                batch = []
+        if batch:
+            yield self._prepare_batch(city, batch)
+    
+    def _prepare_batch(self, city, jobs):
+        self._snap_positions(city, jobs)
+        jobs, report = self._repair_unreachable(city, jobs)
+        self.last_jobs_report["relocated"].extend(report["relocated"])
+        self.last_jobs_report["dropped"].extend(report["dropped"])
+        return apply_annotations(jobs, compute_annotations(city, jobs))
+    
+    def _snap_positions(self, city, jobs):
+        """Valida y corrige posiciones de pedidos con el índice de caminables."""
+        positions = []
         for job in jobs:
-            pickup = job.get("pickup", [0, 0])
-            dropoff = job.get("dropoff", [0, 0])
-            
-            # Si pickup está bloqueado, buscar posición válida cercana
-            if city.is_blocked(pickup[0], pickup[1]):
-                job["pickup"] = self._find_nearby_walkable(city, pickup[0], pickup[1])
-            
-            # Si dropoff está bloqueado, buscar posición válida cercana
-            if city.is_blocked(dropoff[0], dropoff[1]):
-                job["dropoff"] = self._find_nearby_walkable(city, dropoff[0], dropoff[1])
-        
-        return jobs
+            positions.append(job.get("pickup", [0, 0]))
+            positions.append(job.get("dropoff", [0, 0]))
+        corrected = city.nearest_walkable_many(positions)
+        
+        for i, job in enumerate(jobs):
+            pickup, dropoff = corrected[2 * i], corrected[2 * i + 1]
+            if pickup != list(positions[2 * i]):
+                job["pickup"] = pickup
+            if dropoff != list(positions[2 * i + 1]):
+                job["dropoff"] = dropoff
+    
+    def _enrich_jobs(self, city, jobs, digest):
+        """
+        Anota los pedidos (costo, tiempo mínimo, factibilidad) usando el caché si está al día.
+        
+        digest es el sha1 del feed tal como llegó; la corrección de posiciones
+        depende solo de él, de la ciudad y de la configuración de reubicación.
+        """
+        digest = digest.copy()
+        digest.update(f"{config.PLAYER_SPAWN}:{config.MAX_JOB_RELOCATION}".encode())
+        digest.update(city.content_hash().encode())
+        key = f"{ENRICHMENT_VERSION}:{digest.hexdigest()}"
+        
+        path = self.cache_dir / "pedidos_enriched.json"
+        try:
+            with open(path, 'r') as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            cached = {}
+        
+        annotations = cached.get("annotations") if cached.get("key") == key else None
+        if annotations is None:
+            annotations = compute_annotations(city, jobs)
+            with open(path, 'w') as f:
+                json.dump({"key": key, "annotations": annotations}, f)
+        
+        infeasible = sum(1 for values in annotations.values() if not values["feasible"])
+        if infeasible:
+            print(f"Pedidos imposibles de entregar a tiempo: {infeasible}")
+        return apply_annotations(jobs, annotations)
     
-    def _find_nearby_walkable(self, city, x, y):
-        """Encuentra la posición caminable más cercana."""
-        # Buscar en espiral desde la posición original
-        for radius in range(1, 10):
-            for dx in range(-radius, radius + 1):
-                for dy in range(-radius, radius + 1):
-                    new_x = x + dx
-                    new_y = y + dy
-                    
-                    if 0 <= new_x < city.width and 0 <= new_y < city.height:
-                        if not city.is_blocked(new_x, new_y):
-                            return [new_x, new_y]
-        
-        # Si no encuentra, usar posición aleatoria
-        return city.get_random_walkable_position()
\ No newline at end of file
+    def _repair_unreachable(self, city, jobs):
+        """
+        Reubica o descarta pedidos cuyos puntos no son alcanzables desde el inicio.
+        
+        Returns:
+            tuple: (pedidos válidos, reporte con 'relocated' y 'dropped')
+        """
+        report = {"relocated": [], "dropped": []}
+        spawn = city.nearest_walkable(*config.PLAYER_SPAWN)
+        label = city.component_of(*spawn)
+        
+        # Puntos fuera de la componente del jugador, resueltos en bloque
+        pending = [
+            (i, key, job[key])
+            for i, job in enumerate(jobs)
+            for key in ("pickup", "dropoff")
+            if city.component_of(*job[key]) != label
+        ]
+        targets = city.nearest_in_component_many([pos for _, _, pos in pending], label)
+        
+        dropped = set()
+        fixes = {}
+        for (i, key, pos), target in zip(pending, targets):
+            if target is None or abs(target[0] - pos[0]) + abs(target[1] - pos[1]) > config.MAX_JOB_RELOCATION:
+                dropped.add(i)
+            else:
+                fixes.setdefault(i, []).append((key, pos, target))
+        
+        for i, changes in fixes.items():
+            if i in dropped:
+                continue
+            for key, pos, target in changes:
+                jobs[i][key] = target
+                report["relocated"].append({"id": jobs[i].get("id"), "field": key, "from": pos, "to": target})
+        
+        report["dropped"] = [jobs[i].get("id") for i in sorted(dropped)]
+        if report["relocated"] or report["dropped"]:
+            print(f"Pedidos inalcanzables: {len(report['relocated'])} puntos reubicados, "
+                  f"{len(report['dropped'])} pedidos descartados.")
+        
+        kept = [job for i, job in enumerate(jobs) if i not in dropped]
+        return kept, report
+    
+    def get_distance_oracle(self, city, jobs):
+        """Obtiene el oráculo de distancias, reutilizando las tablas en caché."""
+        path = self._oracle_path(city)
+
+        oracle = DistanceOracle.load(path, city)
+        if oracle is None:
+            oracle = DistanceOracle.build(city, jobs)
+            oracle.save(path)
+        elif oracle.add_jobs(jobs):
+            # Hay pedidos nuevos con puntos aún no precalculados
+            oracle.save(path)
+
+        return oracle
+
+    def _oracle_path(self, city):
+        """Archivo de tablas del oráculo para la versión y contenido del mapa."""
+        return self.cache_dir / f"oracle_{city.version}_{city.content_hash()[:16]}.bin"
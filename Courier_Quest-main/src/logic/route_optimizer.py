@@ -0,0 +1,488 @@
+import math
+import time
+from src.config.config import WEATHER_MULTIPLIERS, PLAYER_BASE_SPEED, ROUTE_LATENESS_WEIGHT
+from .pathfinding import dijkstra_field, dijkstra_to
+from .travel_time import build_time_field
+
+
+def travel_time_matrix(city, points, base_speed=PLAYER_BASE_SPEED):
+    """
+    Segundos (clima despejado, sin factores del jugador) entre cada par de puntos.
+
+    Se hace una sola búsqueda por punto distinto hacia todo el mapa.
+
+    Returns:
+        list: matrix[i][j] = tiempo de points[i] a points[j] (inf si no hay ruta)
+    """
+    times = build_time_field(city, "clear", base_speed)
+    width = city.width
+    cells = [y * width + x for x, y in points]
+    fields = {}
+    matrix = []
+    for (x, y), cell in zip(points, cells):
+        field = fields.get(cell)
+        if field is None:
+            field = fields[cell] = dijkstra_field(city, (x, y), times)
+        matrix.append([field[target] for target in cells])
+    return matrix
+
+
+class RoutePlan:
+    """
+    Secuencia de paradas para el repartidor.
+
+    stops es una lista de ("pickup" | "dropoff", pedido). finish_time y
+    lateness están en segundos de juego; skipped son los candidatos que no
+    entraron por capacidad o porque no tienen ruta.
+    """
+
+    def __init__(self, stops, cost, finish_time, lateness, skipped):
+        self.stops = stops
+        self.cost = cost
+        self.finish_time = finish_time
+        self.lateness = lateness
+        self.skipped = skipped
+
+    def dropoff_order(self):
+        """Ids en el orden en que se entregan."""
+        return [order.id for kind, order in self.stops if kind == "dropoff"]
+
+    def __repr__(self):
+        route = " -> ".join(f"{kind[0].upper()}:{order.id}" for kind, order in self.stops)
+        return f"RoutePlan({route}, costo {self.cost:.1f})"
+
+
+class RouteOptimizer:
+    """
+    Optimiza el orden de recogidas y entregas (pickup-and-delivery).
+
+    Los pedidos que se llevan solo necesitan su entrega; los candidatos,
+    recogida y después entrega. La carga nunca supera la capacidad. El costo
+    es el tiempo total más ROUTE_LATENESS_WEIGHT por cada segundo de atraso
+    sobre los deadlines.
+
+    Primero se construye un plan por inserción más barata y después se mejora
+    con búsqueda local (mover tramos de 1 a 3 paradas y 2-opt) hasta agotar el
+    presupuesto de tiempo real.
+
+    Sin matrix, los tiempos entre puntos se calculan dentro del presupuesto y
+    solo para los puntos que entran al plan: al sumar un punto, una búsqueda
+    acotada a los ya sumados da sus tiempos de ida y vuelta. Si el presupuesto
+    se acaba antes, los pares que faltan toman una cota inferior (distancia
+    Manhattan por el tile más rápido) en vez de bloquear el cuadro.
+
+    Internamente el pedido k tiene la parada 2k (recogida) y 2k + 1 (entrega).
+    """
+
+    def __init__(self, start, carried, candidates=(), capacity=math.inf, now=0.0, weather="clear",
+                 speed_factor=1.0, matrix=None, city=None, lateness_weight=ROUTE_LATENESS_WEIGHT,
+                 router=None, base_speed=PLAYER_BASE_SPEED):
+        """
+        Args:
+            start: (x, y) del repartidor
+            carried: pedidos que ya se llevan (Order)
+            candidates: pedidos que se podrían recoger
+            capacity: peso máximo (Inventory.max_weight)
+            now: segundos de juego (la escala de Order.deadline_seconds)
+            matrix: tiempos entre puntos en el orden de self.points; si falta
+                se calcula a medida sobre city
+            router: TravelTimeRouter de la ciudad; se reutiliza su campo de
+                tiempos con clima despejado
+        """
+        self.orders = list(carried) + list(candidates)
+        self.carried_count = len(carried)
+        self.capacity = capacity
+        self.now = now
+        self.lateness_weight = lateness_weight
+
+        # Punto 0: repartidor; luego recogida y entrega de cada pedido
+        self.points = [tuple(start)]
+        for k, order in enumerate(self.orders):
+            # La recogida de los que ya se llevan no se visita
+            self.points.append(tuple(order.pickup) if k >= self.carried_count else tuple(start))
+            self.points.append(tuple(order.dropoff))
+        scale = WEATHER_MULTIPLIERS.get(weather, 1.0) * speed_factor
+        self.scale = scale
+        if matrix is None:
+            # Se llena en optimize con _activate, dentro del presupuesto
+            self.city = city
+            self.router = router
+            self.base_speed = base_speed
+            self._times = None
+            self._min_time = math.inf
+            self._active = []
+            size = len(self.points)
+            self.matrix = [[math.inf] * size for _ in range(size)]
+        else:
+            self._active = None
+            self.matrix = [[t / scale if scale > 0 else math.inf for t in row] for row in matrix]
+
+        count = len(self.orders)
+        self.load = sum(order.weight or 0 for order in self.orders[:self.carried_count])
+        self.delta = [0] * (2 * count)
+        self.due = [math.inf] * (2 * count)
+        for k, order in enumerate(self.orders):
+            weight = order.weight or 0
+            self.delta[2 * k] = weight
+            self.delta[2 * k + 1] = -weight
+            self.due[2 * k + 1] = order.deadline_seconds - now
+        self.unreachable = []
+
+    def optimize(self, budget_ms=None):
+        """
+        Retorna el mejor RoutePlan encontrado dentro de budget_ms milisegundos.
+
+        Las entregas pendientes siempre entran al plan (con tiempos estimados
+        si el presupuesto no alcanza para buscarlos); si el presupuesto se
+        agota antes, los candidatos que faltan quedan en skipped y la búsqueda
+        local no se hace. Los tiempos entre puntos se cuentan en el presupuesto.
+        """
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        self._activate(0, deadline)
+        for k in range(self.carried_count):
+            self._activate(2 * k + 2, deadline)
+        # Las entregas sin ruta no entran al costo; van al final del plan
+        self.unreachable = [k for k in range(self.carried_count) if math.isinf(self.matrix[0][2 * k + 2])]
+        route, skipped = self._construct(deadline)
+        cost = self.evaluate(route)
+        route, cost = self._local_search(route, cost, deadline)
+        return self._plan(route, cost, skipped)
+
+    def evaluate(self, route):
+        """Costo de una secuencia de paradas (inf si no respeta precedencia o capacidad)."""
+        matrix, delta, due = self.matrix, self.delta, self.due
+        carried = 2 * self.carried_count
+        capacity = self.capacity
+        load = self.load
+        picked = set()
+        elapsed = 0.0
+        lateness = 0.0
+        prev = 0
+        for stop in route:
+            row = matrix[prev]
+            prev = stop + 1
+            elapsed += row[prev]
+            if stop & 1:
+                if stop >= carried and stop - 1 not in picked:
+                    return math.inf
+                late = elapsed - due[stop]
+                if late > 0:
+                    lateness += late
+            else:
+                picked.add(stop)
+            load += delta[stop]
+            if load > capacity:
+                return math.inf
+        return elapsed + self.lateness_weight * lateness
+
+    def _construct(self, deadline=None):
+        """Inserción más barata: primero las entregas pendientes, luego cada candidato."""
+        route = []
+        carried = [k for k in range(self.carried_count) if k not in self.unreachable]
+        for k in sorted(carried, key=lambda k: self.due[2 * k + 1]):
+            route = self._insert_dropoff(route, 2 * k + 1)
+        skipped = []
+        for k in range(self.carried_count, len(self.orders)):
+            inserted = None
+            if deadline is None or time.perf_counter() <= deadline:
+                # Un candidato con tiempos estimados no se agrega
+                if self._activate(2 * k + 1, deadline) and self._activate(2 * k + 2, deadline):
+                    inserted = self._insert_pair(route, 2 * k, 2 * k + 1)
+            if inserted is None:
+                skipped.append(self.orders[k])
+            else:
+                route = inserted
+        return route, skipped
+
+    def _activate(self, point, deadline=None):
+        """
+        Completa los tiempos entre point y los puntos ya activos (ida y vuelta).
+
+        Retorna False si el deadline llegó antes de terminar la búsqueda; los
+        pares que faltaron quedan con la cota de _set_estimate.
+        """
+        active = self._active
+        if active is None or point in active:
+            return True
+        times = self._time_weights()
+        width = self.city.width
+        x, y = self.points[point]
+        cell = y * width + x
+        targets = {}
+        for q in active:
+            qx, qy = self.points[q]
+            targets[q] = qy * width + qx
+
+        found = {}
+        if targets and (deadline is None or time.perf_counter() <= deadline):
+            found = dijkstra_to(self.city, (x, y), list(targets.values()), times, deadline)
+        complete = True
+        for q, target in targets.items():
+            there = found.get(target)
+            if there is None:
+                self._set_estimate(point, q)
+                complete = False
+            else:
+                self._set_times(point, q, there, times[cell], times[target])
+        self.matrix[point][point] = 0.0
+        active.append(point)
+        return complete
+
+    def _set_times(self, a, b, there, time_a, time_b):
+        """Guarda a -> b y deduce b -> a: la vuelta recorre las mismas celdas, cambia qué extremo se paga."""
+        back = math.inf if math.isinf(there) else there + time_a - time_b
+        scale = self.scale
+        self.matrix[a][b] = there / scale if scale > 0 else math.inf
+        self.matrix[b][a] = back / scale if scale > 0 else math.inf
+
+    def _set_estimate(self, a, b):
+        """Cota inferior de a <-> b cuando no hubo tiempo de buscar la ruta."""
+        (ax, ay), (bx, by) = self.points[a], self.points[b]
+        steps = abs(ax - bx) + abs(ay - by)
+        there = steps * self._min_time if steps else 0.0
+        scale = self.scale
+        self.matrix[a][b] = self.matrix[b][a] = there / scale if scale > 0 else math.inf
+
+    def _time_weights(self):
+        if self._times is None:
+            if self.router is not None:
+                self._times, self._min_time = self.router.field("clear")
+            else:
+                self._times = build_time_field(self.city, "clear", self.base_speed)
+                self._min_time = min(self._times, default=math.inf)
+        return self._times
+
+    def _state(self, route):
+        """
+        Llegadas y carga de cada parada, y por sufijo la cantidad de entregas
+        ya atrasadas y la menor holgura de las demás. Con eso el atraso extra
+        de retrasar un sufijo suele calcularse en O(1).
+        """
+        matrix, delta, due = self.matrix, self.delta, self.due
+        n = len(route)
+        arrival = [0.0] * n
+        load = [0] * n
+        elapsed, current, prev = 0.0, self.load, 0
+        for k, stop in enumerate(route):
+            elapsed += matrix[prev][stop + 1]
+            prev = stop + 1
+            current += delta[stop]
+            arrival[k] = elapsed
+            load[k] = current
+
+        late_count = [0] * (n + 1)
+        min_slack = [math.inf] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            late_count[k] = late_count[k + 1]
+            min_slack[k] = min_slack[k + 1]
+            stop = route[k]
+            if stop & 1:
+                slack = due[stop] - arrival[k]
+                if slack < 0:
+                    late_count[k] += 1
+                elif slack < min_slack[k]:
+                    min_slack[k] = slack
+        return arrival, load, late_count, min_slack
+
+    def _extra_lateness(self, route, state, k, delay):
+        """Atraso agregado al retrasar delay segundos las paradas desde k."""
+        arrival, _, late_count, min_slack = state
+        if 0 <= delay <= min_slack[k]:
+            return delay * late_count[k]
+        due = self.due
+        extra = 0.0
+        for j in range(k, len(route)):
+            stop = route[j]
+            if stop & 1:
+                slack = due[stop] - arrival[j]
+                extra += max(0.0, delay - slack) - max(0.0, -slack)
+        return extra
+
+    def _insert_dropoff(self, route, stop):
+        """Inserta la entrega de un pedido que ya se lleva donde menos aumenta el costo."""
+        matrix, due, weight = self.matrix, self.due, self.lateness_weight
+        state = self._state(route)
+        arrival = state[0]
+        point = stop + 1
+        best, best_i = math.inf, len(route)
+        for i in range(len(route) + 1):
+            before = route[i - 1] + 1 if i else 0
+            to_stop = matrix[before][point]
+            shift = to_stop
+            if i < len(route):
+                after = route[i] + 1
+                shift += matrix[point][after] - matrix[before][after]
+            reached = (arrival[i - 1] if i else 0.0) + to_stop
+            late = max(0.0, reached - due[stop]) + self._extra_lateness(route, state, i, shift)
+            increase = shift + weight * late
+            if increase < best:
+                best, best_i = increase, i
+        return route[:best_i] + [stop] + route[best_i:]
+
+    def _insert_pair(self, route, pickup, dropoff):
+        """
+        Inserta recogida y entrega donde menos aumenta el costo (None si no cabe).
+
+        Se ubica primero el par junto y después se busca el mejor lugar para
+        la entrega detrás de esa recogida: O(n) inserciones por pedido en vez
+        de O(n²).
+        """
+        matrix, due, weight = self.matrix, self.due, self.lateness_weight
+        capacity = self.capacity
+        extra_weight = self.delta[pickup]
+        state = self._state(route)
+        arrival, load = state[0], state[1]
+        n = len(route)
+        p, d = pickup + 1, dropoff + 1
+        pair = matrix[p][d]
+
+        best, best_i = math.inf, None
+        for i in range(n + 1):
+            if (load[i - 1] if i else self.load) + extra_weight > capacity:
+                continue
+            before = route[i - 1] + 1 if i else 0
+            shift = matrix[before][p] + pair
+            reached = (arrival[i - 1] if i else 0.0) + shift
+            if i < n:
+                after = route[i] + 1
+                shift += matrix[d][after] - matrix[before][after]
+            late = max(0.0, reached - due[dropoff]) + self._extra_lateness(route, state, i, shift)
+            increase = shift + weight * late
+            if increase < best:
+                best, best_i = increase, i
+        if best_i is None or math.isinf(best):
+            return None
+
+        # Con la recogida fija en best_i, la entrega más adelante
+        i = best_i
+        best_q = None
+        if i < n:
+            before = route[i - 1] + 1 if i else 0
+            after = route[i] + 1
+            pickup_shift = matrix[before][p] + matrix[p][after] - matrix[before][after]
+            partial = 0.0
+            peak = 0
+            for q in range(i, n):
+                peak = max(peak, load[q])
+                if peak + extra_weight > capacity:
+                    break
+                stop = route[q]
+                if stop & 1:
+                    slack = due[stop] - arrival[q]
+                    partial += max(0.0, pickup_shift - slack) - max(0.0, -slack)
+                c = stop + 1
+                to_drop = matrix[c][d]
+                shift = to_drop
+                if q + 1 < n:
+                    e = route[q + 1] + 1
+                    shift += matrix[d][e] - matrix[c][e]
+                reached = arrival[q] + pickup_shift + to_drop
+                late = (partial + max(0.0, reached - due[dropoff])
+                        + self._extra_lateness(route, state, q + 1, pickup_shift + shift))
+                increase = pickup_shift + shift + weight * late
+                if increase < best:
+                    best, best_q = increase, q
+
+        if best_q is None:
+            return route[:i] + [pickup, dropoff] + route[i:]
+        return route[:i] + [pickup] + route[i:best_q + 1] + [dropoff] + route[best_q + 1:]
+
+    def _local_search(self, route, cost, deadline):
+        """
+        Mejora el plan moviendo tramos de 1 a 3 paradas (or-opt) e invirtiendo
+        tramos (2-opt) hasta que no haya mejoras o se acabe el tiempo.
+
+        Mientras el plan no tenga atrasos el costo es solo el tiempo total, así
+        que los movimientos que no lo acortan se descartan sin evaluarlos.
+        """
+        matrix = self.matrix
+        n = len(route)
+        improved = True
+        while improved:
+            improved = False
+            on_time = cost <= self._route_time(route) + 1e-9
+            for length in (1, 2, 3):
+                for i in range(n - length + 1):
+                    if deadline is not None and time.perf_counter() > deadline:
+                        return route, cost
+                    segment = route[i:i + length]
+                    first, last = segment[0] + 1, segment[-1] + 1
+                    before = route[i - 1] + 1 if i else 0
+                    after = route[i + length] + 1 if i + length < n else None
+                    removed = matrix[before][first]
+                    if after is not None:
+                        removed += matrix[last][after] - matrix[before][after]
+                    rest = route[:i] + route[i + length:]
+                    for j in range(len(rest) + 1):
+                        if j == i:
+                            continue
+                        c = rest[j - 1] + 1 if j else 0
+                        added = matrix[c][first]
+                        if j < len(rest):
+                            e = rest[j] + 1
+                            added += matrix[last][e] - matrix[c][e]
+                        if on_time and added >= removed:
+                            continue
+                        candidate = rest[:j] + segment + rest[j:]
+                        candidate_cost = self.evaluate(candidate)
+                        if candidate_cost < cost - 1e-9:
+                            route, cost, improved = candidate, candidate_cost, True
+                            on_time = cost <= self._route_time(route) + 1e-9
+                            break
+
+            for i in range(n - 1):
+                if deadline is not None and time.perf_counter() > deadline:
+                    return route, cost
+                before = route[i - 1] + 1 if i else 0
+                inner = 0.0
+                reversed_inner = 0.0
+                for j in range(i + 2, n + 1):
+                    # Tramo route[i:j] invertido
+                    a, b = route[j - 2] + 1, route[j - 1] + 1
+                    inner += matrix[a][b]
+                    reversed_inner += matrix[b][a]
+                    if on_time:
+                        old = matrix[before][route[i] + 1] + inner
+                        new = matrix[before][b] + reversed_inner
+                        if j < n:
+                            after = route[j] + 1
+                            old += matrix[b][after]
+                            new += matrix[route[i] + 1][after]
+                        if new >= old:
+                            continue
+                    candidate = route[:i] + route[i:j][::-1] + route[j:]
+                    candidate_cost = self.evaluate(candidate)
+                    if candidate_cost < cost - 1e-9:
+                        route, cost, improved = candidate, candidate_cost, True
+                        on_time = cost <= self._route_time(route) + 1e-9
+                        break
+        return route, cost
+
+    def _route_time(self, route):
+        matrix = self.matrix
+        elapsed, prev = 0.0, 0
+        for stop in route:
+            elapsed += matrix[prev][stop + 1]
+            prev = stop + 1
+        return elapsed
+
+    def _plan(self, route, cost, skipped):
+        stops = [("dropoff" if stop & 1 else "pickup", self.orders[stop // 2]) for stop in route]
+        elapsed = 0.0
+        lateness = 0.0
+        prev = 0
+        for stop in route:
+            elapsed += self.matrix[prev][stop + 1]
+            prev = stop + 1
+            if stop & 1:
+                lateness += max(0.0, elapsed - self.due[stop])
+        stops += [("dropoff", self.orders[k]) for k in self.unreachable]
+        return RoutePlan(stops, cost, self.now + elapsed, lateness, skipped)
+
+
+def plan_route(start, carried, candidates=(), capacity=math.inf, now=0.0, weather="clear",
+               speed_factor=1.0, budget_ms=None, matrix=None, city=None, router=None):
+    """Atajo: construye un RouteOptimizer y retorna su mejor RoutePlan."""
+    optimizer = RouteOptimizer(start, carried, candidates, capacity, now, weather, speed_factor,
+                               matrix=matrix, city=city, router=router)
+    return optimizer.optimize(budget_ms)
@@ -0,0 +1,113 @@
+import heapq
+import math
+
+
+class ScheduledEvent:
+    """Evento programado; cancel() lo descarta sin sacarlo del heap."""
+
+    __slots__ = ('time', 'callback', 'args', 'interval', 'cancelled')
+
+    def __init__(self, time, callback, args, interval=None):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __repr__(self):
+        name = getattr(self.callback, '__name__', self.callback)
+        return f"ScheduledEvent({name} @ {self.time:.2f})"
+
+
+class Scheduler:
+    """
+    Planificador de eventos por tiempo de juego.
+
+    Los eventos están en un heap por tiempo, así avanzar el reloj cuesta
+    O(log n) por evento que se dispara y O(1) si no se dispara ninguno, sin
+    importar cuántos haya programados. Los cancelados se descartan al salir
+    del heap. Durante un callback, now es el tiempo del evento.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self._heap = []
+        self._sequence = 0
+
+    def __len__(self):
+        return sum(1 for _, _, event in self._heap if not event.cancelled)
+
+    def schedule_at(self, time, callback, *args):
+        """Programa callback(*args) para el tiempo time (si ya pasó, se dispara en el próximo avance)."""
+        return self._push(ScheduledEvent(time, callback, args))
+
+    def schedule_in(self, delay, callback, *args):
+        """Programa callback(*args) dentro de delay segundos."""
+        return self.schedule_at(self.now + delay, callback, *args)
+
+    def every(self, interval, callback, *args):
+        """Programa callback(*args) cada interval segundos (el primero dentro de interval)."""
+        if interval <= 0:
+            raise ValueError("El intervalo debe ser positivo.")
+        return self._push(ScheduledEvent(self.now + interval, callback, args, interval))
+
+    def next_time(self):
+        """Tiempo del próximo evento vigente (None si no hay)."""
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def advance_to(self, time):
+        """
+        Dispara en orden todos los eventos con tiempo <= time y deja el reloj en time.
+
+        Returns:
+            int: cantidad de eventos disparados
+        """
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= time:
+            event = heapq.heappop(heap)[2]
+            if event.cancelled:
+                continue
+            self.now = max(self.now, event.time)
+            if event.interval is not None:
+                event.time += event.interval
+                self._push(event)
+            event.callback(*event.args)
+            fired += 1
+        self.now = max(self.now, time)
+        return fired
+
+    def advance(self, dt):
+        """Avanza el reloj dt segundos."""
+        return self.advance_to(self.now + dt)
+
+    def skip_to_next(self, limit=math.inf):
+        """
+        Salta directo al próximo evento (sin pasar de limit) y lo dispara.
+
+        Returns:
+            float: segundos que avanzó el reloj
+        """
+        target = self.next_time()
+        if target is None or target > limit:
+            target = limit
+        if math.isinf(target):
+            return 0.0
+        start = self.now
+        self.advance_to(target)
+        return self.now - start
+
+    def clear(self):
+        """Descarta todos los eventos."""
+        self._heap.clear()
+
+    def _push(self, event):
+        self._sequence += 1
+        heapq.heappush(self._heap, (event.time, self._sequence, event))
+        return event
@@ -0,0 +1,204 @@
+import heapq
+import math
+from collections import OrderedDict
+from src.config.config import (
+    STAMINA_RECOVERY_RESTING, STAMINA_RECOVERY_AT_POINT, STAMINA_EXHAUSTED_THRESHOLD,
+    REST_POINT_TILES, STAMINA_PLANNER_STEP, STAMINA_PLANNER_REST_STEP
+)
+from .pathfinding import neighbors
+
+
+class RoutePlan:
+    """Ruta con descansos: pasos ('move', [x, y]) o ('rest', segundos); el primero es el inicio."""
+
+    def __init__(self, steps, total_time, final_stamina):
+        self.steps = steps
+        self.total_time = total_time
+        self.final_stamina = final_stamina
+
+    @property
+    def path(self):
+        """Celdas recorridas (sin los descansos)."""
+        return [pos for action, pos in self.steps if action == 'move']
+
+    @property
+    def rests(self):
+        """Descansos como lista de (x, y, segundos)."""
+        result = []
+        pos = None
+        for action, value in self.steps:
+            if action == 'move':
+                pos = value
+            else:
+                result.append((pos[0], pos[1], value))
+        return result
+
+    def __repr__(self):
+        return f"RoutePlan({len(self.path)} tiles, {len(self.rests)} descansos, {self.total_time:.1f}s)"
+
+
+class StaminaPlanner:
+    """
+    Ruta más rápida considerando la resistencia del jugador.
+
+    El estado de búsqueda es (celda, resistencia, exhausto). Moverse cuesta el
+    tiempo del modelo de velocidad (Player.get_speed_factor con la resistencia
+    de ese momento) y consume Player.get_stamina_cost; descansar recupera a
+    STAMINA_RECOVERY_RESTING, o a STAMINA_RECOVERY_AT_POINT en REST_POINT_TILES.
+    Estando exhausto solo se puede descansar hasta STAMINA_EXHAUSTED_THRESHOLD.
+    Los descansos quedan donde minimizan el tiempo total de llegada.
+    """
+
+    # Cantidad máxima de planes guardados en el caché LRU
+    CACHE_SIZE = 256
+
+    def __init__(self, city, stamina_step=STAMINA_PLANNER_STEP, rest_step=STAMINA_PLANNER_REST_STEP,
+                 rest_tiles=REST_POINT_TILES):
+        self.city = city
+        self.stamina_step = stamina_step
+        self.rest_step = rest_step
+        self.rest_tiles = set(rest_tiles)
+        self._cache = OrderedDict()
+        self._cache_revision = city.revision
+        self._max_weight = None
+
+    def plan(self, player, goal, weather, start=None):
+        """
+        Planifica la ruta del jugador hasta goal.
+
+        La resistencia inicial se redondea hacia abajo al bucket, así que el
+        plan es válido (y se reutiliza) para todo el bucket.
+
+        Returns:
+            RoutePlan o None si no hay forma de llegar
+        """
+        city = self.city
+        if self._cache_revision != city.revision:
+            self.clear_cache()
+
+        start = tuple(start) if start is not None else (player.x, player.y)
+        goal = tuple(goal)
+        stamina = math.floor(player.stamina / self.stamina_step) * self.stamina_step
+        key = (start, goal, player.get_total_weight(), weather,
+               stamina, player.is_exhausted, player.get_speed_factor(100))
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        plan = None
+        if city.is_reachable(start, goal):
+            plan = self._search(player, start, goal, weather, stamina, player.is_exhausted)
+
+        self._cache[key] = plan
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return plan
+
+    def clear_cache(self):
+        """Vacía el caché de planes."""
+        self._cache.clear()
+        self._cache_revision = self.city.revision
+        self._max_weight = None
+
+    def _rest_targets(self, stamina, exhausted):
+        """Niveles de resistencia a los que tiene sentido descansar."""
+        if exhausted:
+            return [STAMINA_EXHAUSTED_THRESHOLD]
+        targets = []
+        if stamina < 100:
+            targets.append(min(100, (math.floor(stamina / self.rest_step) + 1) * self.rest_step))
+        if stamina < STAMINA_EXHAUSTED_THRESHOLD and STAMINA_EXHAUSTED_THRESHOLD not in targets:
+            targets.append(STAMINA_EXHAUSTED_THRESHOLD)
+        return targets
+
+    def _search(self, player, start, goal, weather, stamina, exhausted):
+        city = self.city
+        width, height = city.width, city.height
+        blocked = city.blocked_mask
+        weights = city.weight_grid
+
+        tile_speed = player.base_speed * player.get_weather_multiplier(weather)
+        stamina_cost = player.get_stamina_cost(weather)
+        if self._max_weight is None:
+            self._max_weight = max((weights[i] for i in city.walkable_cells), default=1.0)
+        # Cota optimista: el tile más rápido con el mejor factor posible
+        h_scale = 1 / (tile_speed * self._max_weight * player.get_speed_factor(100))
+
+        source = start[1] * width + start[0]
+        target = goal[1] * width + goal[0]
+        gx, gy = goal
+
+        best_rate = max(STAMINA_RECOVERY_AT_POINT, STAMINA_RECOVERY_RESTING)
+
+        def heuristic(index, stamina, exhausted):
+            # Tiempo de movimiento más el descanso inevitable para cubrir la distancia
+            moves = abs(index % width - gx) + abs(index // width - gy)
+            deficit = max(0, (moves - 1) * stamina_cost - stamina)
+            if exhausted:
+                deficit = max(deficit, STAMINA_EXHAUSTED_THRESHOLD - stamina)
+            return h_scale * moves + deficit / best_rate
+
+        def rest_rate(index):
+            tile = city.get_tile(index % width, index // width)
+            return STAMINA_RECOVERY_AT_POINT if tile in self.rest_tiles else STAMINA_RECOVERY_RESTING
+
+        def state_key(index, stamina, exhausted):
+            return (index, math.floor(stamina / self.stamina_step), exhausted)
+
+        # Mejor tiempo por estado (celda, bucket de resistencia, exhausto)
+        best = {state_key(source, stamina, exhausted): 0.0}
+        # labels[i] = (etiqueta padre, acción, duración, celda)
+        labels = [(None, None, 0.0, source)]
+        heap = [(heuristic(source, stamina, exhausted), 0.0, source, stamina, exhausted, 0)]
+
+        while heap:
+            _, time, index, stamina, exhausted, label = heapq.heappop(heap)
+            if index == target:
+                return self._build_plan(labels, label, time, stamina, width)
+            if time > best[state_key(index, stamina, exhausted)]:
+                continue
+
+            successors = []
+            if not exhausted and stamina > 0:
+                factor = player.get_speed_factor(stamina)
+                new_stamina = max(0, stamina - stamina_cost)
+                for n in neighbors(index, width, height):
+                    if blocked[n] or weights[n] <= 0:
+                        continue
+                    step_time = 1 / (tile_speed * factor * weights[n])
+                    successors.append((n, new_stamina, new_stamina <= 0, step_time, 'move'))
+
+            rate = rest_rate(index)
+            for level in self._rest_targets(stamina, exhausted):
+                still_exhausted = exhausted and level < STAMINA_EXHAUSTED_THRESHOLD
+                successors.append((index, level, still_exhausted, (level - stamina) / rate, 'rest'))
+
+            for n, new_stamina, new_exhausted, step_time, action in successors:
+                key = state_key(n, new_stamina, new_exhausted)
+                new_time = time + step_time
+                if new_time < best.get(key, math.inf):
+                    best[key] = new_time
+                    labels.append((label, action, step_time, n))
+                    heapq.heappush(heap, (new_time + heuristic(n, new_stamina, new_exhausted), new_time, n,
+                                          new_stamina, new_exhausted, len(labels) - 1))
+
+        return None
+
+    def _build_plan(self, labels, label, total_time, stamina, width):
+        steps = []
+        while labels[label][0] is not None:
+            parent, action, step_time, index = labels[label]
+            if action == 'move':
+                steps.append(('move', [index % width, index // width]))
+            elif steps and steps[-1][0] == 'rest':
+                # Descansos seguidos en la misma celda se unen en uno
+                steps[-1] = ('rest', steps[-1][1] + step_time)
+            else:
+                steps.append(('rest', step_time))
+            label = parent
+
+        index = labels[label][3]
+        steps.append(('move', [index % width, index // width]))
+        steps.reverse()
+        return RoutePlan(steps, total_time, stamina)
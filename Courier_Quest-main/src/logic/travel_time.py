@@ -0,0 +1,150 @@
+import math
+from array import array
+from src.config.config import WEATHER_MULTIPLIERS, PLAYER_BASE_SPEED, TRAFFIC_BUCKETS
+from .pathfinding import astar
+
+
+class _BlendedField:
+    """Mezcla dos campos de tiempo durante una transición de clima, sin copiarlos."""
+
+    def __init__(self, current, following, progress):
+        self.current = current
+        self.following = following
+        self.progress = progress
+
+    def __len__(self):
+        return len(self.current)
+
+    def __getitem__(self, index):
+        # La velocidad se interpola linealmente (como el multiplicador de clima),
+        # así que el tiempo es la media armónica ponderada de ambos campos
+        speed = (1 - self.progress) / self.current[index] + self.progress / self.following[index]
+        return 1 / speed if speed > 0 else math.inf
+
+
+class TravelTimeRouter:
+    """
+    Rutas por tiempo de viaje (segundos de juego) según el modelo de velocidad.
+
+    Cada campo guarda, por celda, el tiempo de entrar al tile con un clima (y
+    opcionalmente una franja de tráfico): 1 / (base_speed * m_clima * surface_weight).
+    Los campos se construyen al pedirse por primera vez y se mantienen al día
+    cuando cambia un tile, hasta llamar a close(). Los factores propios del jugador (peso, reputación,
+    resistencia) se aplican al final dividiendo por Player.get_speed_factor().
+    """
+
+    def __init__(self, city, base_speed=PLAYER_BASE_SPEED, traffic_buckets=None):
+        self.city = city
+        self.base_speed = base_speed
+        self.traffic_buckets = list(TRAFFIC_BUCKETS if traffic_buckets is None else traffic_buckets)
+        # (clima, franja) -> (campo de tiempos, tiempo mínimo de un tile)
+        self._fields = {}
+        city.add_listener(self._on_tiles_changed)
+
+    def close(self):
+        """Deja de seguir los cambios de la ciudad y descarta los campos."""
+        self.city.remove_listener(self._on_tiles_changed)
+        self._fields.clear()
+
+    def bucket_for(self, game_time):
+        """Índice de la franja de tráfico para una fecha/hora de juego (None si no aplica)."""
+        if game_time is None:
+            return None
+        hour = game_time.hour + game_time.minute / 60
+        for i, (start, end, _) in enumerate(self.traffic_buckets):
+            if start <= hour < end:
+                return i
+        return None
+
+    def field(self, weather, bucket=None):
+        """Campo de tiempos para un clima y franja, construido una sola vez."""
+        key = (weather, bucket)
+        cached = self._fields.get(key)
+        if cached is None:
+            cached = self._build_field(weather, bucket)
+            self._fields[key] = cached
+        return cached
+
+    def route(self, start, goal, weather, speed_factor=1.0, next_weather=None,
+              progress=0.0, game_time=None):
+        """
+        Ruta más rápida entre dos posiciones.
+
+        Args:
+            weather: clima actual
+            speed_factor: factor del jugador (Player.get_speed_factor())
+            next_weather, progress: clima destino y avance (0 a 1) si hay transición
+            game_time (datetime): hora de juego para elegir la franja de tráfico
+
+        Returns:
+            tuple: (ruta como tupla de (x, y), segundos) o (None, inf) si no hay ruta
+        """
+        if speed_factor <= 0:
+            return None, math.inf
+
+        bucket = self.bucket_for(game_time)
+        times, min_time = self.field(weather, bucket)
+        if next_weather is not None and next_weather != weather and progress > 0:
+            following, following_min = self.field(next_weather, bucket)
+            times = _BlendedField(times, following, min(progress, 1.0))
+            min_time = min(min_time, following_min)
+
+        path, seconds = astar(self.city, start, goal, times, min_time)
+        return path, seconds / speed_factor
+
+    def eta(self, start, goal, weather, speed_factor=1.0, next_weather=None,
+            progress=0.0, game_time=None):
+        """Segundos de juego para ir de start a goal (inf si no es alcanzable)."""
+        return self.route(start, goal, weather, speed_factor, next_weather, progress, game_time)[1]
+
+    def clear(self):
+        """Descarta los campos construidos."""
+        self._fields.clear()
+
+    def _build_field(self, weather, bucket):
+        traffic = self.traffic_buckets[bucket][2] if bucket is not None else None
+        times = build_time_field(self.city, weather, self.base_speed, traffic)
+        return times, min(times, default=math.inf)
+
+    def _on_tiles_changed(self, cells):
+        """Actualiza solo las celdas modificadas en los campos ya construidos."""
+        for (weather, bucket), (times, min_time) in list(self._fields.items()):
+            scale = self.base_speed * WEATHER_MULTIPLIERS.get(weather, 1.0)
+            traffic = self.traffic_buckets[bucket][2] if bucket is not None else {}
+            for x, y in cells:
+                value = _tile_time(self.city, x, y, scale, traffic)
+                times[y * self.city.width + x] = value
+                min_time = min(min_time, value)
+            self._fields[(weather, bucket)] = (times, min_time)
+
+
+def _tile_time(city, x, y, scale, traffic):
+    if city.is_blocked(x, y):
+        return math.inf
+    speed = scale * city.get_surface_weight(x, y) * traffic.get(city.get_tile(x, y), 1.0)
+    return 1 / speed if speed > 0 else math.inf
+
+
+def build_time_field(city, weather, base_speed=PLAYER_BASE_SPEED, traffic=None):
+    """
+    Tiempo (segundos) de entrar a cada celda con un clima dado.
+
+    Args:
+        traffic (dict): multiplicador de velocidad por tile (opcional)
+
+    Returns:
+        array('f'): tiempo por celda plana (inf en las bloqueadas)
+    """
+    scale = base_speed * WEATHER_MULTIPLIERS.get(weather, 1.0)
+    if traffic:
+        return array('f', (
+            _tile_time(city, x, y, scale, traffic)
+            for y in range(city.height) for x in range(city.width)
+        ))
+
+    # Sin tráfico el tiempo depende solo del peso: se deriva de weight_grid
+    weights, blocked = city.weight_grid, city.blocked_mask
+    return array('f', (
+        1 / (weights[i] * scale) if not blocked[i] and weights[i] * scale > 0 else math.inf
+        for i in range(city.width * city.height)
+    ))
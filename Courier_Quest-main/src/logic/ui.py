@@ -1,6 +1,8 @@
 import pygame
 import random
 import math
+from collections import OrderedDict
+from .order_ranking import OrderScore
 
 
 class UIManager:
@@ -39,6 +41,12 @@ class UIManager:
         self.camera_x = 0
         self.camera_y = 0
         
+        # Caché de superficies pre-renderizadas del mapa por chunk (LRU)
+        self.render_chunk_size = 16
+        self.render_cache_size = 128
+        self._render_chunks = OrderedDict()
+        self._render_city = None
+        
         # Partículas de clima
         self.rain_particles = []
         self.wind_particles = []
@@ -124,7 +132,7 @@ class UIManager:
             flash.fill((255, 255, 255, 150))
             surface.blit(flash, (0, 0))
         
-    def draw_hud(self, surface, player, game_time, weather, elapsed):
+    def draw_hud(self, surface, player, game_time, weather, elapsed, current_game_time=None):
         """Dibuja el HUD principal."""
         panel_rect = pygame.Rect(0, 0, 190, self.screen_height)
         pygame.draw.rect(surface, self.colors['panel'], panel_rect)
@@ -136,6 +144,10 @@ class UIManager:
         self._draw_text(surface, f"Tiempo: {time_left}s", 10, y, 
                        self.font_medium, time_color)
         y += 35
+        if current_game_time is not None:
+            self._draw_text(surface, f"Hora: {current_game_time:%H:%M}", 10, y - 8,
+                           self.font_small, self.colors['text_dim'])
+            y += 15
         
         progress = player.total_income / player.income_goal
         income_color = (self.colors['success'] if progress >= 1.0 
@@ -191,20 +203,121 @@ class UIManager:
         self._draw_text(surface, f"Pedidos: {player.inventory.order_count}", 10, y,
                        self.font_small, self.colors['text_dim'])
         
-    def draw_map(self, surface, city, player_x, player_y, available_orders):
+        # Pedidos que se llevan por vencer o atrasados
+        for order_id, stage in list(player.inventory.deadline_alerts.items())[:4]:
+            y += 20
+            if stage == "warning":
+                self._draw_text(surface, f"⚠ {order_id} vence pronto", 10, y,
+                               self.font_small, self.colors['warning'])
+            else:
+                self._draw_text(surface, f"⚠ {order_id} atrasado", 10, y,
+                               self.font_small, self.colors['danger'])
+        
+    def draw_map(self, surface, city, player_x, player_y, order_manager):
         """Dibuja el mapa con cámara centrada"""
         self.update_camera(player_x, player_y, city.width, city.height)
         
-        for y, row in enumerate(city.tiles):
-            for x, tile in enumerate(row):
+        if self._render_city is not city:
+            if self._render_city is not None:
+                self._render_city.remove_listener(self._on_tiles_changed)
+            city.add_listener(self._on_tiles_changed)
+            self._render_chunks.clear()
+            self._render_city = city
+        
+        view_width = self.screen_width - self.map_offset_x
+        view_height = self.screen_height - 100
+        chunk_pixels = self.render_chunk_size * self.tile_size
+        
+        # Solo se dibujan (y cargan) los chunks visibles por la cámara
+        first_cx = int(self.camera_x // chunk_pixels)
+        first_cy = int(self.camera_y // chunk_pixels)
+        last_cx = min(int((self.camera_x + view_width) // chunk_pixels),
+                      (city.width - 1) // self.render_chunk_size)
+        last_cy = min(int((self.camera_y + view_height) // chunk_pixels),
+                      (city.height - 1) // self.render_chunk_size)
+        
+        surface.set_clip(pygame.Rect(self.map_offset_x, self.map_offset_y, view_width, view_height))
+        for cy in range(first_cy, last_cy + 1):
+            for cx in range(first_cx, last_cx + 1):
+                chunk_surface = self._get_render_chunk(city, cx, cy)
+                screen_x = self.map_offset_x + cx * chunk_pixels - self.camera_x
+                screen_y = self.map_offset_y + cy * chunk_pixels - self.camera_y
+                surface.blit(chunk_surface, (screen_x, screen_y))
+        surface.set_clip(None)
+        
+        # Dibujar marcadores de pedidos disponibles (solo los que caen en la vista)
+        first_x, first_y, last_x, last_y = self.visible_tile_rect(city)
+        for order in order_manager.orders_in_rect(first_x, first_y, last_x, last_y):
+            self._draw_map_marker_camera(surface, order.pickup, (100, 255, 100), "P")
+        
+        # Dibujar jugador
+        px = self.map_offset_x + player_x * self.tile_size - self.camera_x
+        py = self.map_offset_y + player_y * self.tile_size - self.camera_y
+        player_rect = pygame.Rect(px + 5, py + 5, self.tile_size - 12, self.tile_size - 12)
+        pygame.draw.rect(surface, self.colors['player'], player_rect)
+        pygame.draw.rect(surface, (255, 255, 255), player_rect, 2)
+    
+    def visible_tile_rect(self, city):
+        """Rectángulo de tiles visible con la cámara actual: (x0, y0, x1, y1)."""
+        view_width = self.screen_width - self.map_offset_x
+        view_height = self.screen_height - 100
+        first_x = max(0, int(self.camera_x // self.tile_size))
+        first_y = max(0, int(self.camera_y // self.tile_size))
+        last_x = min(city.width - 1, int((self.camera_x + view_width) // self.tile_size))
+        last_y = min(city.height - 1, int((self.camera_y + view_height) // self.tile_size))
+        return first_x, first_y, last_x, last_y
+    
+    def draw_isochrone(self, surface, iso):
+        """Sombrea las celdas alcanzables; más opaco cuanto antes se llega."""
+        view_width = self.screen_width - self.map_offset_x
+        view_height = self.screen_height - 100
+        
+        first_x = max(iso.x0, int(self.camera_x // self.tile_size))
+        first_y = max(iso.y0, int(self.camera_y // self.tile_size))
+        last_x = min(iso.x0 + iso.width - 1, int((self.camera_x + view_width) // self.tile_size))
+        last_y = min(iso.y0 + iso.height - 1, int((self.camera_y + view_height) // self.tile_size))
+        
+        shades = []
+        for alpha in (110, 80, 50):
+            tile = pygame.Surface((self.tile_size - 2, self.tile_size - 2), pygame.SRCALPHA)
+            tile.fill((100, 200, 255, alpha))
+            shades.append(tile)
+        
+        surface.set_clip(pygame.Rect(self.map_offset_x, self.map_offset_y, view_width, view_height))
+        for y in range(first_y, last_y + 1):
+            for x in range(first_x, last_x + 1):
+                if not iso.contains(x, y):
+                    continue
+                level = min(2, int(3 * iso.time_at(x, y) / iso.budget)) if iso.budget > 0 else 0
                 screen_x = self.map_offset_x + x * self.tile_size - self.camera_x
                 screen_y = self.map_offset_y + y * self.tile_size - self.camera_y
-                
-                if (screen_x < self.map_offset_x - self.tile_size or 
-                    screen_x > self.screen_width or
-                    screen_y < self.map_offset_y - self.tile_size or 
-                    screen_y > self.screen_height - 100):
-                    continue
+                surface.blit(shades[level], (screen_x, screen_y))
+        surface.set_clip(None)
+    
+    def _on_tiles_changed(self, cells):
+        """Descarta solo los chunks de render que contienen celdas cambiadas."""
+        size = self.render_chunk_size
+        for x, y in cells:
+            self._render_chunks.pop((x // size, y // size), None)
+    
+    def _get_render_chunk(self, city, cx, cy):
+        """Obtiene (o dibuja) la superficie de un chunk del mapa."""
+        key = (cx, cy)
+        chunk_surface = self._render_chunks.get(key)
+        if chunk_surface is not None:
+            self._render_chunks.move_to_end(key)
+            return chunk_surface
+        
+        size = self.render_chunk_size
+        x0, y0 = cx * size, cy * size
+        cols = min(size, city.width - x0)
+        rows = min(size, city.height - y0)
+        
+        chunk_surface = pygame.Surface((cols * self.tile_size, rows * self.tile_size))
+        chunk_surface.fill(self.colors['bg'])
+        for y in range(rows):
+            for x in range(cols):
+                tile = city.get_tile(x0 + x, y0 + y)
                 
                 if tile == 'C':
                     color = self.colors['road']
@@ -215,23 +328,20 @@ class UIManager:
                 else:
                     color = self.colors['road']
                 
-                rect = pygame.Rect(screen_x, screen_y, self.tile_size - 2, self.tile_size - 2)
-                pygame.draw.rect(surface, color, rect)
-        
-        # Dibujar marcadores de pedidos disponibles
-        for order in available_orders:
-            pickup = order['pickup']
-            self._draw_map_marker_camera(surface, pickup, (100, 255, 100), "P")
-        
-        # Dibujar jugador
-        px = self.map_offset_x + player_x * self.tile_size - self.camera_x
-        py = self.map_offset_y + player_y * self.tile_size - self.camera_y
-        player_rect = pygame.Rect(px + 5, py + 5, self.tile_size - 12, self.tile_size - 12)
-        pygame.draw.rect(surface, self.colors['player'], player_rect)
-        pygame.draw.rect(surface, (255, 255, 255), player_rect, 2)
+                rect = pygame.Rect(x * self.tile_size, y * self.tile_size,
+                                   self.tile_size - 2, self.tile_size - 2)
+                pygame.draw.rect(chunk_surface, color, rect)
+        
+        self._render_chunks[key] = chunk_surface
+        if len(self._render_chunks) > self.render_cache_size:
+            self._render_chunks.popitem(last=False)
+        return chunk_surface
     
-    def draw_current_order(self, surface, inventory, city):
-        """Dibuja información del pedido actual."""
+    def draw_current_order(self, surface, inventory, city, eta=None, rests=0):
+        """
+        Dibuja información del pedido actual (eta: segundos estimados hasta la
+        entrega; rests: descansos que la ETA ya incluye).
+        """
         if inventory.current_order is None:
             return
         
@@ -257,13 +367,23 @@ class UIManager:
         self._draw_text(surface, f"Pickup: {order.pickup} → Dropoff: {order.dropoff}", 
                        x, y, self.font_small, self.colors['text'])
         y += 22
-        self._draw_text(surface, f"Deadline: {order.deadline.split('T')[1]}", 
+        deadline_text = f"Deadline: {order.deadline_clock(seconds=True)}"
+        if eta is not None:
+            deadline_text += " | ETA: sin ruta" if math.isinf(eta) else f" | ETA: {eta:.0f}s"
+            if rests and not math.isinf(eta):
+                deadline_text += f" ({rests} descansos)"
+        self._draw_text(surface, deadline_text, 
                        x, y, self.font_small, self.colors['text_dim'])
         
         self._draw_map_marker_camera(surface, order.dropoff, (255, 100, 100), "D")
     
-    def draw_available_orders(self, surface, orders, start_y=50):
-        """Dibuja panel de pedidos disponibles."""
+    def draw_available_orders(self, surface, orders, start_y=50, suggested=()):
+        """
+        Dibuja panel de pedidos disponibles.
+        
+        orders puede ser la lista de Order o el ranking (OrderScore) de OrderRanker;
+        los ids de suggested (selección bajo el peso máximo) se marcan con ✓.
+        """
         if not orders:
             return
         
@@ -280,25 +400,45 @@ class UIManager:
         
         y = start_y + 45
         for i, order in enumerate(orders[:5]):
-            self._draw_order_item(surface, order, panel_x + 10, y, panel_width - 20)
+            self._draw_order_item(surface, order, panel_x + 10, y, panel_width - 20, suggested)
             y += 70
     
-    def _draw_order_item(self, surface, order, x, y, width):
+    def _draw_order_item(self, surface, order, x, y, width, suggested=()):
         """Dibuja un item de pedido."""
-        color = self.colors['warning'] if order.get('priority', 0) > 0 else self.colors['text']
-        self._draw_text(surface, order['id'], x, y, self.font_small, color)
-        
-        if order.get('priority', 0) > 0:
-            self._draw_text(surface, f"⭐{order['priority']}", x + width - 30, y,
+        score = None
+        if isinstance(order, OrderScore):
+            score, order = order, order.order
+        priority = order.priority or 0
+        color = self.colors['warning'] if priority > 0 else self.colors['text']
+        label = f"✓ {order.id}" if order.id in suggested else order.id
+        self._draw_text(surface, label, x, y, self.font_small, color)
+        
+        if priority > 0:
+            self._draw_text(surface, f"⭐{priority}", x + width - 30, y,
                            self.font_small, self.colors['warning'])
         
         y += 18
-        self._draw_text(surface, f"${order['payout']} | {order['weight']}kg", 
+        self._draw_text(surface, f"${order.payout} | {order.weight}kg", 
                        x, y, self.font_small, self.colors['text_dim'])
         y += 16
-        deadline_time = order['deadline'].split('T')[1][:5]
-        self._draw_text(surface, f"⏰ {deadline_time}", x, y, 
+        self._draw_text(surface, f"⏰ {order.deadline_clock()}", x, y, 
                        self.font_small, self.colors['text_dim'])
+        
+        if score is not None:
+            # Ranking desde la posición actual
+            if not score.feasible:
+                self._draw_text(surface, "No llega a tiempo", x + 70, y,
+                               self.font_small, self.colors['danger'])
+            else:
+                self._draw_text(surface, f"${score.profit_per_second:.1f}/s | {int(score.slack)}s", x + 70, y,
+                               self.font_small, self.colors['success'])
+        # Anotaciones calculadas al cargar los pedidos
+        elif order.feasible is False:
+            self._draw_text(surface, "Imposible a tiempo", x + 70, y,
+                           self.font_small, self.colors['danger'])
+        elif order.min_travel_time is not None:
+            self._draw_text(surface, f"Viaje ≥ {int(order.min_travel_time)}s", x + 70, y,
+                           self.font_small, self.colors['text_dim'])
     
     def _draw_map_marker_camera(self, surface, pos, color, text):
         """Dibuja marcador considerando la cámara"""
@@ -0,0 +1,79 @@
+import random
+import pytest
+from src.logic.city import City
+from src.logic.chunked_city import ChunkedCity
+
+
+@pytest.fixture
+def map_data():
+    rng = random.Random(7)
+    width, height = 23, 17
+    return {
+        "version": "1.0",
+        "width": width,
+        "height": height,
+        "tiles": ["".join(rng.choice("CCPB") for _ in range(width)) for _ in range(height)],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.95},
+            "B": {"blocked": True}
+        },
+        "goal": 1000
+    }
+
+
+def test_same_answers_as_city(map_data, tmp_path):
+    city = City(map_data)
+    chunked = ChunkedCity.create(tmp_path / "map", map_data, chunk_size=5)
+
+    for y in range(-1, city.height + 1):
+        for x in range(-1, city.width + 1):
+            assert chunked.get_tile(x, y) == city.get_tile(x, y)
+            assert chunked.is_blocked(x, y) == city.is_blocked(x, y)
+            assert chunked.get_surface_weight(x, y) == city.get_surface_weight(x, y)
+
+
+def test_memory_budget_evicts_chunks(map_data, tmp_path):
+    budget = 5 * 5 * 6 * 2
+    chunked = ChunkedCity.create(tmp_path / "map", map_data, chunk_size=5,
+                                 memory_budget=budget)
+    for y in range(chunked.height):
+        for x in range(chunked.width):
+            chunked.get_tile(x, y)
+    assert chunked._loaded_bytes <= budget
+    assert len(chunked._chunks) < 20
+
+
+def test_set_tile_survives_eviction(map_data, tmp_path):
+    chunked = ChunkedCity.create(tmp_path / "map", map_data, chunk_size=5,
+                                 memory_budget=5 * 5 * 6)
+    chunked.set_tile(0, 0, "B")
+    chunked.get_tile(22, 16)
+    assert chunked.get_tile(0, 0) == "B"
+    assert chunked.is_blocked(0, 0)
+
+
+def test_pathfinding_on_chunked_city(map_data, tmp_path):
+    city = City(map_data)
+    chunked = ChunkedCity.create(tmp_path / "map", map_data, chunk_size=5)
+    start, goal = city.walkable_cells[0], city.walkable_cells[-1]
+    start = (start % city.width, start // city.width)
+    goal = (goal % city.width, goal // city.width)
+    assert chunked.path_cost(start, goal) == pytest.approx(city.path_cost(start, goal))
+    x, y = chunked.get_random_walkable_position()
+    assert not city.is_blocked(x, y)
+
+
+def test_walkable_cells_by_chunks(map_data, tmp_path):
+    city = City(map_data)
+    chunked = ChunkedCity.create(tmp_path / "map", map_data, chunk_size=5)
+    walkable = chunked.walkable_cells
+    assert sorted(walkable) == list(city.walkable_cells)
+    assert len(walkable) == len(city.walkable_cells)
+    assert [walkable[i] for i in range(len(walkable))] == list(walkable)
+    assert walkable[-1] == list(walkable)[-1]
+
+    x, y = walkable[0] % city.width, walkable[0] // city.width
+    chunked.set_tile(x, y, "B")
+    assert len(walkable) == len(city.walkable_cells) - 1
+    assert y * city.width + x not in list(walkable)
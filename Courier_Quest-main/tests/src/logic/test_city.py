@@ -0,0 +1,198 @@
+import pytest
+from src.logic.city import City
+
+
+@pytest.fixture
+def map_data():
+    return {
+        "version": "1.0",
+        "width": 5,
+        "height": 4,
+        "tiles": [
+            "BBBBB",
+            "BCCPB",
+            "BCBCB",
+            "BBBBB"
+        ],
+        "legend": {
+            "C": {"name": "calle", "surface_weight": 1.0},
+            "P": {"name": "parque", "surface_weight": 0.95},
+            "B": {"name": "edificio", "blocked": True}
+        },
+        "goal": 1500
+    }
+
+
+@pytest.fixture
+def city(map_data):
+    return City(map_data)
+
+
+def test_get_tile(city):
+    assert city.get_tile(1, 1) == "C"
+    assert city.get_tile(3, 1) == "P"
+    assert city.get_tile(0, 0) == "B"
+    assert city.get_tile(-1, 0) is None
+    assert city.get_tile(5, 0) is None
+
+
+def test_is_blocked(city):
+    assert city.is_blocked(0, 0) is True
+    assert city.is_blocked(1, 1) is False
+    assert city.is_blocked(2, 2) is True
+    assert city.is_blocked(10, 10) is True
+
+
+def test_surface_weight(city):
+    assert city.get_surface_weight(1, 1) == 1.0
+    assert city.get_surface_weight(3, 1) == pytest.approx(0.95)
+    assert city.get_surface_weight(-1, -1) == 1.0
+
+
+def test_unknown_tile_is_blocked(map_data):
+    map_data["tiles"][1] = "BCXPB"
+    city = City(map_data)
+    assert city.get_tile(2, 1) == "X"
+    assert city.is_blocked(2, 1) is True
+
+
+def test_walkable_cells(city):
+    walkable = {(i % city.width, i // city.width) for i in city.walkable_cells}
+    assert walkable == {(1, 1), (2, 1), (3, 1), (1, 2), (3, 2)}
+
+
+def test_random_walkable_position(city):
+    for _ in range(20):
+        x, y = city.get_random_walkable_position()
+        assert not city.is_blocked(x, y)
+
+
+def test_shortest_path(city):
+    path = city.shortest_path([1, 2], [3, 2])
+    assert path[0] == [1, 2]
+    assert path[-1] == [3, 2]
+    assert len(path) == 5
+    assert all(not city.is_blocked(x, y) for x, y in path)
+
+
+def test_path_cost_uses_surface_weight(city):
+    # (1,2) -> (1,1) -> (2,1) -> (3,1) parque -> (3,2)
+    assert city.path_cost([1, 2], [3, 2]) == pytest.approx(1.0 + 1.0 + 0.95 + 1.0)
+
+
+def test_unreachable_path(city):
+    assert city.shortest_path([1, 1], [0, 0]) is None
+    assert city.path_cost([1, 1], [0, 0]) == float("inf")
+
+
+def test_path_cache_invalidated_on_change(city):
+    assert city.shortest_path([1, 2], [3, 2]) is not None
+    city.set_tile(2, 1, "B")
+    assert city.shortest_path([1, 2], [3, 2]) is None
+    city.set_tile(2, 1, "C")
+    assert city.path_cost([1, 2], [3, 2]) == pytest.approx(3.95)
+
+
+def test_path_cache_invalidated_on_version(city):
+    city.path_cost([1, 2], [3, 2])
+    city.version = "2.0"
+    city.path_cost([1, 1], [2, 1])
+    assert list(city._path_cache) == [("2.0", (1, 1), (2, 1))]
+
+
+def test_nearest_walkable(city):
+    assert city.nearest_walkable(1, 1) == [1, 1]
+    assert city.nearest_walkable(2, 2) in ([1, 2], [3, 2], [2, 1])
+    assert city.nearest_walkable(0, 0) in ([1, 0], [0, 1], [1, 1])
+    x, y = city.nearest_walkable(-5, 20)
+    assert not city.is_blocked(x, y)
+
+
+def test_nearest_walkable_after_change(city):
+    city.set_tile(1, 1, "B")
+    assert city.nearest_walkable(1, 1) != [1, 1]
+
+
+def test_components(map_data):
+    map_data["tiles"][2] = "BCBBB"
+    map_data["tiles"][3] = "BBBCB"
+    city = City(map_data)
+    assert city.component_of(1, 1) == city.component_of(1, 2)
+    assert city.component_of(0, 0) == -1
+    assert city.is_reachable([1, 2], [3, 1])
+    assert not city.is_reachable([1, 1], [3, 3])
+    assert not city.is_reachable([1, 1], [0, 0])
+
+
+def test_nearest_in_component(map_data):
+    map_data["tiles"][3] = "BBBCB"
+    map_data["tiles"][2] = "BCBBB"
+    city = City(map_data)
+    label = city.component_of(1, 1)
+    assert city.nearest_in_component_many([(3, 3)], label) == [[3, 1]]
+
+
+def test_apply_patch_components(city):
+    assert city.is_reachable([1, 1], [3, 2])
+    city.apply_patch({"version": "1.1", "changes": [{"x": 2, "y": 1, "tile": "B"}]})
+    assert city.version == "1.1"
+    assert city.is_reachable([1, 1], [1, 2])
+    assert not city.is_reachable([1, 1], [3, 2])
+    assert city.nearest_walkable(2, 1) in ([1, 1], [3, 1])
+
+    city.apply_patch({"version": "1.2", "changes": [[2, 2, "C"]]})
+    assert city.is_reachable([1, 1], [3, 2])
+    assert city.nearest_walkable(2, 2) == [2, 2]
+
+
+def test_apply_patch_keeps_unaffected_paths(city):
+    city.path_cost([1, 1], [1, 2])
+    city.path_cost([1, 1], [3, 1])
+    applied = city.apply_patch({"version": "1.1", "changes": [[3, 2, "P"]]})
+    assert applied == [(3, 2, 1.0)]
+    # La ruta que no toca la celda sigue en caché con la versión nueva
+    assert ("1.1", (1, 1), (1, 2)) in city._path_cache
+    assert ("1.1", (1, 1), (3, 1)) in city._path_cache
+
+    city.apply_patch({"version": "1.2", "changes": [[2, 1, "B"]]})
+    assert ("1.2", (1, 1), (1, 2)) in city._path_cache
+    assert ("1.2", (1, 1), (3, 1)) not in city._path_cache
+    assert city.shortest_path([1, 1], [3, 1]) is None
+
+
+def test_apply_patch_same_cell_twice(map_data):
+    map_data.update(width=3, height=1, tiles=["CBC"])
+    city = City(map_data)
+    applied = city.apply_patch({"version": "1.1", "changes": [[1, 0, "C"], [1, 0, "B"]]})
+    assert applied == []
+    assert city.is_blocked(1, 0)
+    assert 1 not in city.walkable_cells
+    assert not city.is_reachable([0, 0], [2, 0])
+
+
+def test_apply_patch_errors(city):
+    with pytest.raises(ValueError):
+        city.apply_patch({"version": "2.0", "base_version": "0.9", "changes": [[1, 1, "B"]]})
+    with pytest.raises(IndexError):
+        city.apply_patch({"version": "2.0", "changes": [[1, 1, "B"], [9, 9, "C"]]})
+    assert city.version == "1.0"
+    assert city.get_tile(1, 1) == "C"
+
+
+def test_from_rows_with_legend_after_tiles(map_data):
+    import io
+    import json
+    from src.logic.json_stream import iter_json_array
+
+    # La leyenda llega después de las filas, como en un documento en streaming
+    document = {"data": {"tiles": map_data["tiles"], "version": "1.0", "legend": map_data["legend"]}}
+    rest = {}
+    rows = iter_json_array(io.BytesIO(json.dumps(document).encode()), ("data", "tiles"), rest, chunk_size=7)
+    streamed = City.from_rows(rows, rest)
+    city = City(map_data)
+
+    assert (streamed.width, streamed.height, streamed.version) == (5, 4, "1.0")
+    for y in range(city.height):
+        for x in range(city.width):
+            assert streamed.get_tile(x, y) == city.get_tile(x, y)
+    assert streamed.shortest_path([1, 1], [3, 2]) == city.shortest_path([1, 1], [3, 2])
@@ -0,0 +1,92 @@
+import os
+import threading
+import pytest
+from src.logic.city import City
+from src.logic.city_registry import CityEntry, CityRegistry
+
+
+def make_city(version, size=8):
+    return City({
+        "version": version,
+        "width": size,
+        "height": size,
+        "tiles": ["C" * size] * size,
+        "legend": {"C": {"surface_weight": 1.0}}
+    })
+
+
+class Loader:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, url, prepared=None):
+        self.release.wait(5)
+        self.calls.append(url)
+        if prepared is not None:
+            url, prepared_by = prepared
+            self.calls.append(prepared_by)
+        return CityEntry(url, make_city(url), [], None, None)
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+def test_get_loads_once(loader):
+    registry = CityRegistry(["a", "b"], loader=loader)
+    first = registry.get("a")
+    assert registry.get("a") is first
+    assert loader.calls == ["a"]
+    assert first.city.version == "a"
+    registry.close()
+
+
+def test_prefetch_in_background(loader):
+    registry = CityRegistry(["a", "b"], loader=loader)
+    registry.get("a")
+    loader.release.clear()
+    assert registry.prefetch(registry.next_url())
+    assert not registry.prefetch("b")
+    assert "b" not in registry
+
+    loader.release.set()
+    entry = registry.get("b")
+    assert entry.url == "b"
+    assert loader.calls == ["a", "b"]
+    registry.close()
+
+
+def test_lru_eviction_keeps_current(loader):
+    size = CityEntry("x", make_city("x"), [], None, None).memory_usage()
+    registry = CityRegistry(["a", "b", "c"], memory_budget=2 * size, loader=loader)
+    registry.get("a")
+    evicted = registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    # "b" es la menos usada; "c" es la actual
+    assert "b" not in registry
+    assert not evicted.city._listeners
+    assert "a" in registry and "c" in registry
+
+    registry.memory_budget = 0
+    registry.get("c")
+    assert len(registry) == 1 and "c" in registry
+    registry.close()
+
+
+def prepare_in_process(url):
+    return url, os.getpid()
+
+
+def test_prefetch_prepares_in_another_process(loader):
+    registry = CityRegistry(["a", "b"], loader=loader, preparer=prepare_in_process)
+    registry.get("a")
+    registry.prefetch("b")
+    entry = registry.get("b")
+    assert entry.url == "b"
+    assert loader.calls[:2] == ["a", "b"]
+    assert loader.calls[2] != os.getpid()
+    registry.close()
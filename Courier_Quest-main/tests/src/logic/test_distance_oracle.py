@@ -0,0 +1,97 @@
+import pytest
+from src.logic.city import City
+from src.logic.distance_oracle import DistanceOracle
+from src.logic.pathfinding import dijkstra_field
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.9},
+            "B": {"blocked": True}
+        }
+    })
+
+
+@pytest.fixture
+def jobs():
+    return [{"id": "PED-001", "pickup": [1, 1], "dropoff": [4, 3]}]
+
+
+def test_exact_distance_from_sources(city, jobs):
+    oracle = DistanceOracle.build(city, jobs, landmark_count=2)
+    assert oracle.distance([1, 1], [4, 3]) == pytest.approx(city.path_cost([1, 1], [4, 3]))
+    assert oracle.distance([4, 3], [1, 1]) == pytest.approx(city.path_cost([4, 3], [1, 1]))
+    assert oracle.distance([2, 3], [1, 1]) == pytest.approx(city.path_cost([2, 3], [1, 1]))
+
+
+def test_landmark_bounds(city):
+    oracle = DistanceOracle.build(city, landmark_count=3)
+    exact = city.path_cost([2, 1], [3, 3])
+    assert oracle.lower_bound([2, 1], [3, 3]) <= exact + 1e-6
+    assert oracle.distance([2, 1], [3, 3]) >= exact - 1e-6
+    assert oracle.distance([2, 1], [3, 3], exact=True) == pytest.approx(exact)
+
+
+def test_save_and_load(city, jobs, tmp_path):
+    oracle = DistanceOracle.build(city, jobs, landmark_count=2)
+    path = tmp_path / "oracle.bin"
+    oracle.save(path)
+
+    loaded = DistanceOracle.load(path, city)
+    assert loaded is not None
+    assert loaded.landmarks == oracle.landmarks
+    assert loaded.distance([1, 1], [4, 3]) == oracle.distance([1, 1], [4, 3])
+
+    city.version = "2.0"
+    assert DistanceOracle.load(path, city) is None
+
+
+def test_load_damaged_file(city, jobs, tmp_path):
+    path = tmp_path / "oracle.bin"
+    DistanceOracle.build(city, jobs, landmark_count=2).save(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    assert DistanceOracle.load(path, city) is None
+
+    path.write_bytes(b"\x80\x04no es un or\xc3\xa1culo")
+    assert DistanceOracle.load(path, city) is None
+
+    path.write_bytes(b"")
+    assert DistanceOracle.load(path, city) is None
+
+
+def test_fields_repaired_on_patch(city, jobs):
+    oracle = DistanceOracle.build(city, jobs, landmark_count=2)
+    city.apply_patch({"version": "1.1", "changes": [[2, 3, "B"], [2, 2, "P"]]})
+    for index, field in oracle.fields.items():
+        expected = dijkstra_field(city, (index % city.width, index // city.width))
+        assert list(field) == pytest.approx(list(expected))
+    assert oracle.distance([1, 1], [4, 3]) == pytest.approx(city.path_cost([1, 1], [4, 3]))
+
+
+def test_blocked_source_dropped(city, jobs):
+    oracle = DistanceOracle.build(city, jobs, landmark_count=0)
+    city.set_tile(1, 1, "B")
+    assert 1 * city.width + 1 not in oracle.fields
+    assert 3 * city.width + 4 in oracle.fields
+
+
+def test_close_stops_repairs(city, jobs):
+    oracle = DistanceOracle.build(city, jobs, landmark_count=0)
+    oracle.close()
+    assert not city._listeners
+    city.set_tile(1, 1, "B")
+    assert 1 * city.width + 1 in oracle.fields
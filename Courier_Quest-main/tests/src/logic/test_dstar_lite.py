@@ -0,0 +1,63 @@
+import math
+import pytest
+from src.logic.city import City
+from src.logic.dstar_lite import DStarLite
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.9},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def test_initial_path_matches_astar(city):
+    planner = DStarLite(city, (1, 1), (4, 3))
+    assert planner.current_cost() == pytest.approx(city.path_cost([1, 1], [4, 3]))
+    path = planner.current_path()
+    assert path[0] == [1, 1] and path[-1] == [4, 3]
+
+
+def test_replans_after_moving_and_blocking(city):
+    planner = DStarLite(city, (1, 1), (4, 3))
+    planner.update_start(2, 1)
+    planner.update_cost(3, 1, None)
+    assert planner.current_path()[:2] == [[2, 1], [1, 1]]
+    assert planner.current_cost() == pytest.approx(6.0)
+
+    planner.update_cost(1, 2, math.inf)
+    assert planner.current_path() is None
+
+    planner.update_cost(3, 1, 0.5)
+    assert planner.current_cost() == pytest.approx(0.5 + 1.0 + 1.0 + 1.0)
+
+
+def test_follows_city_changes(city):
+    planner = DStarLite(city, (1, 1), (4, 3))
+    city.set_tile(1, 2, "B")
+    assert planner.current_cost() == pytest.approx(city.path_cost([1, 1], [4, 3]))
+    city.set_tile(3, 1, "B")
+    assert planner.current_path() is None
+
+
+def test_close_stops_following_city(city):
+    planner = DStarLite(city, (1, 1), (4, 3))
+    cost = planner.current_cost()
+    planner.close()
+    assert not city._listeners
+    city.set_tile(1, 2, "B")
+    assert planner.current_cost() == pytest.approx(cost)
@@ -0,0 +1,65 @@
+from src.config.config import ORDER_WARNING_SECONDS, ORDER_EXPIRY_GRACE_SECONDS, REP_PENALTY_VERY_LATE
+from src.logic.city import OrderManager
+from src.logic.expiry_queue import ExpiryQueue
+from src.logic.order import Order
+from src.logic.player import Player
+
+
+def make_order(order_id, deadline, weight=1):
+    return Order(order_id, [1, 1], [2, 2], 100, deadline, weight, 0, 0)
+
+
+def test_pop_due_in_deadline_order():
+    queue = ExpiryQueue()
+    for order_id, deadline in (("PED-2", 200), ("PED-1", 100), ("PED-3", 300), ("PED-4", None)):
+        queue.push(make_order(order_id, deadline))
+    assert len(queue) == 3 and "PED-4" not in queue
+
+    assert queue.pop_due(50) == []
+    assert [order.id for _, order in queue.pop_due(250)] == ["PED-1", "PED-2"]
+    assert queue.next_time() == 300
+    assert queue.discard("PED-3")
+    assert queue.pop_due(1000) == [] and len(queue) == 0
+
+
+def test_stages_collapse_when_skipped():
+    queue = ExpiryQueue((("late", 0), ("warning", -60), ("expired", 120)))
+    queue.push(make_order("PED-1", 100))
+    queue.push(make_order("PED-2", 100))
+    assert [(stage, order.id) for stage, order in queue.pop_due(40)] == [("warning", "PED-1"), ("warning", "PED-2")]
+    queue.discard("PED-2")
+    # "late" y "expired" se cumplen a la vez: solo se informa la última
+    assert [(stage, order.id) for stage, order in queue.pop_due(500)] == [("expired", "PED-1")]
+    assert len(queue) == 0
+
+
+def test_order_manager_expires_available():
+    manager = OrderManager([
+        {"id": "PED-1", "pickup": [1, 1], "release_time": 0, "deadline": 100},
+        {"id": "PED-2", "pickup": [1, 1], "release_time": 0, "deadline": 200},
+    ])
+    manager.update_available(0)
+    assert [order.id for order in manager.expire_orders(150)] == ["PED-1"]
+    assert [order.id for order in manager.get_available()] == ["PED-2"]
+    assert [order.id for order in manager.orders_at(1, 1)] == ["PED-2"]
+
+    manager.remove_order("PED-2")
+    assert manager.expire_orders(1000) == []
+
+
+def test_player_deadline_stages():
+    player = Player(0, 0, 1000)
+    player.accept_order(make_order("PED-1", 100))
+    player.accept_order(make_order("PED-2", 1000))
+    reputation = player.reputation
+
+    assert [(stage, o.id) for stage, o in player.check_deadlines(100 - ORDER_WARNING_SECONDS)] == [("warning", "PED-1")]
+    assert player.inventory.deadline_alerts == {"PED-1": "warning"}
+    assert [(stage, o.id) for stage, o in player.check_deadlines(100)] == [("late", "PED-1")]
+
+    events = player.check_deadlines(100 + ORDER_EXPIRY_GRACE_SECONDS)
+    assert [(stage, o.id) for stage, o in events] == [("expired", "PED-1")]
+    assert player.reputation == reputation + REP_PENALTY_VERY_LATE
+    assert player.inventory.order_count == 1 and player.inventory.current_weight == 1
+    assert player.inventory.current_order.order.id == "PED-2"
+    assert player.inventory.deadline_alerts == {}
@@ -0,0 +1,68 @@
+import random
+import pytest
+from src.logic.city import City
+from src.logic.hpa import HierarchicalPathfinder
+
+
+@pytest.fixture
+def city():
+    random.seed(3)
+    rows = []
+    for y in range(20):
+        row = ""
+        for x in range(20):
+            if x in (0, 19) or y in (0, 19):
+                row += "B"
+            elif x == 9 and y != 14:
+                row += "B"
+            else:
+                row += random.choice("CCCP")
+        rows.append(row)
+    return City({
+        "version": "1.0",
+        "width": 20,
+        "height": 20,
+        "tiles": rows,
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.9},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def _walk_cost(city, path):
+    for (ax, ay), (bx, by) in zip(path, path[1:]):
+        assert abs(ax - bx) + abs(ay - by) == 1
+        assert not city.is_blocked(bx, by)
+    return sum(city.get_surface_weight(x, y) for x, y in path[1:])
+
+
+def test_path_is_valid_and_near_optimal(city):
+    hpa = HierarchicalPathfinder(city, cluster_size=5)
+    for start, goal in (([1, 1], [18, 18]), ([2, 17], [17, 2]), ([3, 3], [4, 4])):
+        path, cost = hpa.find_path(start, goal)
+        exact = city.path_cost(start, goal)
+        assert path[0] == start and path[-1] == goal
+        assert _walk_cost(city, path) == pytest.approx(cost)
+        assert exact - 1e-6 <= cost <= exact * 1.5
+
+
+def test_unreachable(city):
+    city.set_tile(9, 14, "B")
+    hpa = HierarchicalPathfinder(city, cluster_size=5)
+    assert hpa.shortest_path([1, 1], [18, 1]) is None
+
+
+def test_incremental_update_matches_rebuild(city):
+    hpa = HierarchicalPathfinder(city, cluster_size=5)
+    assert hpa.path_cost([1, 1], [18, 1]) < float("inf")
+
+    city.set_tile(9, 14, "B")
+    assert hpa.shortest_path([1, 1], [18, 1]) is None
+
+    city.set_tile(9, 3, "C")
+    fresh = HierarchicalPathfinder(city, cluster_size=5)
+    assert hpa._inter == fresh._inter
+    assert hpa._intra == fresh._intra
+    assert hpa.path_cost([1, 1], [18, 1]) == pytest.approx(fresh.path_cost([1, 1], [18, 1]))
@@ -0,0 +1,60 @@
+import math
+import pytest
+from src.logic.city import City
+from src.logic.player import Player
+from src.logic.isochrone import isochrone
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.5},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def test_times_follow_speed_model(city):
+    player = Player(1, 1, 1000)
+    iso = isochrone(city, player, 10, "clear")
+    # base_speed 3: cada calle tarda 1/3 s y el parque 1/1.5 s
+    assert iso.time_at(1, 1) == 0
+    assert iso.time_at(2, 1) == pytest.approx(1 / 3)
+    assert iso.time_at(3, 1) == pytest.approx(1 / 3 + 1 / 1.5)
+    assert iso.time_at(4, 3) == pytest.approx(5 / 3)
+    assert math.isinf(iso.time_at(2, 2))
+
+
+def test_budget_limits_region(city):
+    player = Player(1, 1, 1000)
+    iso = isochrone(city, player, 0.7, "clear")
+    assert iso.contains(1, 3) and not iso.contains(2, 3)
+    assert (iso.x0, iso.y0, iso.width, iso.height) == (1, 1, 2, 3)
+    assert len(iso) == 4
+
+    jobs = [{"id": "A", "pickup": [2, 1]}, {"id": "B", "pickup": [4, 3]}]
+    assert [job["id"] for job in iso.filter_orders(jobs)] == ["A"]
+
+
+def test_stamina_limits_moves(city):
+    player = Player(1, 1, 1000)
+    player.stamina = 1.0
+    iso = isochrone(city, player, 100, "clear")
+    # Consumo base 0.5: solo dos movimientos antes de quedar exhausto
+    assert iso.contains(3, 1) and iso.contains(1, 3)
+    assert not iso.contains(4, 1)
+
+    player.is_exhausted = True
+    assert len(isochrone(city, player, 100, "clear")) == 1
@@ -0,0 +1,62 @@
+import pytest
+from src.logic.city import City
+from src.logic.job_enrichment import compute_annotations, apply_annotations
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.5},
+            "B": {"blocked": True}
+        }
+    })
+
+
+@pytest.fixture
+def jobs():
+    return [
+        {"id": "A", "pickup": [1, 1], "dropoff": [4, 1],
+         "deadline": "2025-09-01T12:01:00", "release_time": 0},
+        {"id": "B", "pickup": [1, 1], "dropoff": [4, 3],
+         "deadline": "2025-09-01T12:00:10", "release_time": 9},
+        {"id": "C", "pickup": [4, 3], "dropoff": [1, 3],
+         "deadline": "2025-09-01T12:00:10", "release_time": 0}
+    ]
+
+
+def test_annotations(city, jobs):
+    annotations = compute_annotations(city, jobs, base_speed=1)
+
+    a = annotations["A"]
+    assert a["route_cost"] == pytest.approx(city.path_cost([1, 1], [4, 1]))
+    # El parque cuesta poco en peso pero es lento: 1 + 2 + 1 segundos
+    assert a["min_travel_time"] == pytest.approx(4.0)
+    assert a["latest_pickup_time"] == pytest.approx(56.0)
+    assert a["feasible"]
+
+    b = annotations["B"]
+    assert b["min_travel_time"] == pytest.approx(5.0)
+    assert b["latest_pickup_time"] == pytest.approx(5.0)
+    assert not b["feasible"]
+
+    assert annotations["C"]["feasible"]
+
+
+def test_apply_annotations(city, jobs):
+    city.set_tile(1, 3, "B")
+    annotated = apply_annotations(jobs, compute_annotations(city, jobs, base_speed=1))
+    assert annotated[2]["route_cost"] is None
+    assert annotated[2]["feasible"] is False
+    assert annotated[0]["min_travel_time"] == pytest.approx(4.0)
@@ -0,0 +1,39 @@
+import io
+import json
+import pytest
+from src.logic.json_stream import iter_json_array
+
+
+JOBS = [
+    {"id": "PED-1", "pickup": [1, 2], "payout": 120.5, "notes": "entrega rápida ñandú"},
+    {"id": "PED-2", "pickup": [3, 4], "payout": 80, "notes": None},
+    {"id": "PED-3", "pickup": [5, 6], "payout": 1e3, "notes": "🚲"},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 64 * 1024])
+def test_streams_nested_array(chunk_size):
+    document = {"status": "ok", "data": {"count": 3, "jobs": JOBS, "page": 1}}
+    fp = io.BytesIO(json.dumps(document, ensure_ascii=False).encode("utf-8"))
+    rest = {}
+    assert list(iter_json_array(fp, ("data", "jobs"), rest, chunk_size=chunk_size)) == JOBS
+    assert rest == {"count": 3, "page": 1}
+
+
+def test_missing_keys_are_skipped_and_top_level_arrays():
+    assert list(iter_json_array(io.StringIO(json.dumps({"jobs": JOBS})), ("data", "jobs"))) == JOBS
+    assert list(iter_json_array(io.StringIO(json.dumps(JOBS)), ("data", "jobs"))) == JOBS
+    assert list(iter_json_array(io.StringIO('{"data": {"jobs": []}}'), ("data", "jobs"))) == []
+
+
+def test_numbers_at_chunk_boundaries():
+    values = [12345678, -0.125, 3e10, 7]
+    fp = io.StringIO(json.dumps(values))
+    assert list(iter_json_array(fp, (), chunk_size=2)) == values
+
+
+def test_errors():
+    with pytest.raises(KeyError):
+        list(iter_json_array(io.StringIO('{"data": {"other": 1}}'), ("data", "jobs")))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"jobs": [1 2]}'), ("jobs",)))
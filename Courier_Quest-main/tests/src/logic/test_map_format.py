@@ -0,0 +1,77 @@
+import pytest
+from src.logic.city import City
+from src.logic.map_format import load_map, write_map, publish_shared, attach_shared
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 5,
+        "height": 4,
+        "tiles": [
+            "BBBBB",
+            "BCCPB",
+            "BCBCB",
+            "BBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.95},
+            "B": {"blocked": True}
+        },
+        "goal": 1500
+    })
+
+
+def test_roundtrip(city, tmp_path):
+    path = tmp_path / "ciudad.cqmap"
+    write_map(path, city, source_hash="abc")
+
+    loaded = load_map(path, "abc")
+    assert loaded is not None
+    assert isinstance(loaded.tile_grid, memoryview)
+    assert (loaded.version, loaded.width, loaded.height, loaded.goal) == ("1.0", 5, 4, 1500)
+    assert loaded.tiles == city.tiles
+    assert list(loaded.walkable_cells) == list(city.walkable_cells)
+    assert loaded.content_hash() == city.content_hash()
+    for y in range(city.height):
+        for x in range(city.width):
+            assert loaded.is_blocked(x, y) == city.is_blocked(x, y)
+            assert loaded.get_surface_weight(x, y) == city.get_surface_weight(x, y)
+
+
+def test_source_hash_mismatch(city, tmp_path):
+    path = tmp_path / "ciudad.cqmap"
+    write_map(path, city, source_hash="abc")
+    assert load_map(path, "otro") is None
+    assert load_map(tmp_path / "no_existe.cqmap") is None
+
+
+def test_edit_loaded_map(city, tmp_path):
+    path = tmp_path / "ciudad.cqmap"
+    write_map(path, city)
+    loaded = load_map(path)
+
+    loaded.set_tile(2, 2, "C")
+    assert not loaded.is_blocked(2, 2)
+    assert loaded.path_cost([1, 2], [3, 2]) == pytest.approx(2.0)
+    # El archivo en disco no cambia
+    assert load_map(path).is_blocked(2, 2)
+
+
+def test_shared_memory(city):
+    shm = publish_shared(city)
+    try:
+        shared = attach_shared(shm.name)
+        assert shared.tiles == city.tiles
+        assert shared.path_cost([1, 1], [3, 2]) == city.path_cost([1, 1], [3, 2])
+        assert shared.content_hash() == city.content_hash()
+        # Las grillas son vistas de solo lectura sobre el mismo bloque
+        assert shared.tile_grid.readonly
+        with pytest.raises(TypeError):
+            shared.set_tile(1, 1, "B")
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
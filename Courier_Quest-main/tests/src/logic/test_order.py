@@ -0,0 +1,40 @@
+import math
+import sys
+from src.logic.order import Order, deadline_seconds
+from src.logic.player import Player
+
+
+def make_order(deadline="2025-09-01T12:10:30"):
+    return Order.from_dict({"id": "PED-" + "001", "pickup": [1, 1], "dropoff": [2, 2], "payout": 100,
+                            "deadline": deadline, "weight": 1, "priority": 0, "release_time": 0,
+                            "feasible": True})
+
+
+def test_deadline_parsed_once():
+    order = make_order()
+    assert order.deadline_seconds == 630.0
+    assert order.deadline == "2025-09-01T12:10:30"
+    assert order.deadline_clock() == "12:10"
+    assert order.deadline_clock(seconds=True) == "12:10:30"
+    assert order.feasible is True
+    assert order.id is sys.intern("PED-001")
+    assert not hasattr(order, "__dict__")
+
+
+def test_missing_deadline():
+    order = make_order(None)
+    assert math.isinf(order.deadline_seconds)
+    assert order.deadline is None
+    assert deadline_seconds(None) is None
+    assert deadline_seconds(12) == 12.0
+
+
+def test_complete_delivery_with_game_seconds():
+    player = Player(0, 0, 1000)
+    player.accept_order(make_order())
+    result = player.complete_delivery(600.0)
+    assert result["rep_change"] > 0
+
+    player.accept_order(make_order())
+    result = player.complete_delivery(630.0 + 200)
+    assert result["rep_change"] < 0
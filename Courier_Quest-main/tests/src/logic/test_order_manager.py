@@ -0,0 +1,61 @@
+from src.logic.city import OrderManager
+
+
+def make_orders():
+    return [
+        {"id": "PED-3", "pickup": [1, 1], "release_time": 60},
+        {"id": "PED-1", "pickup": [2, 1], "release_time": 0},
+        {"id": "PED-2", "pickup": [3, 1], "release_time": 30},
+        {"id": "PED-4", "pickup": [4, 1]},
+    ]
+
+
+def test_update_available_releases_in_order():
+    manager = OrderManager(make_orders())
+    manager.update_available(0)
+    assert [o.id for o in manager.get_available()] == ["PED-1", "PED-4"]
+    manager.update_available(45)
+    assert [o.id for o in manager.get_available()] == ["PED-1", "PED-4", "PED-2"]
+    assert manager.next_release_time() == 60
+
+
+def test_advance_to_returns_released():
+    manager = OrderManager(make_orders())
+    released = manager.advance_to(1000)
+    assert [o.id for o in released] == ["PED-1", "PED-4", "PED-2", "PED-3"]
+    assert manager.advance_to(2000) == []
+    assert manager.next_release_time() is None
+
+
+def test_add_orders_and_duplicates():
+    manager = OrderManager(make_orders())
+    manager.advance_to(100)
+    manager.add_orders([{"id": "PED-5", "release_time": 120}, {"id": "PED-1", "release_time": 130}])
+    assert [o.id for o in manager.advance_to(200)] == ["PED-5"]
+    assert len(manager.all_orders) == 6
+
+
+def test_spatial_queries():
+    manager = OrderManager([
+        {"id": "A", "pickup": [1, 1]},
+        {"id": "B", "pickup": [1, 1]},
+        {"id": "C", "pickup": [10, 3]},
+        {"id": "D", "pickup": [30, 30]},
+    ], cell_size=4)
+    manager.advance_to(0)
+    assert [o.id for o in manager.orders_at(1, 1)] == ["A", "B"]
+    assert manager.orders_at(2, 2) == []
+    assert sorted(o.id for o in manager.orders_in_rect(0, 0, 10, 3)) == ["A", "B", "C"]
+    assert sorted(o.id for o in manager.orders_within(8, 2, 3)) == ["C"]
+    assert sorted(o.id for o in manager.orders_within(8, 2, 8)) == ["A", "B", "C"]
+
+
+def test_remove_order_updates_indexes():
+    manager = OrderManager([{"id": "A", "pickup": [1, 1]}, {"id": "B", "pickup": [2, 1]}])
+    manager.advance_to(0)
+    assert manager.get("A").pickup == [1, 1]
+    assert manager.remove_order("A").id == "A"
+    assert manager.remove_order("A") is None
+    assert manager.get("A") is None
+    assert manager.orders_at(1, 1) == []
+    assert [o.id for o in manager.get_available()] == ["B"]
@@ -0,0 +1,126 @@
+import math
+import random
+import pytest
+from src.logic.city import City
+from src.logic.order import Order
+from src.logic.order_ranking import OrderRanker
+from src.logic.travel_time import TravelTimeRouter
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.5},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def make_order(order_id, pickup, dropoff, payout=100, deadline=1000, weight=1, priority=0):
+    return Order(order_id, pickup, dropoff, payout, deadline, weight, priority, 0)
+
+
+def test_scores_match_router(city):
+    walkable = [(x, y) for y in range(city.height) for x in range(city.width) if not city.is_blocked(x, y)]
+    rng = random.Random(3)
+    orders = [make_order(f"PED-{i}", list(rng.choice(walkable)), list(rng.choice(walkable)),
+                         payout=rng.randint(50, 300), deadline=rng.randint(10, 40)) for i in range(20)]
+    ranker = OrderRanker(city, base_speed=2)
+    router = TravelTimeRouter(city, base_speed=2)
+
+    ranking = ranker.rank(orders, (1, 3), 5, weather="rain", speed_factor=0.9)
+    assert len(ranking) == 20
+    for score in ranking:
+        order = score.order
+        expected = (router.eta((1, 3), order.pickup, "rain", 0.9)
+                    + router.eta(order.pickup, order.dropoff, "rain", 0.9))
+        assert score.travel_time == pytest.approx(expected, rel=1e-5)
+        assert score.slack == pytest.approx(order.deadline_seconds - 5 - expected, rel=1e-5)
+        assert score.feasible == (score.slack >= 0)
+
+    keys = [score.sort_key() for score in ranking]
+    assert keys == sorted(keys, reverse=True)
+    assert [s.order.id for s in ranker.rank(orders, (1, 3), 5, "rain", 0.9, k=3)] == \
+        [s.order.id for s in ranking[:3]]
+
+
+def test_capacity_deadline_and_incremental_updates(city):
+    near = make_order("PED-1", [2, 1], [1, 1], payout=50)
+    heavy = make_order("PED-2", [1, 2], [1, 3], payout=500, weight=8)
+    late = make_order("PED-3", [4, 3], [4, 1], payout=900, deadline=1)
+    orders = [near, heavy, late]
+    ranker = OrderRanker(city)
+
+    ranking = ranker.rank(orders, (1, 1), 0, capacity=5)
+    assert [s.order.id for s in ranking][0] == "PED-1"
+    assert [s.feasible for s in ranking] == [True, False, False]
+
+    # Misma posición: los puntajes se reutilizan y solo cambia la holgura
+    first = {s.order.id: s for s in ranking}
+    again = ranker.rank(orders, (1, 1), 10, capacity=5)
+    assert all(first[s.order.id] is s for s in again)
+    assert first["PED-1"].slack == pytest.approx(1000 - 10 - first["PED-1"].travel_time)
+
+    # Un pedido nuevo se agrega sin recalcular los demás
+    orders = orders + [make_order("PED-4", [3, 3], [2, 3])]
+    updated = {s.order.id: s for s in ranker.rank(orders, (1, 1), 10, capacity=10)}
+    assert updated["PED-2"].feasible
+    moved = ranker.rank(orders[1:], (4, 3), 10, capacity=10)
+    assert "PED-1" not in {s.order.id for s in moved}
+    assert math.isinf(ranker.rank(orders, (0, 0), 10)[0].travel_time)
+
+
+def test_map_changes_are_applied(city):
+    order = make_order("PED-1", [1, 1], [4, 1])
+    ranker = OrderRanker(city)
+    before = ranker.rank([order], (1, 1), 0)[0].travel_time
+    city.apply_patch({"version": "1.1", "changes": [[3, 1, "C"]]})
+    after = ranker.rank([order], (1, 1), 0)[0].travel_time
+    assert after < before
+
+
+def test_courier_field_is_built_in_slices():
+    size = 40
+    rows = ["".join("P" if (x + y) % 7 == 0 else "C" for x in range(size)) for y in range(size)]
+    big = City({"width": size, "height": size, "tiles": rows,
+                "legend": {"C": {"surface_weight": 1.0}, "P": {"surface_weight": 0.5}}})
+    rng = random.Random(5)
+    orders = [make_order(f"PED-{i}", [rng.randrange(size), rng.randrange(size)],
+                         [rng.randrange(size), rng.randrange(size)]) for i in range(10)]
+    ranker = OrderRanker(big)
+    router = TravelTimeRouter(big)
+
+    def exact(position, order):
+        return router.eta(position, order.pickup, "clear") + router.eta(order.pickup, order.dropoff, "clear")
+
+    # Sin campo todavía: cota inferior
+    for score in ranker.rank(orders, (10, 10), 0, budget_ms=0):
+        assert score.travel_time <= exact((10, 10), score.order) + 1e-6
+    assert ranker.pending
+    rounds = 1
+    while ranker.pending:
+        ranking = ranker.rank(orders, (10, 10), 0, budget_ms=0)
+        rounds += 1
+    assert rounds > 2
+    for score in ranking:
+        assert score.travel_time == pytest.approx(exact((10, 10), score.order), rel=1e-5)
+
+    # Al moverse se usa el campo anterior como cota superior mientras se hace el nuevo
+    for score in ranker.rank(orders, (11, 10), 0, budget_ms=0):
+        assert score.travel_time >= exact((11, 10), score.order) - 1e-4
+    assert ranker.pending
+    ranker.close()
+    router.close()
+    assert not big._listeners
@@ -0,0 +1,70 @@
+import itertools
+import random
+import pytest
+from src.logic.order import Order
+from src.logic.order_selection import select_orders
+
+
+def make_order(order_id, payout, weight, feasible=None):
+    return Order(order_id, [0, 0], [1, 1], payout, None, weight, 0, 0, feasible=feasible)
+
+
+def best_payout(orders, capacity):
+    best = 0
+    for size in range(len(orders) + 1):
+        for subset in itertools.combinations(orders, size):
+            if sum(o.weight for o in subset) <= capacity:
+                best = max(best, sum(o.payout for o in subset))
+    return best
+
+
+def test_prefers_heavier_better_paying_order():
+    light = [make_order("PED-1", 100, 3), make_order("PED-2", 90, 3)]
+    heavy = make_order("PED-3", 250, 6)
+    chosen = select_orders(light + [heavy], 7)
+    assert [o.id for o in chosen] == ["PED-3"]
+    assert [o.id for o in select_orders(light + [heavy], 9)] == ["PED-1", "PED-3"]
+    assert select_orders(light, 2) == []
+
+
+@pytest.mark.parametrize("fractional", [False, True])
+def test_matches_brute_force(fractional):
+    rng = random.Random(5)
+    for _ in range(100):
+        orders = [make_order(f"PED-{i}", rng.randint(1, 400), rng.randint(1, 8) + (rng.random() if fractional else 0))
+                  for i in range(rng.randint(0, 9))]
+        capacity = rng.randint(0, 15)
+        chosen = select_orders(orders, capacity)
+        assert sum(o.weight for o in chosen) <= capacity
+        payout = sum(o.payout for o in chosen)
+        optimum = best_payout(orders, capacity)
+        # Con pocos pedidos la selección es exacta aunque los pesos no sean enteros
+        assert payout == pytest.approx(optimum)
+
+        # DP por valor escalado: al menos (1 - epsilon) del óptimo
+        scaled = select_orders(orders, capacity, dp_cells=0, exact_items=0)
+        assert sum(o.weight for o in scaled) <= capacity
+        assert sum(o.payout for o in scaled) >= 0.8 * optimum - 1e-9
+
+        # Greedy (muchos pedidos): al menos la mitad del óptimo
+        greedy = select_orders(orders, capacity, dp_cells=0, exact_items=0, fptas_items=0)
+        assert sum(o.weight for o in greedy) <= capacity
+        assert sum(o.payout for o in greedy) >= optimum / 2 - 1e-9
+
+
+def test_feasibility_and_value():
+    orders = [make_order("PED-1", 300, 5, feasible=False), make_order("PED-2", 100, 5, feasible=True),
+              make_order("PED-3", 120, 5, feasible=True)]
+    chosen = select_orders(orders, 5, feasible=lambda o: o.feasible)
+    assert [o.id for o in chosen] == ["PED-3"]
+    chosen = select_orders(orders, 5, value=lambda o: 1000 if o.id == "PED-2" else o.payout)
+    assert [o.id for o in chosen] == ["PED-2"]
+
+
+def test_chosen_set_must_be_deliverable():
+    orders = [make_order("PED-1", 300, 1.5), make_order("PED-2", 200, 1), make_order("PED-3", 100, 1)]
+    # PED-1 y PED-2 no alcanzan a entregarse juntos
+    deliverable = lambda chosen: not {"PED-1", "PED-2"} <= {o.id for o in chosen}
+    chosen = select_orders(orders, 10, deliverable=deliverable)
+    assert [o.id for o in chosen] == ["PED-1", "PED-3"]
+    assert select_orders(orders, 10, deliverable=lambda chosen: False, max_checks=2) == []
@@ -1,3 +1,4 @@
+import json
 import pytest
 from src.logic import proxy
 from src.logic.weather import Weather
@@ -13,4 +14,156 @@ def test_get_weather(proxy_instance):
     assert hasattr(weather, 'state')
     assert hasattr(weather, 'transition')
     assert isinstance(weather.transition, dict)
-    assert weather.state in weather.transition
\ No newline at end of file
+    assert weather.state in weather.transition
+
+@pytest.fixture
+def offline_proxy(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise proxy.requests.RequestException("sin red")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(proxy.requests, "get", fail)
+    monkeypatch.setattr(proxy.Proxy, "_instances", {})
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "ciudad.json").write_text(json.dumps({"data": {
+        "version": "1.0", "width": 3, "height": 1, "tiles": ["CCC"],
+        "legend": {"C": {"surface_weight": 1.0}, "B": {"blocked": True}}
+    }}))
+    return proxy.Proxy("http://ciudad-prueba/")
+
+
+def test_map_patch_is_logged_and_replayed(offline_proxy, tmp_path):
+    city = offline_proxy.get_city()
+    offline_proxy.apply_map_patch(city, {"version": "1.1", "changes": [[1, 0, "B"]]})
+    assert city.is_blocked(1, 0)
+    # El JSON en caché no se reescribe
+    assert not (offline_proxy.cache_dir / "ciudad.json").exists()
+
+    reloaded = offline_proxy.get_city()
+    assert reloaded.version == "1.1"
+    assert reloaded.is_blocked(1, 0)
+    assert not reloaded.is_reachable([0, 0], [2, 0])
+
+
+def test_truncated_patch_log_is_compacted(offline_proxy):
+    city = offline_proxy.get_city()
+    offline_proxy.apply_map_patch(city, {"version": "1.1", "changes": [[1, 0, "B"]]})
+    with open(offline_proxy.cache_dir / "ciudad.patches", 'a') as f:
+        f.write('{"version": "1.2", "chan')
+
+    reloaded = offline_proxy.get_city()
+    assert reloaded.version == "1.1"
+    assert not (offline_proxy.cache_dir / "ciudad.patches").exists()
+    assert offline_proxy.get_city().is_blocked(1, 0)
+
+
+def test_large_map_opens_by_chunks(offline_proxy, monkeypatch):
+    monkeypatch.setattr(proxy.config, "CHUNKED_CITY_MIN_CELLS", 3)
+    city = offline_proxy.get_city()
+    assert isinstance(city, proxy.ChunkedCity)
+    assert [city.get_tile(x, 0) for x in range(3)] == ["C", "C", "C"]
+
+    offline_proxy.apply_map_patch(city, {"version": "1.1", "changes": [[1, 0, "B"]]})
+    assert not (offline_proxy.cache_dir / "ciudad.patches").exists()
+    reloaded = offline_proxy.get_city()
+    assert isinstance(reloaded, proxy.ChunkedCity)
+    assert reloaded.version == "1.1"
+    assert reloaded.is_blocked(1, 0)
+
+
+class DroppingRaw:
+    """Cuerpo de respuesta que se corta después de entregar prefix."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.decode_content = False
+
+    def read(self, size=-1):
+        if self.prefix:
+            chunk, self.prefix = self.prefix, b""
+            return chunk
+        raise ConnectionResetError("conexión cortada")
+
+
+def test_stream_falls_back_to_cache_without_duplicates(offline_proxy, tmp_path, monkeypatch):
+    jobs = [{"id": f"P{i}"} for i in range(4)]
+    (tmp_path / "data" / "pedidos.json").write_text(json.dumps({"data": jobs}))
+    body = json.dumps({"data": jobs}).encode()
+
+    class Response:
+        status_code = 200
+        raw = DroppingRaw(body[:body.index(b'"P2"')])
+
+    monkeypatch.setattr(proxy.requests, "get", lambda *args, **kwargs: Response())
+    offline_proxy.offline = False
+    streamed = list(offline_proxy._stream_json("city/jobs", "pedidos.json", ("data",)))
+
+    assert [job["id"] for job in streamed] == ["P0", "P1", "P2", "P3"]
+    assert not (offline_proxy.cache_dir / "pedidos.json.tmp").exists()
+    assert not (offline_proxy.cache_dir / "pedidos.json").exists()
+
+
+def test_stream_fallback_skips_delivered_ids_when_cache_differs(offline_proxy, tmp_path, monkeypatch):
+    # El caché es de otra descarga: otro orden, un pedido que ya no está y uno nuevo
+    cached = [{"id": "P1"}, {"id": "P9"}, {"id": "P0"}, {"id": "P3"}]
+    (tmp_path / "data" / "pedidos.json").write_text(json.dumps({"data": cached}))
+    body = json.dumps({"data": [{"id": f"P{i}"} for i in range(4)]}).encode()
+
+    class Response:
+        status_code = 200
+        raw = DroppingRaw(body[:body.index(b'"P2"')])
+
+    monkeypatch.setattr(proxy.requests, "get", lambda *args, **kwargs: Response())
+    offline_proxy.offline = False
+    streamed = list(offline_proxy._stream_json("city/jobs", "pedidos.json", ("data",)))
+
+    assert [job["id"] for job in streamed] == ["P0", "P1", "P9", "P3"]
+
+
+def test_enrichment_cache_follows_feed(offline_proxy, tmp_path, monkeypatch):
+    feed = tmp_path / "data" / "pedidos.json"
+    jobs = [{"id": "P0", "pickup": [0, 0], "dropoff": [2, 0], "deadline": None}]
+    feed.write_text(json.dumps({"data": jobs}))
+    calls = []
+    original = proxy.compute_annotations
+    monkeypatch.setattr(proxy, "compute_annotations",
+                        lambda city, jobs: calls.append(len(jobs)) or original(city, jobs))
+    city = offline_proxy.get_city()
+
+    first = offline_proxy.get_jobs(city)
+    assert offline_proxy.get_jobs(city) == first
+    assert calls == [1]
+
+    jobs.append({"id": "P1", "pickup": [1, 0], "dropoff": [0, 0], "deadline": None})
+    feed.write_text(json.dumps({"data": jobs}))
+    assert [job["id"] for job in offline_proxy.get_jobs(city)] == ["P0", "P1"]
+    assert calls == [1, 2]
+
+
+def test_get_jobs_relocates_or_drops_unreachable_points(offline_proxy, tmp_path, monkeypatch):
+    # Columna 6: isla a 2 tiles de la zona del jugador; columna 15: isla a 11
+    (tmp_path / "data" / "ciudad.json").write_text(json.dumps({"data": {
+        "version": "1.0", "width": 16, "height": 3, "tiles": ["CCCCCBCBBBBBBBBC"] * 3,
+        "legend": {"C": {"surface_weight": 1.0}, "B": {"blocked": True}}
+    }}))
+    (tmp_path / "data" / "pedidos.json").write_text(json.dumps({"data": [
+        {"id": "P0", "pickup": [0, 0], "dropoff": [2, 2], "deadline": None},
+        {"id": "P1", "pickup": [6, 1], "dropoff": [1, 0], "deadline": None},
+        {"id": "P2", "pickup": [0, 2], "dropoff": [15, 1], "deadline": None}
+    ]}))
+    monkeypatch.setattr(proxy.config, "PLAYER_SPAWN", (1, 1))
+    monkeypatch.setattr(proxy.config, "MAX_JOB_RELOCATION", 10)
+
+    jobs = offline_proxy.get_jobs(offline_proxy.get_city())
+    assert [job["id"] for job in jobs] == ["P0", "P1"]
+    assert jobs[0]["pickup"] == [0, 0] and jobs[0]["dropoff"] == [2, 2]
+    assert jobs[1]["pickup"] == [4, 1]
+    assert offline_proxy.last_jobs_report == {
+        "relocated": [{"id": "P1", "field": "pickup", "from": [6, 1], "to": [4, 1]}],
+        "dropped": ["P2"]
+    }
+
+    # Con un límite menor la isla cercana también queda fuera
+    monkeypatch.setattr(proxy.config, "MAX_JOB_RELOCATION", 1)
+    assert [job["id"] for job in offline_proxy.get_jobs(offline_proxy.get_city())] == ["P0"]
+    assert offline_proxy.last_jobs_report == {"relocated": [], "dropped": ["P1", "P2"]}
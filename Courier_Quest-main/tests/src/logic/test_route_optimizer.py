@@ -0,0 +1,186 @@
+import itertools
+import math
+import random
+import time
+import pytest
+from src.logic.city import City
+from src.logic.inventory import Inventory
+from src.logic.order import Order
+from src.logic.route_optimizer import RouteOptimizer, plan_route, travel_time_matrix
+from src.logic.travel_time import TravelTimeRouter
+
+
+def make_order(order_id, pickup, dropoff, deadline=10000, weight=1):
+    return Order(order_id, list(pickup), list(dropoff), 100, deadline, weight, 0, 0)
+
+
+def manhattan_matrix(start, carried, candidates):
+    points = [start] + [p for order in carried for p in (start, tuple(order.dropoff))]
+    points += [tuple(p) for order in candidates for p in (order.pickup, order.dropoff)]
+    return [[abs(a[0] - b[0]) + abs(a[1] - b[1]) for b in points] for a in points]
+
+
+def check_plan(plan, carried, capacity):
+    load = sum(order.weight for order in carried)
+    picked = {order.id for order in carried}
+    for kind, order in plan.stops:
+        if kind == "pickup":
+            picked.add(order.id)
+            load += order.weight
+        else:
+            assert order.id in picked
+            load -= order.weight
+        assert load <= capacity
+
+
+def test_line_route_is_optimal():
+    # Todo sobre una línea: lo óptimo es recorrerla hacia un lado
+    carried = [make_order("C1", (0, 0), (9, 0)), make_order("C2", (0, 0), (3, 0))]
+    candidates = [make_order("N1", (5, 0), (7, 0)), make_order("N2", (1, 0), (2, 0))]
+    start = (0, 0)
+    plan = plan_route(start, carried, candidates, matrix=manhattan_matrix(start, carried, candidates))
+    assert [(kind, order.id) for kind, order in plan.stops] == [
+        ("pickup", "N2"), ("dropoff", "N2"), ("dropoff", "C2"),
+        ("pickup", "N1"), ("dropoff", "N1"), ("dropoff", "C1")]
+    assert plan.cost == 9 and plan.lateness == 0 and plan.finish_time == 9
+    assert plan.dropoff_order() == ["N2", "C2", "N1", "C1"]
+
+
+def test_precedence_capacity_and_quality():
+    rng = random.Random(7)
+    point = lambda: (rng.randint(0, 20), rng.randint(0, 20))
+    for _ in range(20):
+        carried = [make_order(f"C{i}", (0, 0), point(), rng.randint(10, 80), rng.randint(1, 3)) for i in range(2)]
+        candidates = [make_order(f"N{i}", point(), point(), rng.randint(20, 120), rng.randint(1, 4)) for i in range(2)]
+        start = (10, 10)
+        optimizer = RouteOptimizer(start, carried, candidates, capacity=7,
+                                   matrix=manhattan_matrix(start, carried, candidates))
+        plan = optimizer.optimize()
+        check_plan(plan, carried, 7)
+        assert plan.cost == pytest.approx(optimizer.evaluate(
+            [2 * optimizer.orders.index(order) + (kind == "dropoff") for kind, order in plan.stops]))
+
+        if not plan.skipped:
+            stops = [1, 3, 4, 5, 6, 7]
+            optimum = min(optimizer.evaluate(list(route)) for route in itertools.permutations(stops))
+            assert plan.cost <= optimum * 1.5 + 1e-9
+
+
+def test_budget_keeps_carried_orders():
+    rng = random.Random(1)
+    point = lambda: (rng.randint(0, 60), rng.randint(0, 60))
+    carried = [make_order(f"C{i}", (0, 0), point()) for i in range(10)]
+    candidates = [make_order(f"N{i}", point(), point()) for i in range(40)]
+    start = (30, 30)
+    plan = plan_route(start, carried, candidates, capacity=20, budget_ms=0,
+                      matrix=manhattan_matrix(start, carried, candidates))
+    assert {order.id for order in carried} <= set(plan.dropoff_order())
+    check_plan(plan, carried, 20)
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.5},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def test_city_matrix_and_unreachable(city):
+    points = [(1, 1), (4, 1), (2, 3), (0, 0)]
+    matrix = travel_time_matrix(city, points, base_speed=2)
+    router = TravelTimeRouter(city, base_speed=2)
+    for i, a in enumerate(points[:3]):
+        for j, b in enumerate(points[:3]):
+            assert matrix[i][j] == pytest.approx(router.eta(a, b, "clear"), rel=1e-5)
+    assert math.isinf(matrix[0][3])
+
+    carried = [make_order("C1", (1, 1), (0, 0)), make_order("C2", (1, 1), (4, 1))]
+    plan = plan_route((1, 1), carried, [make_order("N1", (2, 3), (1, 3))], capacity=5, city=city)
+    assert plan.dropoff_order()[-1] == "C1"
+    assert math.isfinite(plan.cost)
+
+
+def test_lazy_times_match_full_matrix(city):
+    carried = [make_order("C1", (1, 1), (4, 3))]
+    candidates = [make_order("N1", (2, 3), (1, 3)), make_order("N2", (4, 1), (2, 1))]
+
+    full = RouteOptimizer((1, 1), carried, candidates, city=city, base_speed=2)
+    full_matrix = travel_time_matrix(city, full.points, base_speed=2)
+    for router in (None, TravelTimeRouter(city, base_speed=2)):
+        lazy = RouteOptimizer((1, 1), carried, candidates, city=city, router=router, base_speed=2)
+        plan = lazy.optimize()
+        used = [0] + [stop + 1 for stop in range(2 * len(lazy.orders)) if stop != 0]
+        for i in used:
+            for j in used:
+                assert lazy.matrix[i][j] == pytest.approx(full_matrix[i][j], rel=1e-5)
+        assert plan.cost == pytest.approx(full.optimize().cost, rel=1e-5)
+
+
+def test_zero_budget_skips_candidate_times(city):
+    carried = [make_order("C1", (1, 1), (4, 3))]
+    candidates = [make_order("N1", (2, 3), (1, 3))]
+    optimizer = RouteOptimizer((1, 1), carried, candidates, city=city)
+    plan = optimizer.optimize(budget_ms=0)
+    assert plan.dropoff_order() == ["C1"]
+    assert [order.id for order in plan.skipped] == ["N1"]
+    assert optimizer._active == [0, 2]
+
+
+def test_budget_holds_on_large_city():
+    # 120x120 con calles en cuadrícula: una búsqueda completa ya pasa el presupuesto
+    size = 120
+    rows = ["".join("B" if x % 4 == 2 and y % 4 == 2 else "C" for x in range(size)) for y in range(size)]
+    big = City({"width": size, "height": size, "tiles": rows,
+                "legend": {"C": {"surface_weight": 1.0}, "B": {"blocked": True}}})
+    rng = random.Random(3)
+
+    def spot():
+        while True:
+            x, y = rng.randrange(size), rng.randrange(size)
+            if not big.is_blocked(x, y):
+                return x, y
+
+    carried = [make_order(f"C{k}", (0, 0), spot()) for k in range(5)]
+    candidates = [make_order(f"N{k}", spot(), spot()) for k in range(5)]
+    router = TravelTimeRouter(big)
+    router.field("clear")
+    optimizer = RouteOptimizer((0, 0), carried, candidates, city=big, router=router)
+    started = time.perf_counter()
+    plan = optimizer.optimize(budget_ms=10)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    assert elapsed < 40
+    assert sorted(plan.dropoff_order())[:5] == [f"C{k}" for k in range(5)]
+    check_plan(plan, carried, math.inf)
+
+
+def test_inventory_reorder():
+    inventory = Inventory(max_weight=10)
+    for order_id in ("A", "B", "C", "D"):
+        inventory.add_order(make_order(order_id, (0, 0), (1, 1)))
+    inventory.view_next_order()
+    inventory.reorder(["C", "A"])
+
+    ids = []
+    node = inventory.first
+    while node:
+        ids.append(node.order.id)
+        assert node.next is None or node.next.prev is node
+        node = node.next
+    assert ids == ["C", "A", "B", "D"]
+    assert inventory.last.order.id == "D"
+    assert inventory.current_order.order.id == "C"
@@ -0,0 +1,48 @@
+import pytest
+from src.logic.scheduler import Scheduler
+
+
+def test_events_fire_in_time_order():
+    scheduler = Scheduler()
+    log = []
+    scheduler.schedule_at(5, lambda: log.append(("b", scheduler.now)))
+    scheduler.schedule_at(2, lambda: log.append(("a", scheduler.now)))
+    scheduler.schedule_in(5, log.append, ("c", 5))
+    cancelled = scheduler.schedule_at(3, log.append, "x")
+    cancelled.cancel()
+
+    assert scheduler.advance(1) == 0 and scheduler.now == 1
+    assert scheduler.advance_to(6) == 3
+    assert log == [("a", 2), ("b", 5), ("c", 5)]
+    assert scheduler.now == 6 and scheduler.next_time() is None
+
+
+def test_repeating_and_rescheduling_from_callbacks():
+    scheduler = Scheduler(10)
+    ticks = []
+    scheduler.every(3, lambda: ticks.append(scheduler.now))
+    chain = []
+
+    def step():
+        chain.append(scheduler.now)
+        if len(chain) < 3:
+            scheduler.schedule_in(1, step)
+
+    scheduler.schedule_in(0.5, step)
+    scheduler.advance_to(20)
+    assert ticks == [13, 16, 19]
+    assert chain == [10.5, 11.5, 12.5]
+    assert scheduler.next_time() == 22
+    with pytest.raises(ValueError):
+        scheduler.every(0, print)
+
+
+def test_skip_to_next():
+    scheduler = Scheduler()
+    fired = []
+    scheduler.schedule_at(40, fired.append, "release")
+    scheduler.schedule_at(900, fired.append, "end")
+    assert scheduler.skip_to_next() == 40 and fired == ["release"]
+    assert scheduler.skip_to_next(limit=100) == 60 and scheduler.now == 100
+    assert scheduler.skip_to_next() == 800 and fired == ["release", "end"]
+    assert scheduler.skip_to_next() == 0.0 and len(scheduler) == 0
@@ -0,0 +1,63 @@
+import pytest
+from src.logic.city import City
+from src.logic.player import Player
+from src.logic.stamina_planner import StaminaPlanner
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 8,
+        "height": 3,
+        "tiles": [
+            "BBBBBBBB",
+            "BCPCCCCB",
+            "BBBBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 1.0},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def test_plan_without_rests(city):
+    player = Player(1, 1, 1000)
+    plan = StaminaPlanner(city).plan(player, (6, 1), "clear")
+    assert plan.path == [[1, 1], [2, 1], [3, 1], [4, 1], [5, 1], [6, 1]]
+    assert plan.rests == []
+    assert plan.total_time == pytest.approx(5 / 3)
+    assert plan.final_stamina == pytest.approx(97.5)
+
+
+def test_rests_at_cheapest_point(city):
+    player = Player(1, 1, 1000)
+    player.stamina = 1
+    plan = StaminaPlanner(city, stamina_step=0.5).plan(player, (6, 1), "clear")
+
+    # Con resistencia 1 no alcanza sin descansar: conviene hacerlo en el parque y
+    # solo lo necesario, aunque el resto del trayecto sea a velocidad reducida
+    assert plan.path[-1] == [6, 1]
+    assert plan.rests == [(2, 1, pytest.approx(9.5 / 10))]
+    assert plan.final_stamina == pytest.approx(8.0)
+    assert plan.total_time == pytest.approx(1 / 2.4 + 0.95 + 4 / 2.4)
+
+
+def test_exhausted_player_must_rest_first(city):
+    player = Player(1, 1, 1000)
+    player.stamina = 10
+    player.is_exhausted = True
+    plan = StaminaPlanner(city).plan(player, (3, 1), "clear")
+    assert plan.steps[1] == ('rest', pytest.approx(20 / 5))
+
+
+def test_cache_and_unreachable(city):
+    planner = StaminaPlanner(city)
+    player = Player(1, 1, 1000)
+    assert planner.plan(player, (6, 1), "clear") is planner.plan(player, (6, 1), "clear")
+    assert planner.plan(player, (6, 1), "storm") is not planner.plan(player, (6, 1), "clear")
+
+    city.set_tile(4, 1, "B")
+    assert planner.plan(player, (6, 1), "clear") is None
@@ -0,0 +1,76 @@
+import math
+from datetime import datetime
+import pytest
+from src.logic.city import City
+from src.logic.travel_time import TravelTimeRouter
+from src.config.config import WEATHER_MULTIPLIERS
+
+
+@pytest.fixture
+def city():
+    return City({
+        "version": "1.0",
+        "width": 6,
+        "height": 5,
+        "tiles": [
+            "BBBBBB",
+            "BCCPCB",
+            "BCBBCB",
+            "BCCCCB",
+            "BBBBBB"
+        ],
+        "legend": {
+            "C": {"surface_weight": 1.0},
+            "P": {"surface_weight": 0.5},
+            "B": {"blocked": True}
+        }
+    })
+
+
+def test_eta_follows_speed_model(city):
+    router = TravelTimeRouter(city, base_speed=2)
+    # (2,1) y luego (3,1) con peso 0.5 y (4,1): 1/2 + 1/1 + 1/2
+    assert router.eta([1, 1], [4, 1], "clear") == pytest.approx(2.0)
+
+    m = WEATHER_MULTIPLIERS["storm"]
+    assert router.eta([1, 1], [4, 1], "storm") == pytest.approx(2.0 / m)
+    assert router.eta([1, 1], [4, 1], "clear", speed_factor=0.8) == pytest.approx(2.0 / 0.8)
+    assert math.isinf(router.eta([1, 1], [4, 1], "clear", speed_factor=0))
+
+
+def test_prefers_faster_route(city):
+    router = TravelTimeRouter(city, base_speed=1)
+    # Por arriba cruza el parque lento (1 + 2 + 1 + 1 + 1 = 6); por abajo tarda 5
+    path, seconds = router.route([1, 1], [4, 3], "clear")
+    assert path == ((1, 1), (1, 2), (1, 3), (2, 3), (3, 3), (4, 3))
+    assert seconds == pytest.approx(5.0)
+
+
+def test_transition_blends_speed(city):
+    router = TravelTimeRouter(city, base_speed=2)
+    clear = WEATHER_MULTIPLIERS["clear"]
+    storm = WEATHER_MULTIPLIERS["storm"]
+    blended = router.eta([1, 1], [4, 1], "clear", next_weather="storm", progress=0.5)
+    assert blended == pytest.approx(2.0 / (clear + (storm - clear) * 0.5))
+    assert len(router._fields) == 2
+
+
+def test_traffic_buckets_and_updates(city):
+    router = TravelTimeRouter(city, base_speed=1, traffic_buckets=[(12, 14, {"C": 0.5})])
+    noon = datetime(2025, 9, 1, 12, 30)
+    evening = datetime(2025, 9, 1, 18, 0)
+    assert router.bucket_for(noon) == 0
+    assert router.bucket_for(evening) is None
+    assert router.eta([1, 1], [2, 1], "clear", game_time=noon) == pytest.approx(2.0)
+    assert router.eta([1, 1], [2, 1], "clear", game_time=evening) == pytest.approx(1.0)
+
+    city.set_tile(2, 1, "P")
+    assert router.eta([1, 1], [2, 1], "clear", game_time=evening) == pytest.approx(2.0)
+
+
+def test_close_stops_following_city(city):
+    router = TravelTimeRouter(city, base_speed=1)
+    router.eta([1, 1], [4, 1], "clear")
+    router.close()
+    assert not city._listeners
+    assert not router._fields